@@ -1,12 +1,15 @@
 # app.py
 
 import streamlit as st
-from utils.semantic_matcher import find_best_matching_qid, PROMPT_BANK
-import importlib
-from kpi_engine import margin
+from utils.semantic_matcher import route_query, warm_up, PROMPT_BANK
+from utils import slots, tracing
+from utils.report import Report
+from utils.result_cache import result_cache
+from data_loader import datasets
+from data_loader.registry import enable_copy_on_write
+from questions import registry as question_registry
 import os
 import pandas as pd
-import inspect
 import base64
 
 # ✅ Add your custom PROMPT BANK here
@@ -18,17 +21,17 @@ PROMPT_BANK = [
     "What is FTE trend over months?"
 ]
 
+# ✅ Sessions share the loaded frames through copy-on-write views
+enable_copy_on_write()
+
+# ✅ Start loading the intent model while the page renders
+warm_up()
+
 # ✅ Load data from sample_data folder
-@st.cache_data
+# One frozen frame per process, shared by every session without pickling or copying
+@st.cache_resource
 def load_data():
-    filepath = os.path.join("sample_data", "LnTPnL.xlsx")
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"File not found at path: {filepath}")
-    df = margin.load_pnl_data(filepath)
-    df = margin.preprocess_pnl_data(df)
-    if df.empty:
-        raise ValueError("Loaded P&L data is empty after preprocessing.")
-    return df
+    return datasets.load_pnl()
 
 try:
     df = load_data()
@@ -36,6 +39,37 @@ except Exception as e:
     st.error(f"❌ Failed to load data: {e}")
     st.stop()
 
+# ✅ Question modules are imported and bound once per process
+QUESTIONS = question_registry.specs()
+# Each question gets its own copy-on-write view of the shared frames
+DATASETS = {"pnl": lambda: df.copy(deep=False), "ut": datasets.load_ut}
+
+def render_result(result):
+    # Streamlit-native questions render themselves and return None
+    if result is None:
+        return
+    if isinstance(result, Report):
+        result.render(st)
+    elif isinstance(result, pd.DataFrame):
+        st.dataframe(result)
+    elif isinstance(result, str):
+        st.markdown(result)
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            if key in ("summary", "answer"):
+                st.markdown(value)
+            elif key == "chart":
+                if value and value.get("x") is not None:
+                    st.markdown(f"#### {value.get('title', '')}")
+                    st.line_chart(pd.DataFrame({value.get("y_label", "Value"): value["y"]}, index=value["x"]))
+            elif isinstance(value, (pd.DataFrame, list)):
+                st.markdown(f"#### {key.replace('_', ' ').title()}")
+                st.dataframe(pd.DataFrame(value))
+            else:
+                st.write(value)
+    else:
+        st.write(result)
+
 # Streamlit page config
 st.set_page_config(page_title="LTTS BI Assistant", layout="wide")
 
@@ -113,30 +147,34 @@ user_question = st.text_input(
 
 # Render result if input exists
 if user_question:
-    try:
-        best_qid, matched_prompt = find_best_matching_qid(user_question)
-
-        question_module = importlib.import_module(f"questions.question_{best_qid.lower()}")
-        run_func = question_module.run
-        run_params = inspect.signature(run_func).parameters
-
-        if len(run_params) == 2:
-            result = run_func(df, user_question)
-        else:
-            result = run_func(df)
-
-        st.success("✅ Analysis complete.")
-        if isinstance(result, pd.DataFrame):
-            st.dataframe(result)
-        elif isinstance(result, str):
-            st.markdown(result)
-        else:
-            st.write(result)
-
-    except ModuleNotFoundError as e:
-        st.error(f"❌ Could not load analysis script for {best_qid}: {e}")
-    except Exception as e:
-        st.error(f"❌ Error running analysis: {e}")
+    # Stage timings for this answer go to the developer panel below
+    with tracing.trace(user_question, source="app"):
+        try:
+            route = route_query(user_question)
+            best_qid, matched_prompt = route.qid, route.question
+            tracing.annotate(qid=best_qid, tier=route.tier)
+            st.caption(f"Matched {best_qid} via {route.tier} ({route.confidence:.2f})")
+
+            spec = QUESTIONS.get(best_qid)
+            if spec is None:
+                st.error(f"❌ Could not load analysis script for {best_qid}: {question_registry.failures.get(best_qid, 'not found')}")
+            else:
+                # Load only the datasets this question reads; their names feed the slot gazetteer
+                with tracing.span("data"):
+                    frames = {name: DATASETS[name]() for name in spec.datasets}
+                params = slots.extract(user_question, list(frames.values()))
+                result = question_registry.dispatch(spec, params, frames, cache=result_cache)
+
+                st.success("✅ Analysis complete.")
+                with tracing.span("render"):
+                    render_result(result)
+
+        except question_registry.MissingSlotError as e:
+            tracing.annotate(error=str(e))
+            st.warning(f"⚠️ {e}. Please include it in your question.")
+        except Exception as e:
+            tracing.annotate(error=f"{type(e).__name__}: {e}")
+            st.error(f"❌ Error running analysis: {e}")
 
 # Always display the prompt bank (bottom)
 st.markdown("---")
@@ -144,3 +182,21 @@ st.markdown("💡 **Try asking:**")
 
 for prompt in PROMPT_BANK:
     st.button(prompt, on_click=handle_click, args=(prompt,))
+
+# 🛠 Developer panel: per-stage timings of recent answers
+with st.sidebar.expander("🛠 Developer: question timings"):
+    traces = tracing.recorder.recent()
+    if not traces:
+        st.caption("No questions answered yet.")
+    else:
+        last = traces[-1]
+        st.markdown(f"**Last:** {last['qid'] or '-'} in {last['duration_ms']:.0f} ms")
+        st.dataframe(pd.DataFrame([
+            {"span": "  " * s["depth"] + s["name"], "start_ms": s["start_ms"], "duration_ms": s["duration_ms"],
+             "attrs": ", ".join(f"{k}={v}" for k, v in s["attrs"].items())}
+            for s in last["spans"]
+        ]), hide_index=True)
+        st.markdown(f"**By question** ({len(traces)} traces)")
+        st.dataframe(tracing.stage_summary(traces), hide_index=True)
+        st.download_button("Export traces (JSON lines)", tracing.recorder.to_jsonl(),
+                           file_name="traces.jsonl", mime="application/x-ndjson")
@@ -0,0 +1,43 @@
+# data_loader/datasets.py
+# The named datasets questions read, loaded through the process-wide registry.
+#
+# Both front ends (the Streamlit app and the headless service) resolve a
+# question's datasets through LOADERS, so they share one loaded, preprocessed
+# copy of each workbook and its derived artifacts.
+
+import os
+
+from data_loader.registry import load_sheet, PNL_PATH, PNL_SHEET, UT_PATH, UT_SHEET
+from kpi_engine import headcount, margin, utilization
+
+
+def load_pnl():
+    """
+    The preprocessed P&L, compacted to categoricals.
+
+    Returns:
+        pd.DataFrame: A copy-on-write view of the shared frame.
+    """
+    if not os.path.exists(PNL_PATH):
+        raise FileNotFoundError(f"File not found at path: {PNL_PATH}")
+    df = load_sheet(PNL_PATH, PNL_SHEET, usecols=margin.PNL_COLUMNS, preprocess=margin.preprocess_pnl_data_compact)
+    if df.empty:
+        raise ValueError("Loaded P&L data is empty after preprocessing.")
+    return df
+
+
+def load_ut():
+    """
+    The preprocessed LNTData allocation table.
+
+    Returns:
+        pd.DataFrame: A copy-on-write view of the shared frame.
+    """
+    ut = load_sheet(UT_PATH, UT_SHEET, usecols=headcount.UT_COLUMNS, preprocess=headcount.preprocess_ut_data)
+    # Build the UT% cell table with the data (once per dataset) so UT questions only slice it
+    utilization.engine_for(ut)
+    return ut
+
+
+# Dataset name (as bound by questions.registry) -> loader
+LOADERS = {"pnl": load_pnl, "ut": load_ut}
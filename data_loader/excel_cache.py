@@ -0,0 +1,206 @@
+# data_loader/excel_cache.py
+# Transparent Parquet cache in front of pd.read_excel.
+#
+# The first read of a (workbook, sheet) parses the Excel file through openpyxl
+# and writes the frame to a columnar Parquet file under CACHE_DIR. Later reads
+# of the same sheet are served from Parquet as long as the workbook has not
+# changed. A workbook counts as unchanged when its mtime and size match the
+# cached metadata, or, if the mtime moved, when its content hash still matches.
+# Sheets that cannot be written as Parquet (mixed-type object columns, say)
+# are recorded as such and parsed straight from Excel until the workbook
+# changes.
+
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from data_loader.streaming import read_excel_columns
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Cache lives next to sample_data/ (relative to the app's working directory)
+CACHE_DIR = os.environ.get("CA_CACHE_DIR", os.path.join(".cache", "excel"))
+
+_lock = threading.Lock()
+
+
+def file_content_hash(filepath, chunk_size=1 << 20):
+    """Return the SHA-1 hex digest of a file's bytes."""
+    digest = hashlib.sha1()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _slot_name(filepath, sheet_name, usecols=None, read_kwargs=None):
+    columns = "*" if usecols is None else ",".join(sorted(str(c) for c in usecols))
+    # Options such as header, skiprows or dtype change the frame, so each set gets its own slot
+    options = json.dumps(read_kwargs or {}, sort_keys=True, default=repr)
+    raw = f"{os.path.abspath(filepath)}|{sheet_name}|{columns}|{options}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _lookup(filepath, meta):
+    """Return the cached parquet path if `meta` still describes `filepath`."""
+    if not meta:
+        return None
+    parquet_path = meta.get("parquet")
+    if not parquet_path or not os.path.exists(parquet_path):
+        return None
+
+    stat = os.stat(filepath)
+    if meta.get("mtime") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+        return parquet_path
+    if meta.get("size") != stat.st_size:
+        return None
+
+    # mtime moved (copy, checkout, touch) - fall back to the content hash
+    if file_content_hash(filepath) == meta.get("sha1"):
+        return parquet_path
+    return None
+
+
+def _is_unsupported(filepath, meta):
+    """True if `meta` records that this version of `filepath` could not be cached."""
+    if not meta or not meta.get("unsupported"):
+        return False
+    stat = os.stat(filepath)
+    return meta.get("mtime") == stat.st_mtime_ns and meta.get("size") == stat.st_size
+
+
+def _parse(filepath, sheet_name, usecols, read_kwargs):
+    if usecols is not None and not read_kwargs:
+        # Projected reads stream only the declared columns into NumPy buffers
+        return read_excel_columns(filepath, sheet_name=sheet_name, usecols=usecols)
+    return pd.read_excel(filepath, sheet_name=sheet_name, usecols=usecols, **read_kwargs)
+
+
+def read_excel_cached(filepath, sheet_name=0, usecols=None, cache_dir=None, **read_kwargs):
+    """
+    Reads one sheet of an Excel workbook, going through the Parquet cache.
+
+    Args:
+        filepath (str): Path to the Excel workbook.
+        sheet_name (str | int): Sheet to read.
+        usecols (list[str]): Header names to keep, None for every column.
+            Each distinct column set is cached separately.
+        cache_dir (str): Cache directory, defaults to CACHE_DIR.
+        **read_kwargs: Extra keyword arguments for pd.read_excel on a cache
+            miss. Reads with different options are cached separately.
+
+    Returns:
+        pd.DataFrame: The sheet contents.
+    """
+    if not PARQUET_AVAILABLE:
+        return _parse(filepath, sheet_name, usecols, read_kwargs)
+
+    cache_dir = cache_dir or CACHE_DIR
+    slot = _slot_name(filepath, sheet_name, usecols, read_kwargs)
+    meta_path = os.path.join(cache_dir, f"{slot}.json")
+
+    with _lock:
+        meta = _read_meta(meta_path)
+        unsupported = _is_unsupported(filepath, meta)
+        parquet_path = None if unsupported else _lookup(filepath, meta)
+        if parquet_path:
+            stat = os.stat(filepath)
+            if meta["mtime"] != stat.st_mtime_ns:
+                meta["mtime"] = stat.st_mtime_ns
+                _write_meta(meta_path, meta)
+            return pd.read_parquet(parquet_path)
+
+    df = _parse(filepath, sheet_name, usecols, read_kwargs)
+    if unsupported:
+        return df
+
+    with _lock:
+        try:
+            _store(df, filepath, sheet_name, cache_dir, slot, meta_path)
+        except Exception as e:
+            # Caching is best effort: sheets with mixed-type object columns or
+            # non-string headers cannot be written as Parquet, serve them as-is
+            # and remember not to try again for this version of the workbook
+            _write_unsupported(filepath, sheet_name, cache_dir, slot, meta_path, e)
+    return df
+
+
+def _store(df, filepath, sheet_name, cache_dir, slot, meta_path):
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(filepath)
+
+    # Written before hashing the workbook, so a sheet Parquet rejects costs no hash
+    tmp_path = os.path.join(cache_dir, f"{slot}.parquet.tmp")
+    # index=None keeps a non-default index (e.g. from index_col) and drops a RangeIndex
+    df.to_parquet(tmp_path, index=None)
+    sha1 = file_content_hash(filepath)
+    parquet_path = os.path.join(cache_dir, f"{slot}-{sha1[:16]}.parquet")
+    os.replace(tmp_path, parquet_path)
+
+    old = _read_meta(meta_path)
+    if old and old.get("parquet") not in (None, parquet_path) and os.path.exists(old["parquet"]):
+        os.remove(old["parquet"])
+
+    _write_meta(meta_path, {
+        "path": os.path.abspath(filepath),
+        "sheet": str(sheet_name),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha1": sha1,
+        "parquet": parquet_path,
+    })
+
+
+def _write_unsupported(filepath, sheet_name, cache_dir, slot, meta_path, error):
+    tmp_path = os.path.join(cache_dir, f"{slot}.parquet.tmp")
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    old = _read_meta(meta_path)
+    try:
+        if old and old.get("parquet") and os.path.exists(old["parquet"]):
+            os.remove(old["parquet"])
+        os.makedirs(cache_dir, exist_ok=True)
+        stat = os.stat(filepath)
+        _write_meta(meta_path, {
+            "path": os.path.abspath(filepath),
+            "sheet": str(sheet_name),
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "parquet": None,
+            "unsupported": f"{type(error).__name__}: {error}",
+        })
+    except OSError:
+        pass
+
+
+def clear_cache(cache_dir=None):
+    """Deletes every cached sheet under `cache_dir`."""
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return
+    with _lock:
+        for name in os.listdir(cache_dir):
+            if name.endswith((".parquet", ".json", ".tmp")):
+                os.remove(os.path.join(cache_dir, name))
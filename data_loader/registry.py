@@ -0,0 +1,299 @@
+# data_loader/registry.py
+# Process-wide registry of loaded workbooks.
+#
+# Every (workbook, sheet) is read once per process and every preprocessing
+# step is applied once per sheet. Stored frames are frozen (their buffers are
+# read-only) and shared by every caller in the process; callers get
+# copy-on-write views of them, so renaming, adding or overwriting columns on a
+# view copies only what was written and never leaks back into the registry or
+# into other callers or sessions.
+#
+# The views depend on pandas copy-on-write, a process-wide option this module
+# does not set on import: front ends call enable_copy_on_write() at startup.
+# Without it, callers get deep copies instead, which are safe but cost a full
+# copy per call.
+#
+# With CA_SHARED_DIR set, datasets are also shared across processes: the
+# first process to load a sheet publishes it as memory-mapped columns
+# (data_loader/shared_frames.py) and every process maps those files
+# read-only, so N workers hold one copy of each dataset between them.
+
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data_loader import shared_frames
+from data_loader.excel_cache import read_excel_cached
+from utils import tracing
+
+PNL_PATH = os.path.join("sample_data", "LnTPnL.xlsx")
+PNL_SHEET = "LnTPnL"
+UT_PATH = os.path.join("sample_data", "LNTData.xlsx")
+UT_SHEET = "LNTData"
+
+# Directory for cross-process shared datasets; unset keeps datasets per process
+SHARED_DIR = os.environ.get("CA_SHARED_DIR") or None
+
+
+
+def _preprocess_name(preprocess):
+    if preprocess is None:
+        return None
+    module = getattr(preprocess, "__module__", "")
+    name = getattr(preprocess, "__qualname__", None) or repr(preprocess)
+    return f"{module}.{name}"
+
+
+def _owner(arr):
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+
+def _column_arrays(df):
+    """The NumPy arrays backing each column (codes for categoricals)."""
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays.append(series.array.codes)  # .cat.codes copies under copy-on-write
+        elif isinstance(series.dtype, np.dtype):
+            arrays.append(series.to_numpy())
+        # extension arrays may copy on to_numpy
+    return arrays
+
+
+def enable_copy_on_write():
+    """Turns on pandas copy-on-write for the process, so loaders can hand out views."""
+    pd.set_option("mode.copy_on_write", True)
+
+
+def _view(df):
+    """A copy-on-write view of a stored frame, or a deep copy when copy-on-write is off."""
+    if pd.get_option("mode.copy_on_write") is True:
+        return df.copy(deep=False)
+    # A plain shallow copy would write through into the shared, read-only buffers
+    return df.copy()
+
+
+def freeze(df):
+    """
+    Marks the buffers behind a frame read-only, in place.
+
+    An in-place write that slipped past copy-on-write (a raw NumPy view, a
+    C extension) then fails loudly instead of changing the data every other
+    session sees.
+
+    Returns:
+        pd.DataFrame: `df`.
+    """
+    for arr in _column_arrays(df):
+        _owner(arr).flags.writeable = False
+    return df
+
+
+class DatasetRegistry:
+    """Loads each (workbook, sheet) once and hands out read-only views of it."""
+
+    def __init__(self, reader=read_excel_cached, shared_dir=None):
+        self._reader = reader
+        self._shared_dir = shared_dir
+        self._frames = {}
+        self._mtimes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _is_stale(self, filepath, sheet_key):
+        try:
+            mtime = os.stat(filepath).st_mtime_ns
+        except OSError:
+            return False
+        return self._mtimes.get(sheet_key) not in (None, mtime)
+
+    def _load_raw(self, filepath, sheet_name, usecols):
+        sheet_key = (os.path.abspath(filepath), str(sheet_name), usecols, None)
+        with self._key_lock(sheet_key):
+            if sheet_key in self._frames and not self._is_stale(filepath, sheet_key):
+                return self._frames[sheet_key]
+
+            self.invalidate(filepath)
+            with tracing.span("data.read", sheet=str(sheet_name)):
+                df = freeze(self._reader(filepath, sheet_name=sheet_name, usecols=usecols and list(usecols)))
+            self._frames[sheet_key] = df
+            self._mtimes[sheet_key] = os.stat(filepath).st_mtime_ns
+            return df
+
+    def get(self, filepath, sheet_name=0, usecols=None, preprocess=None, name=None):
+        """
+        Returns a view of a loaded (and optionally preprocessed) sheet.
+
+        Args:
+            filepath (str): Path to the Excel workbook.
+            sheet_name (str | int): Sheet to read.
+            usecols (list[str]): Columns the consumer needs, None for all of them.
+            preprocess (callable): Optional df -> df step, applied once per sheet.
+            name (str): Cache name for `preprocess`, defaults to its qualified name.
+
+        Returns:
+            pd.DataFrame: A copy-on-write view of the shared frame (a deep
+                copy when copy-on-write is off, see enable_copy_on_write).
+        """
+        usecols = None if usecols is None else tuple(sorted(usecols))
+        if self._shared_dir is not None:
+            return _view(self._get_shared(filepath, sheet_name, usecols, preprocess, name))
+
+        raw = self._load_raw(filepath, sheet_name, usecols)
+        if preprocess is None:
+            return _view(raw)
+
+        key = (os.path.abspath(filepath), str(sheet_name), usecols, name or _preprocess_name(preprocess))
+        with self._key_lock(key):
+            df = self._frames.get(key)
+            if df is None:
+                # preprocess functions mutate their input, give them a private copy
+                with tracing.span("data.preprocess", step=name or _preprocess_name(preprocess)):
+                    df = freeze(preprocess(raw.copy()))
+                self._frames[key] = df
+        return _view(df)
+
+    def _get_shared(self, filepath, sheet_name, usecols, preprocess, name):
+        key = (os.path.abspath(filepath), str(sheet_name), usecols, name or _preprocess_name(preprocess))
+        with self._key_lock(key):
+            if key in self._frames and not self._is_stale(filepath, key):
+                return self._frames[key]
+
+            stat = os.stat(filepath)
+
+            def build():
+                # Only the publishing process reads the workbook; the raw frame is not kept
+                with tracing.span("data.read", sheet=str(sheet_name)):
+                    df = self._reader(filepath, sheet_name=sheet_name, usecols=usecols and list(usecols))
+                if preprocess is None:
+                    return df
+                with tracing.span("data.preprocess", step=key[3]):
+                    return preprocess(df)
+
+            with tracing.span("data.attach"):
+                df = freeze(shared_frames.load_shared(self._shared_dir, key, (stat.st_mtime_ns, stat.st_size), build))
+            self._frames[key] = df
+            self._mtimes[key] = stat.st_mtime_ns
+            return df
+
+    def invalidate(self, filepath=None):
+        """Drops cached frames for `filepath`, or for every workbook."""
+        with self._lock:
+            if filepath is None:
+                self._frames.clear()
+                self._mtimes.clear()
+                return
+            path = os.path.abspath(filepath)
+            for key in [k for k in self._frames if k[0] == path]:
+                self._frames.pop(key, None)
+                self._mtimes.pop(key, None)
+
+    def loaded(self):
+        """Returns the (path, sheet, usecols, preprocess) keys currently held."""
+        with self._lock:
+            return list(self._frames)
+
+
+registry = DatasetRegistry(shared_dir=SHARED_DIR)
+
+
+def load_sheet(filepath, sheet_name=0, usecols=None, preprocess=None, name=None):
+    """Shortcut for registry.get on the process-wide registry."""
+    return registry.get(filepath, sheet_name=sheet_name, usecols=usecols, preprocess=preprocess, name=name)
+
+
+# ---------------------------------------------------------------------------
+# Artifacts derived from a loaded frame (cubes, indexes, version hashes).
+#
+# Question modules receive a DataFrame, not a registry key, so derived
+# artifacts are keyed by the identity of the frame's column buffers. Shallow
+# views handed out by the registry share those buffers and therefore share
+# the artifacts; a filtered or copied frame gets its own.
+# ---------------------------------------------------------------------------
+
+_DERIVED_LIMIT = 16
+_derived = OrderedDict()
+_derived_lock = threading.Lock()
+
+
+def frame_token(df):
+    """
+    Identifies a frame by its column buffers.
+
+    Returns:
+        tuple: (token, owners) where owners are the NumPy arrays backing the
+            frame. The token is only meaningful while those arrays are alive.
+    """
+    ptrs, owners = [], []
+    for arr in _column_arrays(df):
+        owner = _owner(arr)
+        ptrs.append(arr.__array_interface__['data'][0])
+        owners.append(owner)
+    token = (len(df), tuple(str(c) for c in df.columns), tuple(ptrs))
+    return token, owners
+
+
+def derived(df, name, builder):
+    """
+    Returns builder(df), computed once per distinct frame.
+
+    Args:
+        df (pd.DataFrame): Frame the artifact is derived from.
+        name (str): Artifact name, e.g. "pnl_cube".
+        builder (callable): df -> artifact.
+    """
+    token, owners = frame_token(df)
+    key = (name, token)
+    with _derived_lock:
+        entry = _derived.get(key)
+        if entry is not None:
+            refs, value = entry
+            if owners and all(ref() is not None for ref in refs):
+                _derived.move_to_end(key)
+                return value
+            del _derived[key]
+
+    with tracing.span(f"derived.{name}"):
+        value = builder(df)
+    if not owners:
+        return value
+
+    with _derived_lock:
+        _derived[key] = ([weakref.ref(o) for o in owners], value)
+        while len(_derived) > _DERIVED_LIMIT:
+            _derived.popitem(last=False)
+    return value
+
+
+def _content_hash(df):
+    digest = hashlib.sha1()
+    digest.update(repr((df.shape, [str(c) for c in df.columns], [str(t) for t in df.dtypes])).encode("utf-8"))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Unhashable cells (lists, dicts): fall back to the text form
+        digest.update(df.to_csv().encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def dataset_version(df):
+    """
+    Content hash of a frame, computed once per loaded dataset.
+
+    Equal data gives an equal version even across copies, so caches keyed by
+    it survive Streamlit's per-rerun copies and invalidate when a workbook
+    is reloaded with different contents.
+    """
+    return derived(df, "dataset_version", _content_hash)
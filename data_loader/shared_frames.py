@@ -0,0 +1,180 @@
+# data_loader/shared_frames.py
+# Memory-mapped column store for sharing loaded frames across processes.
+#
+# When several app processes run side by side, each would otherwise parse,
+# preprocess and hold its own copy of every dataset. Instead, the first
+# process to load a dataset publishes it as one directory of .npy column
+# files plus a JSON manifest; every process (the publisher included) then
+# attaches to those files memory-mapped and read-only, so the operating
+# system keeps a single copy of the pages however many workers map them.
+#
+#   numeric, bool, datetime   the column's own buffer, mapped as is
+#   categorical               its integer codes are mapped; the (small)
+#                             category dictionary is loaded per process
+#   text (object)             dictionary-encoded on publish; the codes are
+#                             mapped and expanded back to object on attach,
+#                             which costs one pointer per row per process
+#                             (missing text comes back as NaN)
+#   anything else             pickled and loaded per process
+#
+# A published directory is never modified. Slots are named after the dataset
+# key and the workbook's mtime and size, so a changed workbook is published
+# to a new slot and superseded slots are removed.
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout or a preprocessing step changes meaning
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()[:16]
+
+
+def slot_path(directory, key, version):
+    """
+    Directory a dataset is published to.
+
+    Args:
+        directory (str): Root of the shared store.
+        key (tuple): Identifies the dataset, e.g. (path, sheet, usecols, preprocess).
+        version (tuple): Identifies its contents, e.g. the workbook's (mtime, size).
+    """
+    return os.path.join(directory, f"{_digest((FORMAT_VERSION, key))}-{_digest(version)}")
+
+
+def _save(path, name, arr):
+    np.save(os.path.join(path, name), np.ascontiguousarray(arr), allow_pickle=False)
+    return name
+
+
+def _write_column(path, i, series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        pd.to_pickle(dtype.categories, os.path.join(path, f"{i}.categories.pkl"))
+        return {"kind": "categorical", "codes": _save(path, f"{i}.npy", series.array.codes),
+                "categories": f"{i}.categories.pkl", "ordered": bool(dtype.ordered)}
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        return {"kind": "array", "values": _save(path, f"{i}.npy", series.to_numpy())}
+    if dtype == object:
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        pd.to_pickle(pd.Index(uniques, dtype=object), os.path.join(path, f"{i}.categories.pkl"))
+        return {"kind": "dictionary", "codes": _save(path, f"{i}.npy", codes.astype(np.int32)),
+                "categories": f"{i}.categories.pkl"}
+    pd.to_pickle(series.array, os.path.join(path, f"{i}.pkl"))
+    return {"kind": "pickle", "values": f"{i}.pkl"}
+
+
+def _map(path, name):
+    # Plain ndarray over the mapping, so the memmap subclass does not leak into results
+    return np.load(os.path.join(path, name), mmap_mode="r").view(np.ndarray)
+
+
+def _read_column(path, spec):
+    kind = spec["kind"]
+    if kind == "array":
+        return _map(path, spec["values"])
+    if kind == "pickle":
+        return pd.read_pickle(os.path.join(path, spec["values"]))
+
+    codes = _map(path, spec["codes"])
+    categories = pd.read_pickle(os.path.join(path, spec["categories"]))
+    if kind == "categorical":
+        return pd.Categorical.from_codes(codes, categories=categories, ordered=spec["ordered"], validate=False)
+    return np.append(categories.to_numpy(dtype=object), np.nan)[codes]
+
+
+def publish(df, path):
+    """
+    Writes `df` to `path` as memory-mappable columns.
+
+    The frame is written to a temporary directory and renamed into place,
+    so readers never see a partial slot. When another process published
+    the same slot first, its copy is kept and this one is discarded.
+
+    Args:
+        df (pd.DataFrame): Frame to publish; column names must be strings.
+        path (str): Slot directory, from slot_path.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        manifest = {"rows": len(df), "columns": []}
+        if isinstance(df.index, pd.RangeIndex):
+            manifest["index"] = {"kind": "range", "start": df.index.start, "stop": df.index.stop, "step": df.index.step}
+        else:
+            manifest["index"] = _write_column(tmp_path, "index", df.index.to_series())
+        for i, col in enumerate(df.columns):
+            manifest["columns"].append({"name": str(col), **_write_column(tmp_path, i, df[col])})
+        with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.rename(tmp_path, path)
+    except OSError:
+        if not os.path.exists(os.path.join(path, MANIFEST)):
+            raise
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def attach(path):
+    """
+    Maps a published frame read-only.
+
+    Returns:
+        pd.DataFrame | None: The frame, or None when `path` holds no
+            published frame.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    index = manifest["index"]
+    if index["kind"] == "range":
+        index = pd.RangeIndex(index["start"], index["stop"], index["step"])
+    else:
+        index = pd.Index(_read_column(path, index), copy=False)
+    columns = {spec["name"]: _read_column(path, spec) for spec in manifest["columns"]}
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _drop_superseded(path):
+    """Removes older slots of the same dataset; processes that still map them keep their pages."""
+    directory, name = os.path.split(path)
+    prefix = name.split("-")[0] + "-"
+    for entry in os.listdir(directory):
+        if entry.startswith(prefix) and entry != name and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+
+def load_shared(directory, key, version, build):
+    """
+    Attaches to a published dataset, publishing it first if needed.
+
+    Args:
+        directory (str): Root of the shared store.
+        key (tuple): Identifies the dataset.
+        version (tuple): Identifies its contents.
+        build (callable): Zero-argument loader, called only when the slot
+            has not been published yet.
+
+    Returns:
+        pd.DataFrame: The frame, backed by the shared files.
+    """
+    path = slot_path(directory, key, version)
+    df = attach(path)
+    if df is None:
+        os.makedirs(directory, exist_ok=True)
+        publish(build(), path)
+        _drop_superseded(path)
+        df = attach(path)
+    return df
@@ -0,0 +1,171 @@
+# data_loader/streaming.py
+# Streaming, column-projected Excel ingest.
+#
+# pd.read_excel materialises every cell of a sheet as Python objects before
+# building the frame, so peak memory is several times the final frame size.
+# read_excel_columns walks the sheet row by row through openpyxl's read_only
+# mode, keeps only the requested columns and writes each value straight into a
+# typed NumPy buffer. Buffers are sized from the sheet dimension when openpyxl
+# knows it, so the only transient allocation is the current row tuple.
+#
+# Like pd.read_excel, blank rows inside the data are kept (as missing values)
+# and blank rows after the last filled one are dropped. A row counts as blank
+# only when every cell is empty, not just the projected ones.
+
+import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+_MIN_CAPACITY = 1024
+
+_NUMERIC, _DATETIME, _OBJECT = "numeric", "datetime", "object"
+
+
+def _kind_of(value):
+    if isinstance(value, bool):
+        return _OBJECT
+    if isinstance(value, (int, float)):
+        return _NUMERIC
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return _DATETIME
+    return _OBJECT
+
+
+class _ColumnBuilder:
+    """Accumulates one column into a typed NumPy buffer."""
+
+    def __init__(self, capacity):
+        self.capacity = max(capacity, _MIN_CAPACITY)
+        self.kind = None
+        self.buf = None
+        self.n = 0
+        self.all_int = True
+        self.has_missing = False
+        self._pending_missing = 0
+
+    def _allocate(self, kind):
+        self.kind = kind
+        if kind == _NUMERIC:
+            self.buf = np.full(self.capacity, np.nan, dtype="float64")
+        elif kind == _DATETIME:
+            self.buf = np.full(self.capacity, np.datetime64("NaT"), dtype="datetime64[ns]")
+        else:
+            self.buf = np.full(self.capacity, np.nan, dtype=object)
+
+    def _promote_to_object(self):
+        obj = self.buf.astype(object)
+        if self.kind == _NUMERIC:
+            if self.all_int:
+                obj[:self.n] = [v if np.isnan(v) else int(v) for v in self.buf[:self.n]]
+        elif self.kind == _DATETIME:
+            obj = np.array([pd.Timestamp(v) if not np.isnat(v) else np.nan for v in self.buf], dtype=object)
+        self.kind = _OBJECT
+        self.buf = obj
+
+    def _grow(self):
+        old = self.buf
+        self.capacity *= 2
+        self._allocate(self.kind)
+        self.buf[:self.n] = old[:self.n]
+
+    def append(self, value):
+        if value is None or value == "":
+            self.has_missing = True
+            if self.buf is None:
+                self._pending_missing += 1
+            else:
+                if self.n == self.capacity:
+                    self._grow()
+                self.n += 1  # buffers are pre-filled with the missing marker
+            return
+
+        if self.buf is None:
+            # Room for the leading blanks (the sheet dimension may be stale or missing)
+            while self.capacity <= self._pending_missing:
+                self.capacity *= 2
+            self._allocate(_kind_of(value))
+            self.n = self._pending_missing
+        else:
+            kind = _kind_of(value)
+            if kind != self.kind and self.kind != _OBJECT:
+                self._promote_to_object()
+
+        if self.n == self.capacity:
+            self._grow()
+
+        if self.kind == _NUMERIC:
+            if self.all_int and not (isinstance(value, int) or float(value).is_integer()):
+                self.all_int = False
+            self.buf[self.n] = value
+        elif self.kind == _DATETIME:
+            self.buf[self.n] = np.datetime64(value, "ns")
+        else:
+            self.buf[self.n] = value
+        self.n += 1
+
+    def finish(self, length):
+        if self.buf is None:
+            return np.full(length, np.nan, dtype=object)
+        while self.n < length:
+            self.append(None)
+        values = self.buf[:length]
+        if self.kind == _NUMERIC and self.all_int and not self.has_missing:
+            return values.astype("int64")
+        return values
+
+
+def _open_sheet(workbook, sheet_name):
+    if isinstance(sheet_name, int):
+        return workbook.worksheets[sheet_name]
+    return workbook[sheet_name]
+
+
+def read_excel_columns(filepath, sheet_name=0, usecols=None):
+    """
+    Streams a sheet through openpyxl read_only mode, keeping only `usecols`.
+
+    Args:
+        filepath (str): Path to the Excel workbook.
+        sheet_name (str | int): Sheet to read.
+        usecols (list[str]): Header names to keep. Names missing from the sheet
+            are ignored, so consumers can list alternative spellings.
+            None keeps every column.
+
+    Returns:
+        pd.DataFrame: Frame with the kept columns, in sheet order.
+    """
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        ws = _open_sheet(workbook, sheet_name)
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=list(usecols or []))
+
+        names = [str(h).strip() if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+        wanted = None if usecols is None else {str(c).strip() for c in usecols}
+        positions = [i for i, name in enumerate(names) if wanted is None or name in wanted]
+
+        capacity = (ws.max_row or 0) - 1
+        builders = [_ColumnBuilder(capacity) for _ in positions]
+
+        length = blank = 0
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in positions]
+            if all(v is None for v in values) and all(v is None for v in row):
+                blank += 1
+                continue
+            # Blank rows followed by data are part of the table
+            for _ in range(blank):
+                for builder in builders:
+                    builder.append(None)
+            length += blank + 1
+            blank = 0
+            for builder, value in zip(builders, values):
+                builder.append(value)
+
+        return pd.DataFrame({names[i]: b.finish(length) for i, b in zip(positions, builders)})
+    finally:
+        workbook.close()
@@ -1,10 +1,11 @@
 # kpi_engine/bench.py
 
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_resource_data(filepath, sheet_name="ResourceMaster"):
     try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name)
+        df = load_sheet(filepath, sheet_name)
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
@@ -1,12 +1,13 @@
 # kpi_engine/billed_rate.py
 
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_data(pnl_path: str, ut_path: str, pnl_sheet: str = "LnTPnL", ut_sheet: str = "LNTData") -> tuple:
     """Load data from Excel files."""
     try:
-        pnl_df = pd.read_excel(pnl_path, sheet_name=pnl_sheet)
-        ut_df = pd.read_excel(ut_path, sheet_name=ut_sheet)
+        pnl_df = load_sheet(pnl_path, pnl_sheet)
+        ut_df = load_sheet(ut_path, ut_sheet)
         return pnl_df, ut_df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
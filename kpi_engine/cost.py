@@ -1,4 +1,5 @@
 import pandas as pd
+from data_loader.registry import load_sheet
 
 # Define default cost categories
 ONSITE_COST_GROUPS = ["COST - ONSITE"]
@@ -10,7 +11,7 @@ def load_pnl_data(filepath: str, sheet_name: str = "LnTPnL") -> pd.DataFrame:
     Load the PnL data from the provided Excel file and sheet.
     """
     try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name)
+        df = load_sheet(filepath, sheet_name)
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load cost data: {e}")
@@ -0,0 +1,248 @@
+# kpi_engine/distinct_count.py
+# Distinct-count engine for PSNo headcount.
+#
+# Employee rows are reduced once to one cell per observed
+# (client, month, status, location) combination. Each cell holds the set of
+# employees seen in it, in one of two forms:
+#
+#   exact   the sorted, integer-encoded PSNos of the cell (the array
+#           containers of a roaring bitmap; PSNos are densely encoded so a
+#           single container level is enough), stored CSR-style
+#   sketch  HyperLogLog registers, 2**precision bytes per cell
+#
+# Both merge: a quarter, a year, a client group or the whole book is the
+# union of its cells' sets (or the register-wise max of their sketches), so
+# any rollup is answered from the cells without rescanning employee rows.
+
+import numpy as np
+import pandas as pd
+
+from data_loader.registry import derived
+from kpi_engine.grouping import encode, group_starts, sorted_unique
+
+HEADCOUNT_DIMENSIONS = ["FinalCustomerName", "Month", "Status", "Onsite/Offshore"]
+
+# 1 KiB of registers per cell, ~3% standard error
+HLL_PRECISION = 10
+
+_U64 = np.uint64
+
+
+def _hash64(values):
+    """splitmix64 finalizer: a well-mixed 64-bit hash of integer ids."""
+    z = values.astype(_U64) + _U64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> _U64(27))) * _U64(0x94D049BB133111EB)
+    return z ^ (z >> _U64(31))
+
+
+def _bit_length(values):
+    """Exact bit length of uint64 values (float64 is exact on 32-bit halves)."""
+    hi = (values >> _U64(32)).astype(np.float64)
+    lo = (values & _U64(0xFFFFFFFF)).astype(np.float64)
+    hi_len = np.frexp(hi)[1]
+    lo_len = np.frexp(lo)[1]
+    return np.where(hi > 0, 32 + hi_len, lo_len)
+
+
+def hll_registers(ids, cells, n_cells, precision=HLL_PRECISION):
+    """
+    HyperLogLog registers for each cell.
+
+    Args:
+        ids (np.ndarray): Integer ids, one per (cell, id) observation.
+        cells (np.ndarray): Cell of each observation.
+        n_cells (int): Number of cells.
+        precision (int): log2 of the registers per cell.
+
+    Returns:
+        np.ndarray: uint8 array of shape (n_cells, 2**precision).
+    """
+    m = 1 << precision
+    h = _hash64(ids)
+    bucket = (h >> _U64(64 - precision)).astype(np.int64)
+    rest = h & _U64((1 << (64 - precision)) - 1)
+    rank = (64 - precision) - _bit_length(rest) + 1
+    registers = np.zeros(n_cells * m, dtype=np.uint8)
+    np.maximum.at(registers, cells * m + bucket, rank.astype(np.uint8))
+    return registers.reshape(n_cells, m)
+
+
+def hll_estimate(registers):
+    """Cardinality estimates for rows of HLL registers (with small-range correction)."""
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.exp2(-registers.astype(np.float64)).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+
+class DistinctCounter:
+    """Distinct `key` values per observed dimension combination, mergeable across cells."""
+
+    def __init__(self, key, n_cells, categories, codes, offsets=None, ids=None, registers=None, n_ids=0):
+        self.key = key
+        self.n_cells = n_cells
+        self.categories = categories
+        self.codes = codes
+        self.offsets = offsets
+        self.ids = ids
+        self.registers = registers
+        self.n_ids = n_ids
+
+    @classmethod
+    def from_frame(cls, df, key="PSNo", dimensions=HEADCOUNT_DIMENSIONS, sketch=False, precision=HLL_PRECISION):
+        """
+        Builds the per-cell sets from employee rows.
+
+        Args:
+            df (pd.DataFrame): Frame with `key` and any of `dimensions`.
+            key (str): Column whose distinct values are counted.
+            dimensions (list[str]): Cell dimensions; absent ones are skipped.
+            sketch (bool): Keep HyperLogLog sketches instead of exact sets.
+            precision (int): HLL precision when `sketch` is set.
+
+        Returns:
+            DistinctCounter: The counter.
+        """
+        id_codes, id_values = pd.factorize(df[key])
+        keep = id_codes >= 0
+        ids = id_codes[keep].astype(np.int64)
+
+        dims = [d for d in dimensions if d in df.columns]
+        row_codes, categories = {}, {}
+        cell = np.zeros(len(ids), dtype=np.int64)
+        for d in dims:
+            codes, cats = encode(df[d])
+            row_codes[d] = codes[keep]
+            categories[d] = cats
+            cell = cell * (len(cats) + 1) + (row_codes[d] + 1)
+            cell, _ = pd.factorize(cell)
+            cell = cell.astype(np.int64)
+
+        n_cells = int(cell.max()) + 1 if len(cell) else 0
+        codes = {}
+        for d in dims:
+            cell_codes = np.empty(n_cells, dtype=np.int64)
+            cell_codes[cell] = row_codes[d]
+            codes[d] = cell_codes
+
+        n_ids = len(id_values)
+        if sketch:
+            registers = hll_registers(ids, cell, n_cells, precision)
+            return cls(key, n_cells, categories, codes, registers=registers, n_ids=n_ids)
+
+        pairs = sorted_unique(cell * max(n_ids, 1) + ids)
+        pair_cells = pairs // max(n_ids, 1)
+        offsets = np.searchsorted(pair_cells, np.arange(n_cells + 1))
+        return cls(key, n_cells, categories, codes, offsets=offsets,
+                   ids=(pairs % max(n_ids, 1)).astype(np.uint32), n_ids=n_ids)
+
+    @property
+    def dimensions(self):
+        return list(self.codes)
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    @property
+    def nbytes(self):
+        if self.exact:
+            return self.ids.nbytes + self.offsets.nbytes
+        return self.registers.nbytes
+
+    def _mask(self, where):
+        mask = np.ones(self.n_cells, dtype=bool)
+        for dim, cond in (where or {}).items():
+            cats = self.categories[dim]
+            if callable(cond):
+                allowed = np.asarray(pd.Series(cond(cats)).fillna(False), dtype=bool)
+            elif isinstance(cond, (list, tuple, set)):
+                allowed = np.asarray(cats.isin(list(cond)), dtype=bool)
+            else:
+                allowed = np.asarray(cats == cond, dtype=bool)
+            codes = self.codes[dim]
+            mask &= (codes >= 0) & np.append(allowed, False)[codes]
+        return mask
+
+    def _dimension(self, dim, freq):
+        """Codes and labels for `dim`; with `freq`, Month labels roll up to that period."""
+        codes, cats = self.codes[dim], self.categories[dim]
+        if freq is None or dim != "Month":
+            return codes, cats
+        rolled = pd.PeriodIndex(pd.to_datetime(cats.astype(str)), freq="M").asfreq(freq)
+        remap, labels = pd.factorize(rolled, sort=True)
+        return np.where(codes >= 0, np.append(remap, -1)[codes], -1), pd.Index(labels, name=dim)
+
+    def _union_counts(self, cells, groups, n_groups):
+        """Distinct ids per group, where cell `cells[i]` belongs to `groups[i]`."""
+        if self.exact:
+            starts, ends = self.offsets[cells], self.offsets[cells + 1]
+            lengths = ends - starts
+            total = int(lengths.sum())
+            if not total:
+                return np.zeros(n_groups, dtype=np.int64)
+            # Gather every member id of the selected cells in one pass
+            run_starts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            members = self.ids[run_starts + np.arange(total)].astype(np.int64)
+            pairs = sorted_unique(np.repeat(groups, lengths) * max(self.n_ids, 1) + members)
+            return np.bincount(pairs // max(self.n_ids, 1), minlength=n_groups)
+
+        estimates = np.zeros(n_groups)
+        order, starts, group_ids = group_starts(groups)
+        if len(order):
+            merged = np.maximum.reduceat(self.registers[cells[order]], starts, axis=0)
+            estimates[group_ids] = hll_estimate(merged)
+        return np.rint(estimates).astype(np.int64)
+
+    def count(self, by=(), where=None, freq=None):
+        """
+        Distinct `key` values per group, merged from the cells.
+
+        Args:
+            by (list[str]): Dimensions to group by; rows missing any are dropped,
+                like groupby(dropna=True).
+            where (dict): dim -> value, list of values, or a predicate applied
+                to the dimension's categories.
+            freq (str): Roll Month up to "Q" or "Y" periods.
+
+        Returns:
+            int | pd.Series: The total when `by` is empty, else a Series indexed
+                by the observed groups in sorted order.
+        """
+        by = list(by)
+        mask = self._mask(where)
+        dims = [self._dimension(d, freq) for d in by]
+        for codes, _ in dims:
+            mask &= codes >= 0
+        cells = np.flatnonzero(mask)
+
+        if not by:
+            return int(self._union_counts(cells, np.zeros(len(cells), dtype=np.int64), 1)[0])
+
+        key = np.zeros(len(cells), dtype=np.int64)
+        for codes, labels in dims:
+            key = key * len(labels) + codes[cells]
+        group_keys, groups = np.unique(key, return_inverse=True)
+        counts = self._union_counts(cells, groups.astype(np.int64), len(group_keys))
+
+        arrays = []
+        for (_, labels) in reversed(dims):
+            arrays.append(labels[group_keys % len(labels)])
+            group_keys = group_keys // len(labels)
+        arrays.reverse()
+        if len(by) == 1:
+            index = pd.Index(arrays[0], name=by[0])
+        else:
+            index = pd.MultiIndex.from_arrays(arrays, names=by)
+        return pd.Series(counts, index=index, name=self.key)
+
+
+def counter_for(df, key="PSNo", sketch=False):
+    """Returns the distinct counter for a loaded frame, built once per dataset."""
+    return derived(df, f"distinct_count:{key}:{'hll' if sketch else 'exact'}",
+                   lambda frame: DistinctCounter.from_frame(frame, key=key, sketch=sketch))
@@ -1,10 +1,11 @@
 # kpi_engine/headcount.py
 
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_resource_data(filepath, sheet_name="ResourceMaster"):
     try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name)
+        df = load_sheet(filepath, sheet_name)
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
@@ -15,6 +16,20 @@ def preprocess_resource_data(df):
     df['Headcount'] = 1  # Each row is one resource
     return df.dropna(subset=['Month'])
 
+# LNTData columns needed for PSNo-based headcount and utilization
+UT_COLUMNS = [
+    "PSNo", "Date_a", "FinalCustomerName", "Status", "Onsite/Offshore",
+    "Delivery_Unit", "BusinessUnit", "NetAvailableHours", "TotalBillableHours", "FresherAgeingCategory"
+]
+
+def preprocess_ut_data(df):
+    # LNTData: one row per employee allocation, Date_a is the allocation month
+    df.columns = df.columns.str.strip()
+    df['Date_a'] = pd.to_datetime(df['Date_a'], errors='coerce')
+    df = df.dropna(subset=['Date_a', 'FinalCustomerName', 'PSNo'])
+    df['Month'] = df['Date_a'].dt.to_period('M').astype(str)
+    return df
+
 def total_headcount(df):
     return df['Headcount'].sum()
 
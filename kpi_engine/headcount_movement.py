@@ -0,0 +1,209 @@
+# kpi_engine/headcount_movement.py
+# Joiners, leavers and inter-account transfers over LNTData.
+#
+# Allocation rows are reduced once to the distinct (PSNo, client, month)
+# triples and sorted two ways:
+#
+#   by (PSNo, client, month)  an employee's run on one account is contiguous,
+#                             so a gap before a row is a join and a gap after
+#                             it is a leave
+#   by (PSNo, month, client)  answers "where was this employee in month m?"
+#                             with one searchsorted over all events at once
+#
+# Every movement in the history comes out of that single vectorized pass.
+# Months are the months present in the data, so "previous month" skips
+# months with no allocations at all instead of reporting everyone as moved.
+# Per-client summaries are built once; per-month detail tables are cached.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_loader.registry import derived
+from kpi_engine.grouping import encode, sorted_unique
+
+NEW_HIRE, TRANSFER_IN, EXIT, TRANSFER_OUT = range(4)
+MOVEMENT_TYPES = {
+    NEW_HIRE: ("Joined", "New to the book"),
+    TRANSFER_IN: ("Joined", "Transfer in"),
+    EXIT: ("Left", "Left the book"),
+    TRANSFER_OUT: ("Left", "Transfer out"),
+}
+SUMMARY_COLUMNS = ["Opening", "New Hires", "Transfers In", "Exits", "Transfers Out", "Closing"]
+
+
+class HeadcountMovement:
+    """Movement events for every client-month of an allocation history."""
+
+    def __init__(self, employees, clients, months, events, headcount):
+        self.employees = employees  # PSNo by employee code
+        self.clients = clients      # client name by client code
+        self.months = months        # month label by month index, ascending
+        self.events = events        # dict of equal-length arrays, sorted by month
+        self.headcount = headcount  # (n_clients, n_months) distinct PSNo
+        self._month_starts = np.searchsorted(events["month"], np.arange(len(months) + 1))
+        self._by_month = {}
+        self._summary = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, key="PSNo", client_col="FinalCustomerName", month_col="Month"):
+        """
+        Derives all movements from allocation rows.
+
+        Args:
+            df (pd.DataFrame): LNTData with `key`, `client_col` and `month_col`.
+            key (str): Employee identifier.
+            client_col (str): Account column.
+            month_col (str): Month column ('YYYY-MM' strings, dates or periods).
+
+        Returns:
+            HeadcountMovement: The engine.
+        """
+        emp, employees = pd.factorize(df[key])
+        client, clients = encode(df[client_col])
+        month_raw, month_cats = pd.factorize(df[month_col])
+        periods = pd.PeriodIndex(pd.to_datetime(pd.Index(month_cats).astype(str)), freq="M")
+        month_of_cat, months = pd.factorize(periods, sort=True)
+
+        keep = (emp >= 0) & (client >= 0) & (month_raw >= 0)
+        emp = emp[keep].astype(np.int64)
+        client = client[keep]
+        month = month_of_cat[month_raw[keep]].astype(np.int64)
+        n_clients, n_months = len(clients), len(months)
+
+        # (PSNo, client, month): runs on an account are contiguous
+        by_account = sorted_unique((emp * n_clients + client) * n_months + month)
+        e_month = by_account % n_months
+        e_account = by_account // n_months
+        e_client = e_account % n_clients
+        e_emp = e_account // n_clients
+
+        headcount = np.bincount(e_client * n_months + e_month, minlength=n_clients * n_months)
+        headcount = headcount.reshape(n_clients, n_months)
+
+        same_account = e_account[1:] == e_account[:-1]
+        consecutive = e_month[1:] == e_month[:-1] + 1
+        continued = np.r_[False, same_account & consecutive]
+        continues = np.r_[same_account & consecutive, False]
+        joins = np.flatnonzero(~continued & (e_month > 0))
+        leaves = np.flatnonzero(~continues & (e_month < n_months - 1))
+
+        # (PSNo, month, client): where was an employee in a given month
+        by_month = np.sort((e_emp * n_months + e_month) * n_clients + e_client)
+
+        def elsewhere(emps, months_):
+            """First client each employee had in the given month, or -1."""
+            lo = (emps * n_months + months_) * n_clients
+            pos = np.searchsorted(by_month, lo)
+            found = pos < len(by_month)
+            found[found] &= (by_month[pos[found]] // n_clients) == (emps * n_months + months_)[found]
+            other = np.full(len(emps), -1, dtype=np.int64)
+            other[found] = by_month[pos[found]] % n_clients
+            return other
+
+        join_from = elsewhere(e_emp[joins], e_month[joins] - 1)
+        leave_to = elsewhere(e_emp[leaves], e_month[leaves] + 1)
+
+        events = {
+            "emp": np.r_[e_emp[joins], e_emp[leaves]],
+            "client": np.r_[e_client[joins], e_client[leaves]],
+            "month": np.r_[e_month[joins], e_month[leaves] + 1],
+            "kind": np.r_[
+                np.where(join_from >= 0, TRANSFER_IN, NEW_HIRE),
+                np.where(leave_to >= 0, TRANSFER_OUT, EXIT)
+            ],
+            "other": np.r_[join_from, leave_to],
+        }
+        order = np.argsort(events["month"], kind="stable")
+        events = {name: values[order] for name, values in events.items()}
+        return cls(pd.Index(employees, name=key), clients, pd.Index(months.astype(str), name="Month"), events, headcount)
+
+    def _month_index(self, month):
+        label = str(pd.Period(month, freq="M")) if not isinstance(month, str) else month
+        idx = self.months.get_indexer([label])[0]
+        if idx < 0:
+            raise KeyError(f"No allocations for month {month}")
+        return idx
+
+    @property
+    def latest_month(self):
+        return self.months[-1] if len(self.months) else None
+
+    def summary(self, client=None):
+        """
+        Opening, joiners by type, leavers by type and closing headcount.
+
+        Args:
+            client (str): Restrict to one account.
+
+        Returns:
+            pd.DataFrame: One row per client-month after the first month, with
+                Closing = Opening + New Hires + Transfers In - Exits - Transfers Out.
+        """
+        if self._summary is None:
+            with self._lock:
+                if self._summary is None:
+                    self._summary = self._build_summary()
+        if client is None:
+            return self._summary
+        return self._summary[self._summary["Client"] == client].reset_index(drop=True)
+
+    def _build_summary(self):
+        n_clients, n_months = self.headcount.shape
+        cell = self.events["client"] * n_months + self.events["month"]
+        counts = np.bincount(cell * 4 + self.events["kind"], minlength=n_clients * n_months * 4)
+        counts = counts.reshape(n_clients, n_months, 4)
+
+        closing = self.headcount[:, 1:]
+        opening = self.headcount[:, :-1]
+        moves = counts[:, 1:]
+        rows, cols = np.nonzero((closing > 0) | (opening > 0))
+        table = pd.DataFrame({
+            "Client": self.clients[rows],
+            "Month": self.months[cols + 1],
+            "Opening": opening[rows, cols],
+            "New Hires": moves[rows, cols, NEW_HIRE],
+            "Transfers In": moves[rows, cols, TRANSFER_IN],
+            "Exits": moves[rows, cols, EXIT],
+            "Transfers Out": moves[rows, cols, TRANSFER_OUT],
+            "Closing": closing[rows, cols],
+        })
+        return table.sort_values(["Month", "Client"], kind="stable").reset_index(drop=True)
+
+    def month(self, month, client=None):
+        """
+        Who joined or left in one month, cached per month.
+
+        Args:
+            month (str | pd.Timestamp | pd.Period): The month ('YYYY-MM').
+            client (str): Restrict to one account.
+
+        Returns:
+            pd.DataFrame: Columns PSNo, Client, Movement ('Joined'/'Left'),
+                Type, and Other Client (transfer source or destination).
+        """
+        idx = self._month_index(month)
+        detail = self._by_month.get(idx)
+        if detail is None:
+            lo, hi = self._month_starts[idx], self._month_starts[idx + 1]
+            ev = {name: values[lo:hi] for name, values in self.events.items()}
+            other = ev["other"]
+            detail = pd.DataFrame({
+                self.employees.name: self.employees[ev["emp"]],
+                "Client": self.clients[ev["client"]],
+                "Movement": [MOVEMENT_TYPES[k][0] for k in ev["kind"]],
+                "Type": [MOVEMENT_TYPES[k][1] for k in ev["kind"]],
+                "Other Client": np.where(other >= 0, np.asarray(self.clients, dtype=object)[np.maximum(other, 0)], None),
+            }).sort_values(["Client", "Movement", self.employees.name], kind="stable").reset_index(drop=True)
+            self._by_month[idx] = detail
+        if client is None:
+            return detail
+        return detail[detail["Client"] == client].reset_index(drop=True)
+
+
+def movement_for(df, client_col="FinalCustomerName"):
+    """Returns the movement engine for a loaded UT frame, built once per dataset."""
+    return derived(df, f"headcount_movement:{client_col}",
+                   lambda frame: HeadcountMovement.from_frame(frame, client_col=client_col))
@@ -1,16 +1,27 @@
 # ✅ UPDATED: margin.py
 # Replaces "Amount in INR" with "Amount in USD"
 
+import numpy as np
 import pandas as pd
+from data_loader.registry import load_sheet
 
-def load_pnl_data(filepath, sheet_name="LnTPnL"):
+# Columns the margin/C&B questions read; alternatives are listed for renamed exports
+PNL_COLUMNS = [
+    "Month", "Company Code", "Company_Code", "Type", "Segment",
+    "Group1", "Group2", "Group3", "Group4", "Amount in USD", "Amount"
+]
+
+# Low-cardinality text columns that are dictionary-encoded in compact mode
+PNL_CATEGORICAL_COLUMNS = ["Client", "Segment", "Type", "Group1", "Group2", "Group3", "Group4"]
+
+def load_pnl_data(filepath, sheet_name="LnTPnL", usecols=PNL_COLUMNS):
     try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name, engine="openpyxl")
+        df = load_sheet(filepath, sheet_name, usecols=usecols)
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
 
-def preprocess_pnl_data(df):
+def preprocess_pnl_data(df, compact=False, amount_dtype="float64"):
     df.columns = df.columns.str.strip()
 
     # Dynamic column renaming
@@ -47,8 +58,58 @@ def preprocess_pnl_data(df):
     df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
     df = df.dropna(subset=['Month', 'Amount', 'Client'])
 
+    if compact:
+        df = compact_pnl_data(df, amount_dtype=amount_dtype)
+
     return df
 
+def preprocess_pnl_data_compact(df):
+    # Registry-friendly alias: one stable name for the compact preprocessing step
+    return preprocess_pnl_data(df, compact=True)
+
+def compact_pnl_data(df, amount_dtype="float64"):
+    """
+    Re-encodes a preprocessed P&L frame for low memory and fast groupbys.
+
+    Text dimensions become categoricals (integer codes plus one dictionary),
+    'MonthCode' holds months since year 0 as int16, and Amount can optionally
+    be stored as float32.
+
+    Args:
+        df (pd.DataFrame): Output of preprocess_pnl_data.
+        amount_dtype (str): "float64" (default) or "float32".
+
+    Returns:
+        pd.DataFrame: Compact copy of the frame.
+    """
+    df = df.copy()
+    for col in PNL_CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    # int16 covers month codes up to the year 2730
+    df['MonthCode'] = (df['Month'].dt.year * 12 + df['Month'].dt.month - 1).astype("int16")
+    df['Amount'] = df['Amount'].astype(amount_dtype)
+    return df
+
+def memory_footprint(df):
+    """
+    Reports the in-memory size of every column, largest first, plus a total row.
+
+    Returns:
+        pd.DataFrame: Columns 'Column', 'Dtype', 'Bytes' and 'MB'.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Column': usage.index,
+        'Dtype': [str(df[col].dtype) for col in usage.index],
+        'Bytes': usage.values
+    }).sort_values('Bytes', ascending=False)
+    total = pd.DataFrame({'Column': ['Total'], 'Dtype': [''], 'Bytes': [int(usage.sum())]})
+    report = pd.concat([report, total], ignore_index=True)
+    report['MB'] = (report['Bytes'] / 1e6).round(3)
+    return report
+
 def compute_margin(df):
     # Add Quarter column
     df['Quarter'] = df['Month'].dt.to_period("Q").astype(str)
@@ -66,3 +127,60 @@ def compute_margin(df):
     grouped['Margin %'] = (grouped['Margin'] / grouped['Revenue'].replace(0, 1)) * 100
 
     return grouped.reset_index()
+
+def margin_cb_movers(df, grain="Segment", amount_col="Amount", latest_month=None):
+    """
+    Flags groups whose margin dropped while C&B cost rose, month over month.
+
+    Revenue, cost and C&B are summed per (grain, month) in one grouped pass
+    over the latest and previous month. Margin % is (revenue - cost) / cost,
+    0 when there is no cost.
+
+    Args:
+        df (pd.DataFrame): P&L frame with 'Month', 'Type', 'Group3', `grain`
+            and `amount_col`.
+        grain (str): Grouping column, e.g. "Segment", "Client" or "Group4".
+        amount_col (str): Amount column.
+        latest_month (pd.Timestamp): Month to compare, defaults to the latest one.
+
+    Returns:
+        pd.DataFrame: One row per group in order of first appearance, with
+            'Margin % Prev', 'Margin % Latest', 'C&B Prev', 'C&B Latest' and
+            a boolean 'Flagged' column. Empty (with those columns) when no rows
+            fall in the previous or latest month.
+    """
+    month = pd.to_datetime(df['Month'], errors='coerce').dt.to_period('M')
+    latest = (month.max() if latest_month is None else pd.Timestamp(latest_month).to_period('M'))
+    in_window = month.isin([latest - 1, latest]).to_numpy() if not pd.isna(latest) else np.zeros(len(df), dtype=bool)
+    if not in_window.any():
+        return pd.DataFrame(columns=[grain, 'Margin % Prev', 'Margin % Latest', 'C&B Prev', 'C&B Latest', 'Flagged'])
+    prev = latest - 1
+
+    groups = pd.Index(df[grain].dropna().unique(), name=grain)
+    sub = df.loc[in_window]
+
+    amount = sub[amount_col].to_numpy(dtype="float64")
+    row_type = sub['Type'].astype(str).str.lower().to_numpy()
+    is_cb = sub['Group3'].astype(str).str.contains('C&B').to_numpy() & sub['Group3'].notna().to_numpy()
+
+    flows = pd.DataFrame({
+        grain: sub[grain].to_numpy(),
+        'Period': month[in_window].to_numpy(),
+        'Revenue': np.where(row_type == 'revenue', amount, 0.0),
+        'Cost': np.where(row_type == 'cost', amount, 0.0),
+        'C&B': np.where(is_cb, amount, 0.0)
+    })
+    sums = flows.groupby([grain, 'Period'], observed=True).sum().unstack('Period', fill_value=0.0)
+    sums = sums.reindex(index=groups, columns=pd.MultiIndex.from_product([['Revenue', 'Cost', 'C&B'], [prev, latest]]), fill_value=0.0)
+
+    cost = sums['Cost']
+    margin_pct = ((sums['Revenue'] - cost) / cost.where(cost != 0) * 100).fillna(0.0)
+
+    result = pd.DataFrame({
+        'Margin % Prev': margin_pct[prev],
+        'Margin % Latest': margin_pct[latest],
+        'C&B Prev': sums['C&B'][prev],
+        'C&B Latest': sums['C&B'][latest]
+    }, index=groups)
+    result['Flagged'] = (result['C&B Latest'] > result['C&B Prev']) & (result['Margin % Latest'] < result['Margin % Prev'])
+    return result.reset_index()
@@ -1,10 +1,11 @@
 # kpi_engine/offshore_revenue.py
 
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_data(pnl_path: str):
     try:
-        df = pd.read_excel(pnl_path, sheet_name="LnTPnL")
+        df = load_sheet(pnl_path, "LnTPnL")
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
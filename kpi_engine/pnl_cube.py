@@ -0,0 +1,198 @@
+# kpi_engine/pnl_cube.py
+# Pre-aggregated P&L cube shared by the margin and C&B questions (Q1-Q4).
+#
+# A fully dense Month x Client x Segment x Type x Group1..Group4 tensor would
+# be almost entirely empty, so the cube keeps one row per observed dimension
+# combination and a dense, integer-indexed month axis:
+#
+#     values[combo, month]   summed Amount (0 where nothing was booked)
+#     observed[combo, month] whether any ledger row fed the cell
+#     codes[dim][combo]      integer code of the combo in each dimension
+#
+# Slicing filters combos by their codes and sums rows/columns with
+# np.add.reduceat, so a question touches the (small) cube, never the ledger.
+# Quarter and year rollups collapse contiguous month columns the same way.
+
+import numpy as np
+import pandas as pd
+
+from data_loader.registry import derived
+from kpi_engine.grouping import encode, group_starts
+
+CUBE_DIMENSIONS = ["Client", "Segment", "Type", "Group1", "Group2", "Group3", "Group4"]
+AMOUNT_COLUMNS = ["amount", "amount in usd", "amountinusd"]
+
+_TIME_AXES = {None: "Month", "M": "Month", "Q": "Quarter", "Y": "Year"}
+
+
+def _find_amount_column(df):
+    for col in df.columns:
+        if str(col).strip().lower() in AMOUNT_COLUMNS:
+            return col
+    raise KeyError("Column not found: Amount in USD")
+
+
+class PnLCube:
+    """Amount summed over Month x observed P&L dimension combinations."""
+
+    def __init__(self, months, categories, codes, values, observed):
+        self.months = months
+        self.categories = categories
+        self.codes = codes
+        self.values = values
+        self.observed = observed
+
+    @classmethod
+    def from_frame(cls, df, dimensions=CUBE_DIMENSIONS, amount_col=None):
+        """
+        Builds the cube from a preprocessed (optionally compact) P&L frame.
+
+        Args:
+            df (pd.DataFrame): Frame with 'Month', an amount column and any of `dimensions`.
+            dimensions (list[str]): Dimension columns to keep; absent ones are skipped.
+            amount_col (str): Amount column, detected when omitted.
+
+        Returns:
+            PnLCube: The cube.
+        """
+        amount_col = amount_col or _find_amount_column(df)
+        month = pd.to_datetime(df['Month'], errors='coerce')
+        amount = pd.to_numeric(df[amount_col], errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+        keep = month.notna().to_numpy() & ~np.isnan(amount)
+
+        month_codes, months = pd.factorize(month[keep], sort=True)
+        amount = amount[keep]
+
+        dims = [d for d in dimensions if d in df.columns]
+        row_codes, categories = {}, {}
+        combo = np.zeros(len(amount), dtype=np.int64)
+        for d in dims:
+            codes, cats = encode(df[d])
+            row_codes[d] = codes[keep]
+            categories[d] = cats
+            # Mixed-radix key, re-factorized after each step so it stays dense
+            combo = combo * (len(cats) + 1) + (row_codes[d] + 1)
+            combo, _ = pd.factorize(combo)
+            combo = combo.astype(np.int64)
+
+        n_combos = int(combo.max()) + 1 if len(combo) else 0
+        n_months = len(months)
+        cell = combo * n_months + month_codes
+        values = np.bincount(cell, weights=amount, minlength=n_combos * n_months).reshape(n_combos, n_months)
+        observed = (np.bincount(cell, minlength=n_combos * n_months) > 0).reshape(n_combos, n_months)
+
+        codes = {}
+        for d in dims:
+            combo_codes = np.empty(n_combos, dtype=np.int64)
+            combo_codes[combo] = row_codes[d]
+            codes[d] = combo_codes
+
+        return cls(pd.DatetimeIndex(months, name="Month"), categories, codes, values, observed)
+
+    @property
+    def dimensions(self):
+        return list(self.codes)
+
+    def _mask(self, where):
+        mask = np.ones(self.values.shape[0], dtype=bool)
+        for dim, cond in (where or {}).items():
+            cats = self.categories[dim]
+            if callable(cond):
+                allowed = np.asarray(pd.Series(cond(cats)).fillna(False), dtype=bool)
+            elif isinstance(cond, (list, tuple, set)):
+                allowed = np.asarray(cats.isin(list(cond)), dtype=bool)
+            else:
+                allowed = np.asarray(cats == cond, dtype=bool)
+            codes = self.codes[dim]
+            mask &= (codes >= 0) & np.append(allowed, False)[codes]
+        return mask
+
+    def _time_axis(self, freq):
+        if freq is None:
+            return np.arange(len(self.months)), self.months
+        periods = self.months.to_period(freq)
+        _, starts, _ = group_starts(periods.asi8)
+        labels = pd.PeriodIndex(periods[starts], name=_TIME_AXES[freq])
+        return starts, labels
+
+    def aggregate(self, by=(), where=None, freq=None):
+        """
+        Sums Amount over everything except `by` and the time axis.
+
+        Args:
+            by (list[str]): Dimensions to keep as rows. Combos with a missing
+                value in any of them are dropped, like groupby(dropna=True).
+            where (dict): dim -> value, list of values, or a predicate applied
+                to the dimension's categories (an Index of labels).
+            freq (str): None for raw Month values, or "M", "Q", "Y" rollups.
+
+        Returns:
+            pd.DataFrame | pd.Series: Rows per `by` group (a Series over time when
+                `by` is empty) and one column per period. Cells that no ledger
+                row fed are NaN; all-NaN rows and columns are dropped.
+        """
+        by = list(by)
+        mask = self._mask(where)
+        for d in by:
+            mask &= self.codes[d] >= 0
+
+        values = self.values[mask]
+        observed = self.observed[mask]
+
+        col_starts, time_labels = self._time_axis(freq)
+        if len(col_starts) != values.shape[1]:
+            values = np.add.reduceat(values, col_starts, axis=1) if values.size else values[:, col_starts]
+            observed = np.logical_or.reduceat(observed, col_starts, axis=1) if observed.size else observed[:, col_starts]
+
+        if not by:
+            total = values.sum(axis=0)
+            total = np.where(observed.any(axis=0), total, np.nan)
+            return pd.Series(total, index=time_labels, name="Amount").dropna()
+
+        key = np.zeros(values.shape[0], dtype=np.int64)
+        for d in by:
+            key = key * len(self.categories[d]) + self.codes[d][mask]
+        order, starts, group_keys = group_starts(key)
+        if len(order):
+            values = np.add.reduceat(values[order], starts, axis=0)
+            observed = np.logical_or.reduceat(observed[order], starts, axis=0)
+
+        arrays = []
+        for d in reversed(by):
+            size = len(self.categories[d])
+            arrays.append(self.categories[d][group_keys % size])
+            group_keys = group_keys // size
+        arrays.reverse()
+        if len(by) == 1:
+            index = pd.Index(arrays[0], name=by[0])
+        else:
+            index = pd.MultiIndex.from_arrays(arrays, names=by)
+
+        table = pd.DataFrame(np.where(observed, values, np.nan), index=index, columns=time_labels)
+        return table.dropna(how="all").dropna(axis=1, how="all")
+
+    def long(self, by=(), where=None, freq=None):
+        """
+        Same as aggregate, as a long frame with one row per observed cell.
+
+        Returns:
+            pd.DataFrame: Columns for the time axis, each `by` dimension and 'Amount'.
+        """
+        table = self.aggregate(by, where=where, freq=freq)
+        if isinstance(table, pd.Series):
+            return table.rename_axis(_TIME_AXES[freq]).reset_index()
+
+        rows, cols = np.nonzero(table.notna().to_numpy())
+        out = {_TIME_AXES[freq]: table.columns[cols]}
+        index = table.index
+        for level, d in enumerate(by):
+            labels = index.get_level_values(level) if isinstance(index, pd.MultiIndex) else index
+            out[d] = labels[rows]
+        out['Amount'] = table.to_numpy()[rows, cols]
+        return pd.DataFrame(out)
+
+
+def cube_for(df, amount_col=None):
+    """Returns the cube for a P&L frame, built once per loaded dataset."""
+    return derived(df, f"pnl_cube:{amount_col or ''}",
+                   lambda frame: PnLCube.from_frame(frame, amount_col=amount_col))
@@ -1,11 +1,12 @@
 # kpi_engine/realized_rate.py
 
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_data(pnl_path: str, ut_path: str):
     try:
-        pnl_df = pd.read_excel(pnl_path, sheet_name="LnTPnL")
-        ut_df = pd.read_excel(ut_path, sheet_name="LNTData")
+        pnl_df = load_sheet(pnl_path, "LnTPnL")
+        ut_df = load_sheet(ut_path, "LNTData")
         return pnl_df, ut_df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
@@ -1,4 +1,5 @@
 import pandas as pd
+from data_loader.registry import load_sheet
 
 def load_pnl_data(filepath: str = "sample_data/LnTPnL.xlsx", sheet_name: str = "LnTPnL") -> pd.DataFrame:
     """
@@ -12,7 +13,7 @@ def load_pnl_data(filepath: str = "sample_data/LnTPnL.xlsx", sheet_name: str = "
         pd.DataFrame: Loaded dataframe.
     """
     try:
-        df = pd.read_excel(filepath, sheet_name=sheet_name)
+        df = load_sheet(filepath, sheet_name)
         return df
     except Exception as e:
         raise RuntimeError(f"Failed to load data: {e}")
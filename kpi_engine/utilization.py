@@ -1,82 +1,176 @@
-# app.py
-
-import streamlit as st
-from utils.semantic_matcher import find_best_matching_qid, PROMPT_BANK
-import importlib
-from kpi_engine import margin
-import os
+# kpi_engine/utilization.py
+# Utilization (UT%) engine over LNTData.
+#
+# One grouped pass at load time reduces allocation rows to a cell table with
+# one row per observed Delivery_Unit x BusinessUnit x account x month x
+# fresher combination, holding summed billable and available hours. Distinct
+# headcount (all and billable) comes from a DistinctCounter over the same
+# cells, so UT% stays exact when slices merge accounts or months that share
+# employees. Questions slice the cells; they never filter raw rows.
+#
+#   UT%        billed headcount / headcount
+#   Hours UT%  billable hours / net available hours
+#
+# Frames in the older unified-table layout ('Final Customer Name',
+# 'Business_Unit', pre-aggregated 'HC' and 'Billed HC') are accepted too;
+# their headcount columns are summed instead of counted.
+
+import numpy as np
 import pandas as pd
-import inspect
-
-# ✅ Load data from sample_data folder
-@st.cache_data
-def load_data():
-    filepath = os.path.join("sample_data", "LnTPnL.xlsx")
-    if not os.path.exists(filepath):
-        raise FileNotFoundError(f"File not found at path: {filepath}")
-
-    df = margin.load_pnl_data(filepath)
-    df = margin.preprocess_pnl_data(df)
-
-    if df.empty:
-        raise ValueError("Loaded P&L data is empty after preprocessing.")
-
-    return df
-
-try:
-    df = load_data()
-except Exception as e:
-    st.error(f"❌ Failed to load data: {e}")
-    st.stop()
-
-# ✅ Import correct prompt bank used for semantic matching
-from utils.semantic_matcher import PROMPT_BANK
-
-# Streamlit UI
-st.set_page_config(page_title="LTTS BI Assistant", layout="wide")
-st.title("📊 LTTS BI Assistant")
-
-st.markdown("""
-Welcome to the **LTTS BI Assistant** — an AI-powered tool for analyzing business trends using your P&L and utilization data.
-
-✅ You can ask questions such as:
-- *Which accounts had CM% < 30 in the last quarter?*
-- *What caused the margin drop in Transportation?*
-- *Show UT% trends for the last 2 quarters*
-
-👉 **Start by typing your business question below**:
-""")
-
-# Input box
-user_question = st.text_input("Ask your business question:")
-
-# Main logic
-if user_question:
-    try:
-        best_qid, matched_prompt = find_best_matching_qid(user_question)
-        st.info(f"🔍 Running analysis for: **{matched_prompt}**")
-
-        # ✅ Lowercase the QID for correct import
-        question_module = importlib.import_module(f"questions.question_{best_qid.lower()}")
-
-        # ✅ Dynamically inspect the run function parameters
-        run_func = question_module.run
-        run_params = inspect.signature(run_func).parameters
-
-        if len(run_params) == 2:
-            result = run_func(df, user_question)
-        else:
-            result = run_func(df)
 
-        st.success("✅ Analysis complete.")
-        if isinstance(result, pd.DataFrame):
-            st.dataframe(result)
-        elif isinstance(result, str):
-            st.markdown(result)
+from data_loader.registry import derived
+from kpi_engine.distinct_count import DistinctCounter
+
+UT_DIMENSIONS = ["Delivery_Unit", "BusinessUnit", "FinalCustomerName", "Month", "Fresher"]
+
+# Older column name -> engine dimension
+COLUMN_ALIASES = {
+    "Business_Unit": "BusinessUnit",
+    "Final Customer Name": "FinalCustomerName",
+}
+
+# Dimensions an entity name is looked up in, in order, and what to call them
+ENTITY_TYPES = {
+    "Delivery_Unit": "Delivery Unit",
+    "BusinessUnit": "Business Unit",
+    "FinalCustomerName": "Account",
+}
+
+HOURS_COLUMNS = {"TotalBillableHours": "Billable Hours", "NetAvailableHours": "Available Hours"}
+HC_COLUMNS = ["HC", "Billed HC"]
+FRESHER, NON_FRESHER = "Fresher", "Non Fresher"
+
+
+def _month_labels(values):
+    """'YYYY-MM' labels for dates, 'YYYY-MM' strings or periods, parsed once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Index(uniques).astype(str), errors="coerce")
+    labels = np.array([None if pd.isna(d) else str(d.to_period("M")) for d in parsed] + [None], dtype=object)
+    return pd.Series(labels[codes], index=values.index)
+
+
+def _fresher_labels(values):
+    codes, uniques = pd.factorize(values)
+    labels = np.array([FRESHER if str(u).lower().startswith("fresher") else NON_FRESHER for u in uniques] + [None], dtype=object)
+    return pd.Series(labels[codes], index=values.index)
+
+
+def _narrow(df):
+    """The engine's columns, renamed and derived, without copying anything else."""
+    cols = {}
+    for col in df.columns:
+        name = COLUMN_ALIASES.get(col, col)
+        if name in ("Delivery_Unit", "BusinessUnit", "FinalCustomerName") and name not in cols:
+            cols[name] = df[col]
+    # Raw LNTData 'Month' is the fiscal month number; Date_a is the calendar month
+    cols["Month"] = _month_labels(df["Date_a"] if "Date_a" in df.columns else df["Month"])
+    if "FresherAgeingCategory" in df.columns:
+        cols["Fresher"] = _fresher_labels(df["FresherAgeingCategory"])
+    for src, name in HOURS_COLUMNS.items():
+        if src in df.columns:
+            cols[name] = pd.to_numeric(df[src], errors="coerce")
+    for name in HC_COLUMNS:
+        if name in df.columns:
+            cols[name] = pd.to_numeric(df[name], errors="coerce")
+    for name in ("PSNo", "Status"):
+        if name in df.columns:
+            cols[name] = df[name]
+    return pd.DataFrame(cols)
+
+
+class UtilizationEngine:
+    """Hours and headcount per UT cell, sliced into UT% tables."""
+
+    def __init__(self, cells, dimensions, measures, counter=None):
+        self.cells = cells
+        self.dimensions = dimensions
+        self.measures = measures
+        self.counter = counter
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Builds the cell table from UT rows in one grouped pass.
+
+        Args:
+            df (pd.DataFrame): LNTData (raw or preprocessed) or the older unified UT table.
+
+        Returns:
+            UtilizationEngine: The engine.
+        """
+        frame = _narrow(df)
+        dims = [d for d in UT_DIMENSIONS if d in frame.columns]
+        measures = [m for m in list(HOURS_COLUMNS.values()) + HC_COLUMNS if m in frame.columns]
+        if measures:
+            cells = frame.groupby(dims, observed=True, dropna=False, sort=True)[measures].sum().reset_index()
         else:
-            st.write(result)
+            cells = frame[dims].drop_duplicates().sort_values(dims).reset_index(drop=True)
+
+        counter = None
+        if {"PSNo", "Status"} <= set(frame.columns) and "HC" not in frame.columns:
+            counter = DistinctCounter.from_frame(frame, key="PSNo", dimensions=dims + ["Status"])
+        return cls(cells, dims, measures, counter)
+
+    def lookup(self, name):
+        """
+        Finds an entity by name (case-insensitive) in DU, then BU, then account.
+
+        Returns:
+            tuple | None: (dimension, exact label) or None when nothing matches.
+        """
+        wanted = str(name).strip().lower()
+        for dim in ENTITY_TYPES:
+            if dim not in self.cells.columns:
+                continue
+            for label in self.cells[dim].dropna().unique():
+                if str(label).strip().lower() == wanted:
+                    return dim, label
+        return None
+
+    def _mask(self, where):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, cond in (where or {}).items():
+            values = self.cells[dim]
+            mask &= values.isin(list(cond)).to_numpy() if isinstance(cond, (list, tuple, set)) else (values == cond).to_numpy()
+        return mask
+
+    def trend(self, by=(), where=None, last_n=None):
+        """
+        UT% per month for a slice.
+
+        Args:
+            by (list[str]): Dimensions to keep besides Month.
+            where (dict): dim -> value or list of values.
+            last_n (int): Keep only the latest `last_n` months of the slice.
+
+        Returns:
+            pd.DataFrame: `by`, Month, the hours and headcount measures, 'UT%'
+                and, when hours are present, 'Hours UT%'; sorted by Month.
+        """
+        by = list(by)
+        keys = by + ["Month"]
+        sliced = self.cells[self._mask(where)]
+        table = sliced.groupby(keys, observed=True, sort=True)[self.measures].sum() if self.measures else \
+            sliced[keys].drop_duplicates().set_index(keys).sort_index()
+
+        if self.counter is not None:
+            table["HC"] = self.counter.count(keys, where=where)
+            table["Billed HC"] = self.counter.count(keys, where={**(where or {}), "Status": "Billable"})
+            table["Billed HC"] = table["Billed HC"].fillna(0).astype(int)
+        table = table.reset_index()
+
+        if last_n is not None:
+            months = sorted(table["Month"].unique())[-last_n:]
+            table = table[table["Month"].isin(months)]
+
+        if "HC" in table.columns and "Billed HC" in table.columns:
+            table["UT%"] = (table["Billed HC"] / table["HC"].replace(0, np.nan) * 100).round(2)
+        if "Billable Hours" in table.columns and "Available Hours" in table.columns:
+            table["Hours UT%"] = (table["Billable Hours"] / table["Available Hours"].replace(0, np.nan) * 100).round(2)
+        return table.sort_values(["Month"] + by, kind="stable").reset_index(drop=True)
+
+
+def engine_for(df):
+    """Returns the utilization engine for a loaded UT frame, built once per dataset."""
+    return derived(df, "utilization", UtilizationEngine.from_frame)
 
-    except ModuleNotFoundError as e:
-        st.error(f"❌ Could not load analysis script for {best_qid}: {e}")
-    except Exception as e:
-        st.error(f"❌ Error running analysis: {e}")
@@ -0,0 +1,243 @@
+# pipeline.py
+# Asynchronous answer pipeline for serving many questions at once.
+#
+# service.answer() runs one question start to finish: route, compute,
+# render, respond. Here the stages run concurrently across requests, each on
+# its own bounded queue and executor:
+#
+#   route     one thread; questions waiting in the queue are routed together,
+#             so the encoder sees one batch instead of N single queries
+#   compute   COMPUTE_WORKERS threads running the question modules (pandas)
+#   render    charts draw on the utils.charts pool; at most RENDER_SLOTS
+#             answers wait on charts at a time, each for at most
+#             RENDER_TIMEOUT seconds
+#
+# Queues are bounded, so a stage that falls behind makes the stages before it
+# wait (backpressure) instead of buffering without limit, and answer() can
+# refuse new work after `admit_timeout` seconds. A chart that misses its
+# deadline is returned as a spec only; it keeps rendering in the background
+# and its PNG is served from the chart cache by service.py's /chart/<key>.
+# One slow chart therefore delays its own answer by at most RENDER_TIMEOUT
+# and never the answers queued behind it.
+#
+# Each question is traced (utils.tracing) from admission to answer; time
+# spent waiting in the route and compute queues is recorded as the
+# "queue.route" and "queue.compute" spans.
+#
+#   async with AnswerPipeline() as pipeline:
+#       result = await pipeline.answer("FTE trend over months", render=True)
+
+import asyncio
+import base64
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import service
+from utils import charts, tracing
+from utils.report import Report
+from utils.result_cache import result_cache
+from utils.semantic_matcher import route_queries
+
+QUEUE_SIZE = int(os.environ.get("CA_PIPELINE_QUEUE", "64"))
+ROUTE_BATCH = 32
+COMPUTE_WORKERS = int(os.environ.get("CA_COMPUTE_WORKERS", min(4, os.cpu_count() or 1)))
+RENDER_SLOTS = 16
+RENDER_TIMEOUT = float(os.environ.get("CA_RENDER_TIMEOUT", "2.0"))
+
+
+class Overloaded(Exception):
+    """Raised when the pipeline cannot admit a question within `admit_timeout`."""
+
+
+class _Job:
+    __slots__ = ("question", "render", "future", "route", "context", "queued")
+
+    def __init__(self, question, render, future):
+        self.question = question
+        self.render = render
+        self.future = future
+        self.route = None
+        # The question's trace; stages run their work for it inside this context
+        self.context = contextvars.copy_context()
+        self.queued = time.perf_counter()
+
+
+class AnswerPipeline:
+    """
+    Routes, computes and renders concurrent questions in overlapping stages.
+
+    Args:
+        queue_size (int): Capacity of each stage's queue.
+        route_batch (int): Most questions routed in one encoder call.
+        compute_workers (int): Threads running question modules.
+        render_slots (int): Answers that may wait on chart renders at once.
+        render_timeout (float): Seconds an answer waits for its charts.
+        cache (ResultCache): Answer cache; None disables it.
+    """
+
+    def __init__(self, queue_size=QUEUE_SIZE, route_batch=ROUTE_BATCH, compute_workers=COMPUTE_WORKERS,
+                 render_slots=RENDER_SLOTS, render_timeout=RENDER_TIMEOUT, cache=result_cache):
+        self.queue_size = queue_size
+        self.route_batch = route_batch
+        self.compute_workers = compute_workers
+        self.render_slots = render_slots
+        self.render_timeout = render_timeout
+        self.cache = cache
+        self._tasks = []
+        self._finishing = set()
+        self._waiting = set()
+
+    async def start(self):
+        self._route_queue = asyncio.Queue(self.queue_size)
+        self._compute_queue = asyncio.Queue(self.queue_size)
+        self._render_slots = asyncio.Semaphore(self.render_slots)
+        self._route_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="route")
+        self._compute_pool = ThreadPoolExecutor(max_workers=self.compute_workers, thread_name_prefix="compute")
+        self._tasks = [asyncio.create_task(self._route_stage())]
+        self._tasks += [asyncio.create_task(self._compute_stage()) for _ in range(self.compute_workers)]
+        return self
+
+    async def close(self):
+        for task in self._tasks + list(self._finishing):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._finishing, return_exceptions=True)
+        # Questions still in flight will not be answered
+        for future in list(self._waiting):
+            future.cancel()
+        self._tasks = []
+        self._route_pool.shutdown(wait=False, cancel_futures=True)
+        self._compute_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def stats(self):
+        """Queue depths and answers waiting on charts, for monitoring."""
+        return {
+            "routing": self._route_queue.qsize(),
+            "computing": self._compute_queue.qsize(),
+            "rendering": len(self._finishing),
+        }
+
+    async def answer(self, question, render=False, admit_timeout=None):
+        """
+        Answers a question through the pipeline.
+
+        Args:
+            question (str): The user's question.
+            render (bool): Attach base64 PNGs ("png") to charts that render
+                within the render timeout.
+            admit_timeout (float): Seconds to wait for queue space before
+                raising Overloaded; None waits as long as it takes.
+
+        Returns:
+            dict: As service.answer.
+
+        Raises:
+            Overloaded: The route queue stayed full for `admit_timeout` seconds.
+            service.AnswerError: As service.answer.
+        """
+        question = service.validate(question)
+        with tracing.trace(question, source="pipeline"):
+            job = _Job(question, render, asyncio.get_running_loop().create_future())
+            self._waiting.add(job.future)
+            job.future.add_done_callback(self._waiting.discard)
+            try:
+                await asyncio.wait_for(self._route_queue.put(job), admit_timeout)
+            except asyncio.TimeoutError:
+                raise Overloaded(f"No capacity for a new question within {admit_timeout}s") from None
+            return await job.future
+
+    async def _route_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._route_queue.get()]
+            while len(batch) < self.route_batch and not self._route_queue.empty():
+                batch.append(self._route_queue.get_nowait())
+            batch = [job for job in batch if not job.future.done()]
+            if not batch:
+                continue
+            questions = [job.question for job in batch]
+            start = time.perf_counter()
+            try:
+                routes = await loop.run_in_executor(self._route_pool, route_queries, questions)
+            except Exception:
+                # One query the encoder chokes on must not fail the rest of its batch
+                routes = await loop.run_in_executor(self._route_pool, _route_each, questions)
+            end = time.perf_counter()
+            for job, route in zip(batch, routes):
+                # The batch is shared, so each question gets the whole batch's routing time
+                job.context.run(tracing.record, "queue.route", job.queued, start)
+                job.context.run(tracing.record, "routing", start, end, batch=len(batch))
+                if isinstance(route, Exception):
+                    _fail(job, route)
+                    continue
+                job.route = route
+                job.context.run(tracing.annotate, qid=route.qid, tier=route.tier)
+                job.queued = time.perf_counter()
+                # Waits while compute is saturated, which in turn fills the route queue
+                await self._compute_queue.put(job)
+
+    async def _compute_stage(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._compute_queue.get()
+            if job.future.done():
+                continue
+            job.context.run(tracing.record, "queue.compute", job.queued, time.perf_counter())
+            try:
+                result = await loop.run_in_executor(
+                    self._compute_pool, job.context.run, service.run, job.question, job.route, self.cache
+                )
+                payload = job.context.run(service.respond, job.question, job.route, result)
+            except Exception as e:
+                _fail(job, e)
+                continue
+            if job.render and isinstance(result, Report) and result.specs:
+                # Charts are awaited off the compute workers, which move on to the next job
+                task = asyncio.create_task(self._finish(job, result.specs, payload))
+                self._finishing.add(task)
+                task.add_done_callback(self._finishing.discard)
+            elif not job.future.done():
+                job.future.set_result(payload)
+
+    async def _finish(self, job, specs, payload):
+        start = time.perf_counter()
+        async with self._render_slots:
+            # Submitted in the job's context so the render.chart spans land in its trace
+            futures = {spec.key: asyncio.wrap_future(job.context.run(charts.submit, spec)) for spec in specs}
+            _, late = await asyncio.wait(futures.values(), timeout=self.render_timeout)
+        job.context.run(tracing.record, "render", start, time.perf_counter(), charts=len(specs), late=len(late))
+        for future in late:
+            # Still rendering into the chart cache; nobody awaits the outcome here
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        if job.future.done():
+            return
+        # The payload is shared with the result cache: attach images to a copy
+        rendered = []
+        for chart in payload["charts"]:
+            future = futures.get(chart["key"])
+            if future is not None and future.done() and future.exception() is None:
+                chart = {**chart, "png": base64.b64encode(future.result()).decode("ascii")}
+            rendered.append(chart)
+        job.future.set_result({**payload, "charts": rendered})
+
+
+def _route_each(questions):
+    routes = []
+    for question in questions:
+        try:
+            routes.append(route_queries([question])[0])
+        except Exception as e:
+            routes.append(e)
+    return routes
+
+
+def _fail(job, error):
+    if not job.future.done():
+        job.future.set_exception(error)
@@ -2,17 +2,17 @@
 
 import pandas as pd
 from dateutil.relativedelta import relativedelta
-import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
-import re
+from matplotlib.figure import Figure
+from kpi_engine import pnl_cube
+from utils import charts, slots
+from utils.report import Report
 
 def compute_margin(df):
-    df = df.copy()
-    pivot = df.pivot_table(index=["Month", "Client"], 
-                           columns="Type", 
-                           values="Amount", 
-                           aggfunc="sum").reset_index()
+    # Slice the pre-aggregated P&L cube instead of pivoting the raw ledger
+    cube = pnl_cube.cube_for(df)
+    pivot = cube.long(["Client", "Type"]).pivot(index=["Month", "Client"],
+                                                columns="Type",
+                                                values="Amount").reset_index()
     pivot["Revenue"] = pivot.get("Revenue", 0)
     pivot["Cost"] = pivot.get("Cost", 0)
     
@@ -20,46 +20,45 @@ def compute_margin(df):
     pivot["Margin %"] = ((pivot["Revenue"] - pivot["Cost"]) / pivot["Revenue"]) * 100
     return pivot
 
-def extract_threshold(user_question, default_threshold=30):
-    if user_question:
-        patterns = [
-            r"margin\s*<\s*(\d+)",
-            r"less than\s*(\d+)",
-            r"below\s*(\d+)",
-            r"under\s*(\d+)",
-            r"margin.*?(\d+)\s*%"
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, user_question.lower())
-            if match:
-                return float(match.group(1))
-    return default_threshold
-
-def extract_month(user_question):
-    months = {
-        "january": 1, "february": 2, "march": 3, "april": 4,
-        "may": 5, "june": 6, "july": 7, "august": 8,
-        "september": 9, "october": 10, "november": 11, "december": 12
-    }
-    if user_question:
-        user_question = user_question.lower()
-        for name, num in months.items():
-            if name in user_question:
-                year_match = re.search(rf"{name}\s*(\d{{4}})", user_question)
-                if year_match:
-                    year = int(year_match.group(1))
-                    return pd.Timestamp(year=year, month=num, day=1)
-    return None
-
-def run(df, user_question=None):
+@charts.renderer("q1.margin_by_client")
+def margin_bar_chart(clients, margins, time_label, threshold):
+    fig = Figure()
+    ax = fig.subplots()
+
+    # Generate gradient pastel green-red colors
+    top, bottom = max(margins, default=0), min(margins, default=0)
+    colors = []
+    for val in margins:
+        if val >= 0:
+            green_intensity = 0.9 - (val / top) * 0.6 if top != 0 else 0.9
+            colors.append((green_intensity, 1.0, green_intensity))
+        else:
+            red_intensity = 0.9 - (abs(val) / abs(bottom)) * 0.6 if bottom != 0 else 0.9
+            colors.append((1.0, red_intensity, red_intensity))
+
+    charts.styled_axes(ax, '#D3D3D3', 0.6)
+
+    ax.barh(clients, margins, color=colors, edgecolor='none')
+    ax.set_xlabel(f"Margin % ({time_label})")
+    ax.set_ylabel("Client")
+    ax.set_title(f"Top 10 Clients with Margin < {threshold}%")
+    ax.set_xlim(-100, 100)
+    ax.invert_yaxis()
+    ax.grid(False)
+    fig.tight_layout()
+    return fig
+
+def compute(df, user_question=None):
+    report = Report()
     df_margin = compute_margin(df)
 
     if "Month" not in df_margin or "Client" not in df_margin or "Margin %" not in df_margin:
-        st.error("Required fields missing. Ensure Margin % calculation is correctly applied.")
-        return
+        report.error("Required fields missing. Ensure Margin % calculation is correctly applied.")
+        return report
 
-    threshold = extract_threshold(user_question)
-    target_month = extract_month(user_question)
+    params = slots.as_params(user_question, df)
+    threshold = params.threshold if params.threshold is not None else 30
+    target_month = params.month
 
     if target_month:
         filtered_data = df_margin[df_margin["Month"].dt.to_period("M") == target_month.to_period("M")]
@@ -70,7 +69,7 @@ def run(df, user_question=None):
         filtered_data = df_margin[(df_margin["Month"] >= quarter_start) & (df_margin["Month"] <= latest_month)]
         time_label = "the last quarter"
 
-    agg = filtered_data.groupby("Client").agg({
+    agg = filtered_data.groupby("Client", observed=True).agg({
         "Margin %": "mean",
         "Revenue": "sum",
         "Cost": "sum"
@@ -94,47 +93,32 @@ def run(df, user_question=None):
     low_margin_count = filtered_df["Client"].nunique()
     proportion = (low_margin_count / total_clients * 100) if total_clients else 0
 
-    st.markdown(
+    report.markdown(
         f"🔍 **For {time_label}**, **{low_margin_count} accounts** had an average margin below **{threshold}%** "
         f"and non-zero revenue, which is **{proportion:.1f}%** of all **{total_clients} accounts**."
     )
 
-    col1, col2 = st.columns([1, 1])
+    col1, col2 = report.columns([1, 1])
 
     with col1:
-        st.markdown(f"#### 📋 Accounts with Margin < {threshold}% (non-zero revenue)")
-        st.dataframe(
+        col1.markdown(f"#### 📋 Accounts with Margin < {threshold}% (non-zero revenue)")
+        col1.dataframe(
             top_10[["Client", "Latest Margin %", "Revenue (Million USD)", "Cost (Million USD)"]].reset_index(drop=True),
             use_container_width=True
         )
 
     with col2:
-        st.markdown("#### 📊 Margin % by Client (Bar Chart)")
-        fig, ax = plt.subplots()
-
-        # Generate gradient pastel green-red colors
-        margins = top_10["Latest Margin %"]
-        colors = []
-        for val in margins:
-            if val >= 0:
-                green_intensity = 0.9 - (val / margins.max()) * 0.6 if margins.max() != 0 else 0.9
-                colors.append((green_intensity, 1.0, green_intensity))
-            else:
-                red_intensity = 0.9 - (abs(val) / abs(margins.min())) * 0.6 if margins.min() != 0 else 0.9
-                colors.append((1.0, red_intensity, red_intensity))
-
-        for spine in ax.spines.values():
-            spine.set_color('#D3D3D3')
-            spine.set_linewidth(0.6)
-
-        ax.barh(top_10["Client"], top_10["Latest Margin %"], color=colors, edgecolor='none')
-        ax.set_xlabel(f"Margin % ({time_label})")
-        ax.set_ylabel("Client")
-        ax.set_title(f"Top 10 Clients with Margin < {threshold}%")
-        ax.set_xlim(-100, 100)
-        ax.invert_yaxis()
-        ax.grid(False)
-        plt.tight_layout()
-        st.pyplot(fig)
-
-    return None
+        col2.markdown("#### 📊 Margin % by Client (Bar Chart)")
+        col2.chart(charts.ChartSpec(
+            "q1.margin_by_client",
+            clients=top_10["Client"].tolist(),
+            margins=top_10["Latest Margin %"].tolist(),
+            time_label=time_label,
+            threshold=threshold
+        ))
+
+    return report
+
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
@@ -1,4 +1,5 @@
 import pandas as pd
+from kpi_engine import utilization
 
 def answer_question_q10(ut_df: pd.DataFrame, entity_name: str) -> dict:
     """
@@ -11,54 +12,45 @@ def answer_question_q10(ut_df: pd.DataFrame, entity_name: str) -> dict:
     Returns:
     - dict: Contains summary, trend table, and chart data
     """
-    # Standardize date format
-    ut_df["Month"] = pd.to_datetime(ut_df["Month"])
-    ut_df["MonthStr"] = ut_df["Month"].dt.strftime("%b-%Y")
+    # Slices of the precomputed UT cell table (built once per dataset)
+    engine = utilization.engine_for(ut_df)
 
     # Try matching by DU, then BU, then Account
-    if entity_name in ut_df["Delivery_Unit"].unique():
-        filtered = ut_df[ut_df["Delivery_Unit"] == entity_name].copy()
-        entity_type = "Delivery Unit"
-    elif entity_name in ut_df["Business_Unit"].unique():
-        filtered = ut_df[ut_df["Business_Unit"] == entity_name].copy()
-        entity_type = "Business Unit"
-    elif entity_name.lower() in ut_df["Final Customer Name"].str.lower().unique():
-        filtered = ut_df[ut_df["Final Customer Name"].str.lower() == entity_name.lower()].copy()
-        entity_type = "Account"
-    else:
+    match = engine.lookup(entity_name)
+    if match is None:
         return {
             "answer": f"'{entity_name}' not found in Delivery Unit, Business Unit, or Account columns.",
             "table": pd.DataFrame(),
             "chart": None
         }
+    dimension, label = match
+    entity_type = utilization.ENTITY_TYPES[dimension]
 
     # Keep only last 6 months (2 quarters)
-    recent_months = sorted(filtered["Month"].unique())[-6:]
-    filtered = filtered[filtered["Month"].isin(recent_months)]
+    grouped = engine.trend(where={dimension: label}, last_n=6)
 
-    if filtered.empty:
+    if grouped.empty:
         return {
             "answer": f"No recent UT% data available for {entity_type} '{entity_name}'.",
             "table": pd.DataFrame(),
             "chart": None
         }
 
-    # Compute UT%
-    grouped = (
-        filtered.groupby("MonthStr")
-        .agg({"Billed HC": "sum", "HC": "sum"})
-        .reset_index()
-    )
-    grouped["UT%"] = ((grouped["Billed HC"] / grouped["HC"]) * 100).round(2)
+    grouped["MonthStr"] = pd.PeriodIndex(grouped["Month"], freq="M").strftime("%b-%Y")
 
     latest_month = grouped["MonthStr"].iloc[-1]
     latest_ut = grouped["UT%"].iloc[-1]
 
     summary = f"UT% for {entity_type} '{entity_name}' in {latest_month} was {latest_ut}%."
+    columns = ["MonthStr", "Billed HC", "HC", "UT%"]
+    if "Hours UT%" in grouped.columns:
+        latest_hours_ut = grouped["Hours UT%"].iloc[-1]
+        summary += f" Billable hours were {latest_hours_ut}% of available hours."
+        columns += ["Billable Hours", "Available Hours", "Hours UT%"]
 
     return {
         "answer": summary,
-        "table": grouped[["MonthStr", "Billed HC", "HC", "UT%"]],
+        "table": grouped[columns],
         "chart": {
             "type": "line",
             "x": grouped["MonthStr"].tolist(),
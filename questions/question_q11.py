@@ -0,0 +1,62 @@
+# question_q11.py
+
+import pandas as pd
+from kpi_engine import headcount_movement
+from utils import slots
+from utils.report import Report
+
+# The question registry passes the UT frame as `df`
+DATASETS = ("ut",)
+
+def compute(df, user_question=None):
+    report = Report()
+    params = slots.as_params(user_question, df)
+    movement = headcount_movement.movement_for(df)
+
+    if len(movement.months) < 2:
+        report.warning("Need at least two months of allocation data to compare headcount.")
+        return report
+
+    month = movement.latest_month
+    if params.month is not None:
+        month = str(params.month.to_period("M"))
+        if month not in movement.months or month == movement.months[0]:
+            report.warning(f"No previous month of allocation data to compare {params.month.strftime('%B %Y')} with.")
+            return report
+
+    detail = movement.month(month, client=params.client)
+    summary = movement.summary(client=params.client)
+    summary = summary[summary["Month"] == month]
+    scope = f"**{params.client}**" if params.client else "all accounts"
+
+    joined = detail[detail["Movement"] == "Joined"]
+    left = detail[detail["Movement"] == "Left"]
+    transfers_in = (joined["Type"] == "Transfer in").sum()
+    transfers_out = (left["Type"] == "Transfer out").sum()
+    month_label = pd.Period(month, freq="M").strftime("%b %Y")
+
+    report.markdown(
+        f"🔍 In **{month_label}**, **{len(joined)}** people joined {scope} "
+        f"(**{transfers_in}** transferred from other accounts) and **{len(left)}** left "
+        f"(**{transfers_out}** moved to other accounts)."
+    )
+
+    col1, col2 = report.columns([1, 1])
+
+    with col1:
+        col1.markdown("### 📋 Joiners and Leavers")
+        col1.dataframe(detail, use_container_width=True, hide_index=True)
+
+    with col2:
+        col2.markdown("### 🔄 Movement by Account")
+        col2.dataframe(
+            summary.drop(columns=["Month"]).sort_values("Closing", ascending=False),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    return report
+
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
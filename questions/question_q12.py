@@ -0,0 +1,84 @@
+# question_q12.py
+
+import pandas as pd
+from matplotlib.figure import Figure
+import seaborn as sns
+from kpi_engine import utilization
+from utils import charts
+from utils.report import Report
+
+# The question registry passes the UT frame as `df`
+DATASETS = ("ut",)
+
+# Months shown (2 quarters)
+TREND_MONTHS = 6
+
+@charts.renderer("q12.fresher_ut")
+def fresher_ut_chart(months, series, ylabel):
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    charts.styled_axes(ax, '#D3D3D3', 0.6)
+
+    pastel_palette = sns.color_palette("pastel", len(series))
+    for idx, (du, values) in enumerate(series.items()):
+        ax.plot(months, values, label=du, color=pastel_palette[idx], marker='o', linewidth=2)
+
+    ax.set_title("Fresher UT% by Delivery Unit", fontsize=13)
+    ax.set_xlabel("Month")
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend(loc='upper left', fontsize=8)
+    ax.grid(False)
+    return fig
+
+def compute(df, user_question=None):
+    report = Report()
+    engine = utilization.engine_for(df)
+
+    if "Fresher" not in engine.dimensions or "Delivery_Unit" not in engine.dimensions:
+        report.warning("Fresher UT needs the FresherAgeingCategory and Delivery_Unit columns of LNTData.")
+        return report
+
+    trend = engine.trend(by=["Delivery_Unit"], where={"Fresher": utilization.FRESHER}, last_n=TREND_MONTHS)
+    if trend.empty:
+        report.info("No fresher allocations in the last two quarters.")
+        return report
+
+    # Hours-based UT% when the hours columns were loaded, else headcount-based
+    metric = "Hours UT%" if "Hours UT%" in trend.columns else "UT%"
+    trend["MonthStr"] = pd.PeriodIndex(trend["Month"], freq="M").strftime("%b-%Y")
+    pivot = trend.pivot(index="Delivery_Unit", columns="Month", values=metric)
+    pivot.columns = pd.PeriodIndex(pivot.columns, freq="M").strftime("%b-%Y")
+
+    latest = trend[trend["Month"] == trend["Month"].max()]
+    overall = engine.trend(where={"Fresher": utilization.FRESHER}, last_n=1)
+    best = latest.loc[latest[metric].idxmax()] if latest[metric].notna().any() else None
+
+    text = (
+        f"🔍 In **{latest['MonthStr'].iloc[0]}**, fresher {metric} across all DUs was "
+        f"**{overall[metric].iloc[0]:.1f}%** (**{int(overall['HC'].iloc[0])}** freshers)"
+    )
+    if best is not None:
+        text += f"; highest in **{best['Delivery_Unit']}** at **{best[metric]:.1f}%**"
+    report.markdown(text + ".")
+
+    col1, col2 = report.columns([1, 1])
+
+    with col1:
+        col1.markdown(f"### 📋 Fresher {metric} by DU")
+        col1.dataframe(pivot.round(1), use_container_width=True)
+
+    with col2:
+        col2.markdown(f"### 📈 Fresher {metric} Trend")
+        col2.chart(charts.ChartSpec(
+            "q12.fresher_ut",
+            months=list(pivot.columns),
+            series={str(du): row.tolist() for du, row in pivot.iterrows()},
+            ylabel=metric
+        ))
+
+    return report
+
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
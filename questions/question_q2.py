@@ -1,36 +1,41 @@
 # question_q2.py
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import re
-
-def run(df, user_question=None):
-    import streamlit as st
-
-    df.columns = df.columns.str.strip()
-    df['Month'] = pd.to_datetime(df['Month'])
-
-    latest_month = df['Month'].max()
+from matplotlib.figure import Figure
+from kpi_engine import pnl_cube
+from utils import charts, slots
+from utils.report import Report
+
+@charts.renderer("q2.group4_cost_pie")
+def group4_cost_pie(labels, values, title):
+    pastel_colors = ['#AEC6CF', '#FFB347', '#77DD77', '#FF6961', '#CBAACB', '#FFFACD']
+    fig = Figure()
+    ax = fig.subplots()
+    ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=pastel_colors[:len(values)])
+    ax.set_title(title)
+    return fig
+
+def compute(df, user_question=None):
+    report = Report()
+
+    # All aggregates below are slices of the pre-aggregated P&L cube
+    cube = pnl_cube.cube_for(df)
+
+    latest_month = cube.months.max()
     prev_month = (latest_month - pd.DateOffset(months=1)).replace(day=1)
 
-    segment = "Transportation"
-    if user_question:
-        for seg in df['Segment'].dropna().unique():
-            if seg.lower() in user_question.lower():
-                segment = seg
-                break
+    params = slots.as_params(user_question, df)
+    segment = params.segment or "Transportation"
 
-    df = df[df['Segment'] == segment]
+    revenue_where = {'Segment': segment, 'Type': 'Revenue'}
+    cost_where = {'Segment': segment, 'Type': 'Cost'}
 
-    revenue_df = df[df['Type'] == 'Revenue']
-    cost_df = df[df['Type'] == 'Cost']
-
-    revenue_m = revenue_df.groupby(['Client', 'Month'])['Amount'].sum().unstack(fill_value=0)
-    cost_m = cost_df.groupby(['Client', 'Month'])['Amount'].sum().unstack(fill_value=0)
+    revenue_m = cube.aggregate(['Client'], where=revenue_where).fillna(0)
+    cost_m = cube.aggregate(['Client'], where=cost_where).fillna(0)
     margin_m = (revenue_m - cost_m) / revenue_m.replace(0, 1) * 100
 
-    seg_rev = revenue_df.groupby('Month')['Amount'].sum()
-    seg_cost = cost_df.groupby('Month')['Amount'].sum()
+    seg_rev = cube.aggregate(where=revenue_where)
+    seg_cost = cube.aggregate(where=cost_where)
     seg_margin_pct = ((seg_rev - seg_cost) / seg_rev.replace(0, 1)) * 100
 
     try:
@@ -51,24 +56,21 @@ def run(df, user_question=None):
     cost_summary = f"{segment} cost {'increased' if cost_growth > 0 else 'decreased'} by {abs(cost_growth):.1f}% from {prev_month.strftime('%b')} to {latest_month.strftime('%b')}."
 
     margin_threshold = "a certain"
-    if user_question:
-        match = re.search(r'less than (\d+)%', user_question)
-        if match:
-            margin_threshold = f"less than {match.group(1)}%"
+    if params.threshold is not None:
+        margin_threshold = f"less than {params.threshold:g}%"
 
-    st.info(f"🔍 Running analysis for: **Show me accounts with {margin_threshold} margin**")
+    report.info(f"🔍 Running analysis for: **Show me accounts with {margin_threshold} margin**")
 
-    st.markdown("### 🔍 Key Insights")
-    st.markdown(f"- 📉 {margin_summary}")
-    st.markdown(f"- 👥 {client_summary}")
-    st.markdown(f"- 💸 {cost_summary}")
+    report.markdown("### 🔍 Key Insights")
+    report.markdown(f"- 📉 {margin_summary}")
+    report.markdown(f"- 👥 {client_summary}")
+    report.markdown(f"- 💸 {cost_summary}")
 
-    group4_df = cost_df[['Month', 'Client', 'Amount', 'Group4']].dropna(subset=['Group4'])
-    g4 = group4_df.groupby(['Group4', 'Month'])['Amount'].sum().unstack(fill_value=0)
+    g4 = cube.aggregate(['Group4'], where=cost_where).fillna(0)
 
     if prev_month not in g4.columns or latest_month not in g4.columns:
-        st.warning("Missing Group4 cost data for selected months.")
-        return
+        report.warning("Missing Group4 cost data for selected months.")
+        return report
 
     g4_raw = g4.copy()
     g4['% Change'] = ((g4_raw[latest_month] - g4_raw[prev_month]) / g4_raw[prev_month].replace(0, 0.0001)) * 100
@@ -89,11 +91,11 @@ def run(df, user_question=None):
     table_df['Jun (Mn USD)'] = table_df['Jun (Mn USD)'].map(lambda x: f"{x:,.2f}")
     table_df['% Change'] = table_df['% Change'].map(lambda x: f"{x:.2f}%")
 
-    col1, col2 = st.columns([1, 1])
+    col1, col2 = report.columns([1, 1])
 
     with col1:
-        st.markdown(f"### 📊 Top 8 Group4 Cost Increases (actual cost in Mn USD, % change from {prev_month.strftime('%b')} to {latest_month.strftime('%b')})")
-        st.dataframe(table_df)
+        col1.markdown(f"### 📊 Top 8 Group4 Cost Increases (actual cost in Mn USD, % change from {prev_month.strftime('%b')} to {latest_month.strftime('%b')})")
+        col1.dataframe(table_df)
 
     with col2:
         g4_latest_cost = g4_raw[latest_month]
@@ -104,8 +106,15 @@ def run(df, user_question=None):
         pie_labels = list(top5.index) + (['Others'] if others > 0 else [])
         pie_values = list(top5.values) + ([others] if others > 0 else [])
 
-        pastel_colors = ['#AEC6CF', '#FFB347', '#77DD77', '#FF6961', '#CBAACB', '#FFFACD']
-        fig, ax = plt.subplots()
-        ax.pie(pie_values, labels=pie_labels, autopct='%1.1f%%', startangle=90, colors=pastel_colors[:len(pie_values)])
-        ax.set_title(f"Top Group4 Cost Types – {latest_month.strftime('%b')}")
-        st.pyplot(fig)
+        col2.chart(charts.ChartSpec(
+            "q2.group4_cost_pie",
+            labels=pie_labels,
+            values=pie_values,
+            title=f"Top Group4 Cost Types – {latest_month.strftime('%b')}"
+        ))
+
+    return report
+
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
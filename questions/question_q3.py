@@ -1,41 +1,71 @@
 # question_q3.py
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import matplotlib.colors as mcolors
 import matplotlib.cm as cm
 import numpy as np
-
-def run(df, user_question=None):
-    import streamlit as st
-
-    # Standardize column names
-    df.columns = df.columns.str.strip()
-
-    # Identify amount column
-    amount_col = next((col for col in df.columns if col.lower() in ['amount in usd', 'amountinusd', 'amount']), None)
-    if not amount_col:
-        st.error("❌ Column not found: Amount in USD")
-        return
-
-    # Clean and convert Month
-    df['Month'] = pd.to_datetime(df['Month'], errors='coerce')
-    df = df.dropna(subset=['Month'])
-    df['Quarter'] = df['Month'].dt.to_period('Q')
+from kpi_engine import pnl_cube
+from utils import charts
+from utils.report import Report
+
+@charts.renderer("q3.cb_change_by_segment")
+def cb_change_chart(segments, changes, title):
+    fig = Figure(figsize=(6, 4))
+    ax1 = fig.subplots()
+    norm = mcolors.TwoSlopeNorm(vmin=-100, vcenter=0, vmax=100)
+    colors = [
+        cm.Reds(norm(val)) if val < 0 else cm.Greens(norm(val))
+        for val in changes
+    ]
+    pd.Series(changes, index=segments).plot(kind='barh', ax=ax1, color=colors)
+    charts.styled_axes(ax1)
+    ax1.set_xlabel('% Change in C&B Cost')
+    ax1.set_title(title)
+    ax1.set_xlim(-100, 100)
+    return fig
+
+@charts.renderer("q3.cb_ratio_by_quarter")
+def cb_ratio_chart(segments, prev_ratio, latest_ratio, prev_label, latest_label):
+    fig = Figure(figsize=(6, 4))
+    ax2 = fig.subplots()
+    bar_width = 0.35
+    x = np.arange(len(segments))
+
+    ax2.bar(x - bar_width / 2, prev_ratio, width=bar_width, label=prev_label, color='#a8dadc', edgecolor='#ccc')
+    ax2.bar(x + bar_width / 2, latest_ratio, width=bar_width, label=latest_label, color='#fff9b0', edgecolor='#ccc')
+
+    ax2.set_xticks(x)
+    ax2.set_xticklabels(segments, rotation=45, ha='right')
+    ax2.set_ylabel('C&B / Revenue (%)')
+    ax2.set_title('Quarterly C&B as % of Revenue')
+    ax2.legend()
+    charts.styled_axes(ax2)
+    return fig
+
+def compute(df, user_question=None):
+    report = Report()
+
+    # Quarterly slices of the pre-aggregated P&L cube
+    try:
+        cube = pnl_cube.cube_for(df)
+    except KeyError:
+        report.error("❌ Column not found: Amount in USD")
+        return report
 
     # Get latest and previous quarter
-    latest_month = df['Month'].max()
+    latest_month = cube.months.max()
     latest_q = latest_month.to_period('Q')
     prev_q = (latest_month - pd.DateOffset(months=3)).to_period('Q')
 
     # Prepare data
-    df_cb = df[df['Group3'].str.contains('C&B', na=False)]
-    df_cost = df[df['Type'].str.lower() == 'cost']
-    df_rev = df[df['Type'].str.lower() == 'revenue']
+    is_cb = {'Group3': lambda cats: cats.str.contains('C&B', na=False)}
+    is_cost = {'Type': lambda cats: cats.str.lower() == 'cost'}
+    is_rev = {'Type': lambda cats: cats.str.lower() == 'revenue'}
 
-    cb_summary = df_cb.groupby(['Segment', 'Quarter'])[amount_col].sum().unstack(fill_value=0)
-    cost_summary = df_cost.groupby(['Segment', 'Quarter'])[amount_col].sum().unstack(fill_value=0)
-    rev_summary = df_rev.groupby(['Segment', 'Quarter'])[amount_col].sum().unstack(fill_value=0)
+    cb_summary = cube.aggregate(['Segment'], where=is_cb, freq='Q').fillna(0)
+    cost_summary = cube.aggregate(['Segment'], where=is_cost, freq='Q').fillna(0)
+    rev_summary = cube.aggregate(['Segment'], where=is_rev, freq='Q').fillna(0)
 
     for q in [prev_q, latest_q]:
         for summary in [cb_summary, cost_summary, rev_summary]:
@@ -58,11 +88,11 @@ def run(df, user_question=None):
     increased_segments = cb_summary[cb_summary[latest_q] > cb_summary[prev_q]].index.tolist()
 
     # Header insights
-    st.markdown("### 📊 C&B Cost Insights")
-    st.markdown(f"- 💰 **Overall C&B change** from {prev_q} to {latest_q}: **{cb_change:+.1f}%**")
-    st.markdown(f"- ✅ **Overall Revenue change** from {prev_q} to {latest_q}: **{rev_change:+.1f}%**")
+    report.markdown("### 📊 C&B Cost Insights")
+    report.markdown(f"- 💰 **Overall C&B change** from {prev_q} to {latest_q}: **{cb_change:+.1f}%**")
+    report.markdown(f"- ✅ **Overall Revenue change** from {prev_q} to {latest_q}: **{rev_change:+.1f}%**")
     if increased_segments:
-        st.markdown(f"- 📈 **Segments with increased C&B**: {', '.join(increased_segments)}")
+        report.markdown(f"- 📈 **Segments with increased C&B**: {', '.join(increased_segments)}")
 
     # Prepare display table
     merged = pd.DataFrame(index=cb_summary.index)
@@ -97,8 +127,8 @@ def run(df, user_question=None):
         except:
             return ''
 
-    st.markdown("#### 🧾 C&B vs Revenue Comparison by Segment")
-    st.dataframe(
+    report.markdown("#### 🧾 C&B vs Revenue Comparison by Segment")
+    report.dataframe(
         styled.style
             .applymap(highlight_mismatch, subset=['C&B vs Revenue Growth (pp)'])
             .set_properties(**{'white-space': 'normal', 'text-align': 'left'})
@@ -106,45 +136,32 @@ def run(df, user_question=None):
     )
 
     # Charts
-    col1, col2 = st.columns(2)
+    col1, col2 = report.columns(2)
 
     with col1:
-        fig1, ax1 = plt.subplots(figsize=(6, 4))
         bar_data = ((cb_summary[latest_q] - cb_summary[prev_q]) / cb_summary[prev_q].replace(0, 1)) * 100
         bar_data = bar_data.sort_values()
-
-        norm = mcolors.TwoSlopeNorm(vmin=-100, vcenter=0, vmax=100)
-        colors = [
-            cm.Reds(norm(val)) if val < 0 else cm.Greens(norm(val))
-            for val in bar_data
-        ]
-        bar_data.plot(kind='barh', ax=ax1, color=colors)
-        for spine in ax1.spines.values():
-            spine.set_linewidth(0.5)
-            spine.set_edgecolor('#cccccc')
-        ax1.set_xlabel('% Change in C&B Cost')
-        ax1.set_title(f'C&B Change by Segment: {prev_q} vs {latest_q}')
-        ax1.set_xlim(-100, 100)
-        st.pyplot(fig1)
+        col1.chart(charts.ChartSpec(
+            "q3.cb_change_by_segment",
+            segments=bar_data.index.tolist(),
+            changes=bar_data.tolist(),
+            title=f'C&B Change by Segment: {prev_q} vs {latest_q}'
+        ))
 
     with col2:
         cb_ratio_q1 = (cb_summary[prev_q] / rev_summary[prev_q].replace(0, np.nan)) * 100
         cb_ratio_q2 = (cb_summary[latest_q] / rev_summary[latest_q].replace(0, np.nan)) * 100
+        col2.chart(charts.ChartSpec(
+            "q3.cb_ratio_by_quarter",
+            segments=cb_ratio_q1.index.tolist(),
+            prev_ratio=cb_ratio_q1.tolist(),
+            latest_ratio=cb_ratio_q2.tolist(),
+            prev_label=str(prev_q),
+            latest_label=str(latest_q)
+        ))
+
+    return report
 
-        fig2, ax2 = plt.subplots(figsize=(6, 4))
-        index = cb_ratio_q1.index
-        bar_width = 0.35
-        x = np.arange(len(index))
-
-        ax2.bar(x - bar_width / 2, cb_ratio_q1, width=bar_width, label=str(prev_q), color='#a8dadc', edgecolor='#ccc')
-        ax2.bar(x + bar_width / 2, cb_ratio_q2, width=bar_width, label=str(latest_q), color='#fff9b0', edgecolor='#ccc')
-
-        ax2.set_xticks(x)
-        ax2.set_xticklabels(index, rotation=45, ha='right')
-        ax2.set_ylabel('C&B / Revenue (%)')
-        ax2.set_title('Quarterly C&B as % of Revenue')
-        ax2.legend()
-        for spine in ax2.spines.values():
-            spine.set_linewidth(0.5)
-            spine.set_edgecolor('#cccccc')
-        st.pyplot(fig2)
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
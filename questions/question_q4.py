@@ -1,17 +1,37 @@
 # question_q4.py (Final version with 'Amount in USD', Million USD, chart styling, and ppt download)
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from kpi_engine import pnl_cube
+from kpi_engine.margin import margin_cb_movers
+from utils import charts
+from utils.report import Report
 
-def run(df, user_question=None):
-    import streamlit as st
-    from io import BytesIO
-    from pptx import Presentation
-    from pptx.util import Inches, Pt
-    from pptx.enum.shapes import MSO_SHAPE
-    from pptx.dml.color import RGBColor
+@charts.renderer("q4.revenue_vs_cb")
+def revenue_vs_cb_chart(months, revenue, cb_pct):
+    fig = Figure(figsize=(6.5, 4))
+    ax1 = fig.subplots()
+
+    bar_color = '#FFFACD'  # pastel yellow
+    line_color = '#ADD8E6'  # pastel blue
+
+    ax1.bar(months, revenue, width=20, color=bar_color, label='Revenue')
+    ax1.set_ylabel("Revenue (Million USD)", color=bar_color)
+    charts.styled_axes(ax1)
+
+    ax2 = ax1.twinx()
+    ax2.plot(months, cb_pct, color=line_color, marker='o', label='C&B %')
+    ax2.set_ylabel("C&B % of Revenue", color=line_color)
+    charts.styled_axes(ax2)
+
+    ax1.set_title("MoM Revenue vs C&B % of Revenue")
+    fig.tight_layout()
+    return fig
+
+def compute(df, user_question=None):
+    report = Report()
 
-    df.columns = df.columns.str.strip()
+    df = df.rename(columns=str.strip)
 
     # ✅ Fix for 'Amount in USD'
     amount_col = None
@@ -20,19 +40,17 @@ def run(df, user_question=None):
             amount_col = col
             break
     if not amount_col:
-        st.error("❌ Column not found: Amount in USD")
-        return
+        report.error("❌ Column not found: Amount in USD")
+        return report
 
-    df['Month'] = pd.to_datetime(df['Month'], errors='coerce')
-    df = df.dropna(subset=['Month'])
+    # Fetch the cube for the frame as loaded, before Month is parsed below
+    cube = pnl_cube.cube_for(df, amount_col)
 
-    # ✅ Filter C&B and Revenue
-    df_cb = df[df['Group3'].str.contains('C&B', na=False)]
-    df_rev = df[df['Type'].str.lower() == 'revenue']
+    df = df.assign(Month=pd.to_datetime(df['Month'], errors='coerce')).dropna(subset=['Month'])
 
-    # ✅ Monthly aggregation
-    cb_monthly = df_cb.groupby(df_cb['Month'].dt.to_period('M'))[amount_col].sum()
-    rev_monthly = df_rev.groupby(df_rev['Month'].dt.to_period('M'))[amount_col].sum()
+    # ✅ Monthly aggregation, sliced from the P&L cube
+    cb_monthly = cube.aggregate(where={'Group3': lambda cats: cats.str.contains('C&B', na=False)}, freq='M')
+    rev_monthly = cube.aggregate(where={'Type': lambda cats: cats.str.lower() == 'revenue'}, freq='M')
 
     df_summary = pd.DataFrame({
         'C&B (Million USD)': cb_monthly / 1e6,
@@ -46,103 +64,76 @@ def run(df, user_question=None):
 
     # ✅ Segment-level margin drop + C&B increase logic
     latest_month = df['Month'].max()
-    prev_month = (latest_month - pd.DateOffset(months=1)).replace(day=1)
+    movers = margin_cb_movers(df, grain='Segment', amount_col=amount_col, latest_month=latest_month)
 
-    df_latest = df[df['Month'].dt.to_period('M') == latest_month.to_period('M')]
-    df_prev = df[df['Month'].dt.to_period('M') == prev_month.to_period('M')]
-
-    def margin_calc(sub_df):
-        rev = sub_df[sub_df['Type'].str.lower() == 'revenue'][amount_col].sum()
-        cost = sub_df[sub_df['Type'].str.lower() == 'cost'][amount_col].sum()
-        return ((rev - cost) / cost * 100) if cost else 0
-
-    segment_insights = []
-    segments = df['Segment'].dropna().unique()
-
-    for seg in segments:
-        margin_now = margin_calc(df_latest[df_latest['Segment'] == seg])
-        margin_prev = margin_calc(df_prev[df_prev['Segment'] == seg])
-        cb_now = df_cb[(df_cb['Segment'] == seg) & (df_cb['Month'].dt.to_period('M') == latest_month.to_period('M'))][amount_col].sum()
-        cb_prev = df_cb[(df_cb['Segment'] == seg) & (df_cb['Month'].dt.to_period('M') == prev_month.to_period('M'))][amount_col].sum()
-
-        if cb_now > cb_prev and margin_now < margin_prev:
-            segment_insights.append(
-                f"**{seg}**: Margin% dropped from {margin_prev:.1f}% to {margin_now:.1f}% and C&B rose from ${cb_prev/1e6:.1f}M to ${cb_now/1e6:.1f}M"
-            )
+    segment_insights = [
+        f"**{row['Segment']}**: Margin% dropped from {row['Margin % Prev']:.1f}% to {row['Margin % Latest']:.1f}% and C&B rose from ${row['C&B Prev']/1e6:.1f}M to ${row['C&B Latest']/1e6:.1f}M"
+        for _, row in movers[movers['Flagged']].iterrows()
+    ]
 
     # ✅ Display insights
-    st.markdown("### 📊 MoM Trend of C&B % of Revenue")
+    report.markdown("### 📊 MoM Trend of C&B % of Revenue")
 
     if df_summary.shape[0] >= 2:
         last = df_summary.index[-1]
         prev = df_summary.index[-2]
         cb_chg = df_summary.loc[last, 'MoM C&B Change (%)']
         rev_chg = df_summary.loc[last, 'MoM Revenue Change (%)']
-        st.markdown(
+        report.markdown(
             f"📌 In **{last.strftime('%b %Y')}**, C&B cost changed by **{cb_chg:+.1f}%** while revenue changed by **{rev_chg:+.1f}%** vs **{prev.strftime('%b %Y')}**."
         )
         if segment_insights:
-            st.markdown("🔍 Segments with margin drop and C&B increase:")
+            report.markdown("🔍 Segments with margin drop and C&B increase:")
             for insight in segment_insights:
-                st.markdown(f"- {insight}")
+                report.markdown(f"- {insight}")
 
     # ✅ Table and chart side by side
-    col1, col2 = st.columns([1, 1])
+    col1, col2 = report.columns([1, 1])
     with col1:
-        st.dataframe(df_summary.reset_index(drop=False).rename(columns={'Month': 'Period'}), hide_index=True)
+        col1.dataframe(df_summary.reset_index(drop=False).rename(columns={'Month': 'Period'}), hide_index=True)
 
     with col2:
-        fig, ax1 = plt.subplots(figsize=(6.5, 4))
-        df_summary_plot = df_summary.copy()
-        df_summary_plot.index = df_summary_plot.index.to_timestamp()
-
-        bar_color = '#FFFACD'  # pastel yellow
-        line_color = '#ADD8E6'  # pastel blue
-
-        ax1.bar(df_summary_plot.index, df_summary_plot['Revenue (Million USD)'], width=20,
-                color=bar_color, label='Revenue')
-        ax1.set_ylabel("Revenue (Million USD)", color=bar_color)
+        chart = charts.ChartSpec(
+            "q4.revenue_vs_cb",
+            months=df_summary.index.to_timestamp().tolist(),
+            revenue=df_summary['Revenue (Million USD)'].tolist(),
+            cb_pct=df_summary['C&B % of Revenue'].tolist()
+        )
+        col2.chart(chart)
 
-        for spine in ax1.spines.values():
-            spine.set_linewidth(0.5)
-            spine.set_edgecolor('#cccccc')
+    # ✅ PPTX Export (the deck is only built when the button is clicked)
+    if df_summary.shape[0] >= 2:
+        content = "\n".join([
+            f"In {last.strftime('%b %Y')}, C&B cost changed by {cb_chg:+.1f}% and Revenue by {rev_chg:+.1f}% vs {prev.strftime('%b %Y')}.",
+            "Segments with margin drop & rising C&B:" if segment_insights else "No segments met the criteria."
+        ] + [i.replace("**", "") for i in segment_insights])
 
-        ax2 = ax1.twinx()
-        ax2.plot(df_summary_plot.index, df_summary_plot['C&B % of Revenue'],
-                 color=line_color, marker='o', label='C&B %')
-        ax2.set_ylabel("C&B % of Revenue", color=line_color)
+        def build_ppt():
+            from io import BytesIO
+            from pptx import Presentation
+            from pptx.util import Inches, Pt
 
-        for spine in ax2.spines.values():
-            spine.set_linewidth(0.5)
-            spine.set_edgecolor('#cccccc')
+            prs = Presentation()
+            slide = prs.slides.add_slide(prs.slide_layouts[5])
+            title = slide.shapes.title
+            title.text = "C&B MoM Trend Summary"
 
-        ax1.set_title("MoM Revenue vs C&B % of Revenue")
-        fig.tight_layout()
-        st.pyplot(fig)
+            textbox = slide.shapes.add_textbox(Inches(0.5), Inches(1.0), Inches(8), Inches(2))
+            tf = textbox.text_frame
+            tf.text = content
+            tf.paragraphs[0].font.size = Pt(14)
 
-    # ✅ PPTX Export
-    if st.button("📥 Download as PPT"):
-        prs = Presentation()
-        slide = prs.slides.add_slide(prs.slide_layouts[5])
-        title = slide.shapes.title
-        title.text = "C&B MoM Trend Summary"
+            # Add chart image
+            slide.shapes.add_picture(BytesIO(charts.render_png(chart)), Inches(1), Inches(3), Inches(7), Inches(3.5))
 
-        content = "\n".join([
-            f"In {last.strftime('%b %Y')}, C&B cost changed by {cb_chg:+.1f}% and Revenue by {rev_chg:+.1f}% vs {prev.strftime('%b %Y')}.",
-            "Segments with margin drop & rising C&B:" if segment_insights else "No segments met the criteria."
-        ] + [i.replace("**", "") for i in segment_insights])
+            output = BytesIO()
+            prs.save(output)
+            return output.getvalue()
 
-        textbox = slide.shapes.add_textbox(Inches(0.5), Inches(1.0), Inches(8), Inches(2))
-        tf = textbox.text_frame
-        tf.text = content
-        tf.paragraphs[0].font.size = Pt(14)
+        report.download("📥 Download as PPT", "Download PPT", build_ppt, "C&B_Trend_Summary.pptx")
 
-        # Add chart image
-        img_stream = BytesIO()
-        fig.savefig(img_stream, format='png')
-        img_stream.seek(0)
-        slide.shapes.add_picture(img_stream, Inches(1), Inches(3), Inches(7), Inches(3.5))
+    return report
 
-        output = BytesIO()
-        prs.save(output)
-        st.download_button("Download PPT", data=output.getvalue(), file_name="C&B_Trend_Summary.pptx")
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
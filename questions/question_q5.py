@@ -1,32 +1,32 @@
 import pandas as pd
+from kpi_engine import pnl_cube
 
 def analyze_cb_cost_percentage_trend(pnl_df: pd.DataFrame) -> dict:
     """
     Calculates MoM trend of C&B Cost as a % of Total Revenue.
 
     Args:
-        pnl_df (pd.DataFrame): The Profit and Loss dataframe.
+        pnl_df (pd.DataFrame): Preprocessed P&L with 'Month', 'Type', 'Group3'
+            and 'Amount'.
 
     Returns:
         dict: Dictionary containing summary, table, and chart data.
     """
 
-    # Filter C&B Cost rows
-    cb_df = pnl_df[pnl_df["Group Description"] == "C&B"]
-    revenue_df = pnl_df[pnl_df["Group Description"] == "Total Revenue"]
-
-    # Sum by Month
-    cb_monthly = cb_df.groupby("Month")["Amount in USD"].sum()
-    rev_monthly = revenue_df.groupby("Month")["Amount in USD"].sum()
+    # Monthly C&B cost and revenue, sliced from the P&L cube (C&B rows carry it in Group3)
+    cube = pnl_cube.cube_for(pnl_df)
+    cb_monthly = cube.aggregate(where={'Group3': lambda cats: cats.str.contains('C&B', na=False)}, freq='M')
+    rev_monthly = cube.aggregate(where={'Type': lambda cats: cats.str.lower() == 'revenue'}, freq='M')
 
     # Join and calculate %
     combined = pd.DataFrame({
         "C&B Cost": cb_monthly,
         "Total Revenue": rev_monthly
-    })
+    }).dropna()
 
     combined["C&B Cost %"] = (combined["C&B Cost"] / combined["Total Revenue"]) * 100
-    combined = combined.reset_index()
+    combined = combined.rename_axis("Month").reset_index()
+    combined["Month"] = combined["Month"].dt.strftime("%b-%Y")
 
     # Prepare response
     summary = "Here is the Month-over-Month trend of C&B cost as a percentage of Total Revenue:"
@@ -2,28 +2,36 @@ import pandas as pd
 
 def calculate_revenue_trends(df: pd.DataFrame) -> dict:
     """
-    Calculates YoY, QoQ, and MoM revenue trends by DU, BU, and Account.
+    Calculates YoY, QoQ, and MoM revenue trends by segment and account.
+
+    The P&L has no delivery or business unit columns: Segment is its
+    business-line dimension and Client its account.
 
     Args:
-        df (pd.DataFrame): Input DataFrame containing columns:
-            - 'Date'
-            - 'Delivery_Unit'
-            - 'Business_Unit'
-            - 'Final_Customer_Name'
-            - 'Revenue'
+        df (pd.DataFrame): Preprocessed P&L (see kpi_engine.margin.preprocess_pnl_data)
+            containing columns:
+            - 'Month'
+            - 'Type'
+            - 'Segment'
+            - 'Client'
+            - 'Amount'
 
     Returns:
         dict: Contains dataframes with revenue trends for YoY, QoQ, and MoM.
     """
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Year'] = df['Date'].dt.year
-    df['Quarter'] = df['Date'].dt.to_period("Q")
-    df['Month'] = df['Date'].dt.to_period("M")
+    keys = [col for col in ('Segment', 'Client') if col in df.columns]
+    revenue = df.loc[df['Type'] == 'Revenue', keys + ['Month', 'Amount']]
+    month = pd.to_datetime(revenue['Month'])
+    revenue = revenue.assign(
+        Year=month.dt.year,
+        Quarter=month.dt.to_period("Q"),
+        Month=month.dt.to_period("M")
+    ).rename(columns={'Amount': 'Revenue'})
 
-    # Grouped revenue summaries
-    yoy_df = df.groupby(['Delivery_Unit', 'Business_Unit', 'Final_Customer_Name', 'Year'])['Revenue'].sum().reset_index()
-    qoq_df = df.groupby(['Delivery_Unit', 'Business_Unit', 'Final_Customer_Name', 'Quarter'])['Revenue'].sum().reset_index()
-    mom_df = df.groupby(['Delivery_Unit', 'Business_Unit', 'Final_Customer_Name', 'Month'])['Revenue'].sum().reset_index()
+    # Grouped revenue summaries (observed=True: only segment/account pairs present in the data)
+    yoy_df = revenue.groupby(keys + ['Year'], observed=True)['Revenue'].sum().reset_index()
+    qoq_df = revenue.groupby(keys + ['Quarter'], observed=True)['Revenue'].sum().reset_index()
+    mom_df = revenue.groupby(keys + ['Month'], observed=True)['Revenue'].sum().reset_index()
 
     return {
         "yoy_trend": yoy_df,
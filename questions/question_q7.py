@@ -1,126 +1,158 @@
 # question_q7.py
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import streamlit as st
+from matplotlib.figure import Figure
 import seaborn as sns
-from scipy.interpolate import make_interp_spline
 import numpy as np
+from data_loader.registry import load_sheet, UT_PATH, UT_SHEET
+from kpi_engine import distinct_count, headcount
+from utils import charts
+from utils.report import Report
+
+# The question registry passes the UT frame as `df`
+DATASETS = ("ut",)
+
+# Clients drawn on the FTE trend; the headline insight keeps its top-6 basis
+TREND_CLIENTS = 50
+HEADLINE_CLIENTS = 6
+# Smoothed vertices across all trend lines: grid points per line shrink as
+# clients are added so render time stays flat (6 clients x 300 points)
+TREND_POINT_BUDGET = 1800
+MAX_SMOOTH_POINTS = 300
+LEGEND_CLIENTS = 10
+
+def smooth_points(n_clients, n_months, budget=TREND_POINT_BUDGET):
+    """Grid points per smoothed line: the budget shared out, never coarser than 4 per month."""
+    return int(min(MAX_SMOOTH_POINTS, max(budget // max(n_clients, 1), 4 * n_months)))
+
+@charts.renderer("q7.fte_trend")
+def fte_trend_chart(months, clients, fte, points=MAX_SMOOTH_POINTS):
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    charts.styled_axes(ax, '#D3D3D3', 0.6)
+
+    pastel_palette = sns.color_palette("pastel", len(clients))
+    x = np.arange(len(months))
+
+    # One basis-matrix product smooths every client's series
+    x_smooth, y_smooth = charts.smooth_columns(np.asarray(fte, dtype=float).reshape(len(months), len(clients)), points)
+    lines = ax.plot(x_smooth, y_smooth, linewidth=2)
+    for line, client, color in zip(lines, clients, pastel_palette):
+        line.set_color(color)
+        line.set_label(client)
+
+    ax.set_title("Monthly FTE (Smoothed Trend)", fontsize=13)
+    ax.set_xlabel("Month")
+    ax.set_ylabel("FTE (Headcount)")
+    ax.set_xticks(x)
+    ax.set_xticklabels(months, rotation=45)
+    ax.legend(handles=lines[:LEGEND_CLIENTS], loc='upper left', fontsize=8)
+    ax.grid(False)
+    return fig
+
+@charts.renderer("q7.headcount_composition")
+def headcount_composition_chart(status, location):
+    fig = Figure(figsize=(14, 5))
+    axs = fig.subplots(1, 2)
+    for ax in axs:
+        charts.styled_axes(ax, '#D3D3D3', 0.6)
 
-def run(df, user_question):
-    # Load correct dataset
-    df = pd.read_excel("sample_data/LNTData.xlsx")
+    # Chart 1 - Billable vs Non-Billable
+    status.plot(kind='bar', stacked=True, ax=axs[0], color=['#B0E57C', '#FFE0B2'], edgecolor='#D3D3D3')
+    axs[0].set_title("Monthly Billable vs Non-Billable")
+    axs[0].set_xlabel("Month")
+    axs[0].set_ylabel("Headcount")
+    axs[0].legend(loc='upper left', fontsize=8)
+    axs[0].tick_params(axis='x', rotation=45)
+
+    # Chart 2 - Onsite vs Offshore
+    location.plot(kind='bar', stacked=True, ax=axs[1], color=['#ADD8E6', '#FFDAB9'], edgecolor='#D3D3D3')
+    axs[1].set_title("Monthly Onsite vs Offshore")
+    axs[1].set_xlabel("Month")
+    axs[1].set_ylabel("Headcount")
+    axs[1].legend(loc='upper left', fontsize=8)
+    axs[1].tick_params(axis='x', rotation=45)
+    return fig
 
-    df['Date_a'] = pd.to_datetime(df['Date_a'], errors='coerce')
-    df = df.dropna(subset=['Date_a', 'FinalCustomerName', 'PSNo'])
-    df['Month'] = df['Date_a'].dt.to_period('M').astype(str)
+def compute(df, user_question):
+    report = Report()
+    if 'PSNo' not in df.columns:
+        # Called with another frame: load the UT data (parsed and preprocessed once per process)
+        df = load_sheet(UT_PATH, UT_SHEET, usecols=headcount.UT_COLUMNS, preprocess=headcount.preprocess_ut_data)
 
     # ✅ Compute headcount as count of PSNo
-    monthly_headcount = df.groupby(['FinalCustomerName', 'Month'])['PSNo'].nunique().reset_index()
+    # Distinct PSNo per (client, month, status, location) cell, built once per dataset;
+    # every headcount below is a merge of those cells
+    counter = distinct_count.counter_for(df)
+    monthly_headcount = counter.count(['FinalCustomerName', 'Month']).reset_index()
     monthly_headcount = monthly_headcount.rename(columns={'PSNo': 'FTE'})
     monthly_headcount['FTE'] = monthly_headcount['FTE'].round(1)
 
     fte_pivot = monthly_headcount.pivot(index='Month', columns='FinalCustomerName', values='FTE').fillna(0)
 
-    # Select top 6 clients by average FTE
-    top_clients = fte_pivot.mean().sort_values(ascending=False).head(6).index
+    # Select top clients by average FTE
+    top_clients = fte_pivot.mean().sort_values(ascending=False).head(TREND_CLIENTS).index
     chart_data = fte_pivot[top_clients]
 
     # 📌 Text Insight: Overall headcount growth
-    overall_fte = chart_data.sum(axis=1)
+    overall_fte = chart_data.iloc[:, :HEADLINE_CLIENTS].sum(axis=1)
     first_month = overall_fte.index[0]
     last_month = overall_fte.index[-1]
     fte_change = overall_fte.iloc[-1] - overall_fte.iloc[0]
     pct_change = (fte_change / overall_fte.iloc[0]) * 100 if overall_fte.iloc[0] else 0
 
-    st.markdown(
+    report.markdown(
         f"🔍 **Overall FTE (Headcount)** grew from **{overall_fte.iloc[0]:.1f}** in **{first_month}** "
         f"to **{overall_fte.iloc[-1]:.1f}** in **{last_month}**, a change of **{fte_change:.1f} FTEs "
         f"({pct_change:.1f}%)**."
     )
 
     # ➕ Additional Insight: % Billable / Non-Billable and Onsite / Offshore
-    total_count = df['PSNo'].nunique()
-    billable_pct = df[df['Status'] == 'Billable']['PSNo'].nunique() / total_count * 100 if total_count else 0
-    nonbillable_pct = df[df['Status'] == 'Non Billable']['PSNo'].nunique() / total_count * 100 if total_count else 0
-    onsite_pct = df[df['Onsite/Offshore'] == 'Onsite']['PSNo'].nunique() / total_count * 100 if total_count else 0
-    offshore_pct = df[df['Onsite/Offshore'] == 'Offshore']['PSNo'].nunique() / total_count * 100 if total_count else 0
+    total_count = counter.count()
+    billable_pct = counter.count(where={'Status': 'Billable'}) / total_count * 100 if total_count else 0
+    nonbillable_pct = counter.count(where={'Status': 'Non Billable'}) / total_count * 100 if total_count else 0
+    onsite_pct = counter.count(where={'Onsite/Offshore': 'Onsite'}) / total_count * 100 if total_count else 0
+    offshore_pct = counter.count(where={'Onsite/Offshore': 'Offshore'}) / total_count * 100 if total_count else 0
 
-    st.markdown(
+    report.markdown(
         f"🔍 **Headcount Breakdown**: **{billable_pct:.1f}% Billable**, **{nonbillable_pct:.1f}% Non-Billable**, "
         f"**{onsite_pct:.1f}% Onsite**, **{offshore_pct:.1f}% Offshore**."
     )
 
     # 🔄 Layout
-    col1, col2 = st.columns([1, 1])
+    col1, col2 = report.columns([1, 1])
 
     with col1:
-        st.markdown("### 📋 MoM FTE per Client")
-        st.dataframe(
+        col1.markdown("### 📋 MoM FTE per Client")
+        col1.dataframe(
             monthly_headcount.rename(columns={"FinalCustomerName": "Client", "FTE": "FTE (Headcount)"}),
             use_container_width=True
         )
 
     with col2:
-        st.markdown("### 📈 MoM FTE Trend (Top 6 Clients)")
-        fig, ax = plt.subplots(figsize=(8, 5))
-
-        for spine in ax.spines.values():
-            spine.set_color('#D3D3D3')
-            spine.set_linewidth(0.6)
-
-        pastel_palette = sns.color_palette("pastel", len(top_clients))
-        x = np.arange(len(chart_data.index))
-        x_labels = chart_data.index
-
-        for idx, client in enumerate(top_clients):
-            y = chart_data[client].values
-            if len(x) >= 4:
-                x_smooth = np.linspace(x.min(), x.max(), 300)
-                spline = make_interp_spline(x, y, k=3)
-                y_smooth = spline(x_smooth)
-                ax.plot(x_smooth, y_smooth, label=client, color=pastel_palette[idx], linewidth=2)
-            else:
-                ax.plot(x, y, label=client, color=pastel_palette[idx], linewidth=2)
-
-        ax.set_title("Monthly FTE (Smoothed Trend)", fontsize=13)
-        ax.set_xlabel("Month")
-        ax.set_ylabel("FTE (Headcount)")
-        ax.set_xticks(x)
-        ax.set_xticklabels(x_labels, rotation=45)
-        ax.legend(loc='upper left', fontsize=8)
-        ax.grid(False)
-        st.pyplot(fig)
+        col2.markdown(f"### 📈 MoM FTE Trend (Top {len(top_clients)} Clients)")
+        col2.chart(charts.ChartSpec(
+            "q7.fte_trend",
+            months=[str(m) for m in chart_data.index],
+            clients=[str(client) for client in top_clients],
+            fte=chart_data.to_numpy().tolist(),
+            points=smooth_points(len(top_clients), len(chart_data))
+        ))
 
     # ➕ Two new stacked bar charts
-    st.markdown("### 📊 Headcount Composition by Month")
-
-    stacked_data = df.groupby(['Month', 'Status'])['PSNo'].nunique().unstack().fillna(0)
-    stacked_data2 = df.groupby(['Month', 'Onsite/Offshore'])['PSNo'].nunique().unstack().fillna(0)
+    report.markdown("### 📊 Headcount Composition by Month")
 
-    fig1, axs = plt.subplots(1, 2, figsize=(14, 5))
+    stacked_data = counter.count(['Month', 'Status']).unstack().fillna(0)
+    stacked_data2 = counter.count(['Month', 'Onsite/Offshore']).unstack().fillna(0)
 
-    for spine in axs[0].spines.values():
-        spine.set_color('#D3D3D3')
-        spine.set_linewidth(0.6)
-    for spine in axs[1].spines.values():
-        spine.set_color('#D3D3D3')
-        spine.set_linewidth(0.6)
+    report.chart(charts.ChartSpec(
+        "q7.headcount_composition",
+        status=stacked_data,
+        location=stacked_data2
+    ))
 
-    # Chart 1 - Billable vs Non-Billable
-    stacked_data.plot(kind='bar', stacked=True, ax=axs[0], color=['#B0E57C', '#FFE0B2'], edgecolor='#D3D3D3')
-    axs[0].set_title("Monthly Billable vs Non-Billable")
-    axs[0].set_xlabel("Month")
-    axs[0].set_ylabel("Headcount")
-    axs[0].legend(loc='upper left', fontsize=8)
-    axs[0].tick_params(axis='x', rotation=45)
-
-    # Chart 2 - Onsite vs Offshore
-    stacked_data2.plot(kind='bar', stacked=True, ax=axs[1], color=['#ADD8E6', '#FFDAB9'], edgecolor='#D3D3D3')
-    axs[1].set_title("Monthly Onsite vs Offshore")
-    axs[1].set_xlabel("Month")
-    axs[1].set_ylabel("Headcount")
-    axs[1].legend(loc='upper left', fontsize=8)
-    axs[1].tick_params(axis='x', rotation=45)
+    return report
 
-    st.pyplot(fig1)
+def run(df, user_question=None):
+    import streamlit as st
+    compute(df, user_question).render(st)
@@ -1,38 +1,35 @@
 import pandas as pd
-from utils.helpers import extract_month, extract_quarter, extract_fy
+from kpi_engine import utilization
 
 def answer_question_q8(ut_df: pd.DataFrame, account_name: str) -> dict:
     """
     Returns the MoM trend of Headcount (HC) for a given account.
 
     Parameters:
-    - ut_df (pd.DataFrame): Unified table with UT data
+    - ut_df (pd.DataFrame): LNTData (or the older unified UT table)
     - account_name (str): Name of the final customer / account
 
     Returns:
     - dict: Contains summary, table (DataFrame), and chart metadata
     """
 
-    # Step 1: Filter for the selected account
-    df = ut_df.copy()
-    df = df[df['Final Customer Name'].str.lower() == account_name.lower()]
-
-    if df.empty:
+    # Step 1: Monthly headcount for the account, sliced from the precomputed UT cell table
+    engine = utilization.engine_for(ut_df)
+    match = engine.lookup(account_name)
+    if match is None or match[0] != "FinalCustomerName":
         return {
             "answer": f"No headcount data found for account '{account_name}'.",
             "table": pd.DataFrame(),
             "chart": None,
         }
+    monthly_hc = engine.trend(where={"FinalCustomerName": match[1]})[["Month", "HC"]]
 
-    # Step 2: Extract month and year
-    df["Month"] = pd.to_datetime(df["Month"]).dt.strftime("%b-%Y")
-
-    # Step 3: Group by Month
-    monthly_hc = df.groupby("Month")["HC"].sum().reset_index().sort_values("Month")
-
-    # Step 4: Calculate MoM difference
+    # Step 2: Calculate MoM difference ('YYYY-MM' months are already in order)
     monthly_hc["MoM_Change"] = monthly_hc["HC"].diff().fillna(0)
 
+    # Step 3: Format months for display
+    monthly_hc["Month"] = pd.PeriodIndex(monthly_hc["Month"], freq="M").strftime("%b-%Y")
+
     # Step 5: Format response
     latest_month = monthly_hc["Month"].iloc[-1]
     latest_hc = monthly_hc["HC"].iloc[-1]
@@ -1,20 +1,27 @@
 import pandas as pd
+from kpi_engine import utilization
 
 def answer_question_q9(pnl_df: pd.DataFrame, ut_df: pd.DataFrame, account_name: str) -> dict:
     """
     Calculates the monthly Revenue per Person for a given account.
 
     Parameters:
-    - pnl_df (pd.DataFrame): P&L table with revenue data
+    - pnl_df (pd.DataFrame): Preprocessed P&L ('Client', 'Month', 'Type', 'Amount')
     - ut_df (pd.DataFrame): UT table with headcount data
     - account_name (str): Final customer / account name to filter
 
     Returns:
     - dict: Contains summary, trend table, and chart metadata
     """
-    # Step 1: Filter both datasets for the given account
-    rev_df = pnl_df[pnl_df["Final Customer Name"].str.lower() == account_name.lower()].copy()
-    hc_df = ut_df[ut_df["Final Customer Name"].str.lower() == account_name.lower()].copy()
+    # Step 1: Filter revenue rows for the given account (names are compared once per distinct value)
+    names = pnl_df["Client"]
+    wanted = [n for n in names.dropna().unique() if str(n).lower() == account_name.lower()]
+    rev_df = pnl_df[names.isin(wanted) & (pnl_df["Type"] == "Revenue")].copy()
+
+    # Headcount comes from the precomputed UT cell table
+    engine = utilization.engine_for(ut_df)
+    match = engine.lookup(account_name)
+    hc_df = engine.trend(where={"FinalCustomerName": match[1]}) if match and match[0] == "FinalCustomerName" else pd.DataFrame()
 
     if rev_df.empty or hc_df.empty:
         return {
@@ -23,20 +30,20 @@ def answer_question_q9(pnl_df: pd.DataFrame, ut_df: pd.DataFrame, account_name:
             "chart": None,
         }
 
-    # Step 2: Standardize month format
-    rev_df["Month"] = pd.to_datetime(rev_df["Month"]).dt.strftime("%b-%Y")
-    hc_df["Month"] = pd.to_datetime(hc_df["Month"]).dt.strftime("%b-%Y")
+    # Step 2: Standardize months as periods (sortable; formatted as '%b-%Y' at the end)
+    rev_df["Month"] = pd.to_datetime(rev_df["Month"]).dt.to_period("M")
+    hc_df["Month"] = pd.PeriodIndex(hc_df["Month"], freq="M")
 
     # Step 3: Aggregate monthly revenue and HC
-    monthly_revenue = rev_df.groupby("Month")["Amount in USD"].sum().reset_index()
-    monthly_revenue.rename(columns={"Amount in USD": "Revenue"}, inplace=True)
+    monthly_revenue = rev_df.groupby("Month")["Amount"].sum().reset_index()
+    monthly_revenue.rename(columns={"Amount": "Revenue"}, inplace=True)
 
-    monthly_hc = hc_df.groupby("Month")["HC"].sum().reset_index()
-    monthly_hc.rename(columns={"HC": "Headcount"}, inplace=True)
+    monthly_hc = hc_df[["Month", "HC"]].rename(columns={"HC": "Headcount"})
 
     # Step 4: Merge revenue and HC
-    merged = pd.merge(monthly_revenue, monthly_hc, on="Month", how="inner")
+    merged = pd.merge(monthly_revenue, monthly_hc, on="Month", how="inner").sort_values("Month")
     merged["Revenue per Person"] = (merged["Revenue"] / merged["Headcount"]).round(2)
+    merged["Month"] = merged["Month"].dt.strftime("%b-%Y")
 
     # Step 5: Format output
     latest_month = merged["Month"].iloc[-1]
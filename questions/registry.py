@@ -0,0 +1,191 @@
+# questions/registry.py
+# Startup-time registry of question modules.
+#
+# Every questions/question_q*.py module is imported once. For each one the
+# registry records the entry point, its arity and how each parameter is
+# bound: to a dataset ("pnl", "ut"), to the extracted QuestionParams, or to a
+# single slot such as the account name. Dispatch is then a dict lookup plus
+# a precomputed argument list, the same call path for every question.
+
+import importlib
+import inspect
+import pkgutil
+import re
+import threading
+
+from data_loader.registry import dataset_version
+from utils import slots, tracing
+
+_MODULE_PATTERN = re.compile(r"^question_(q\d+)$")
+
+# qid -> exception for modules discover() could not load
+failures = {}
+
+# Parameter name -> dataset it receives
+DATASET_PARAMS = {
+    "df": "pnl",
+    "pnl_df": "pnl",
+    "ut_df": "ut",
+}
+
+# Parameter name -> how to pull it out of QuestionParams
+SLOT_PARAMS = {
+    "user_question": lambda p: p,
+    "account_name": lambda p: p.client,
+    "entity_name": lambda p: p.delivery_unit or p.business_unit or p.client,
+}
+
+
+class QuestionSpec:
+    """How to call one question module."""
+
+    def __init__(self, qid, module, entry, bindings):
+        self.qid = qid
+        self.module = module
+        self.entry = entry
+        self.bindings = bindings  # list of (param name, kind, key)
+
+    @property
+    def arity(self):
+        return len(self.bindings)
+
+    @property
+    def datasets(self):
+        return tuple(key for _, kind, key in self.bindings if kind == "dataset")
+
+    @property
+    def slots(self):
+        return tuple(name for name, kind, _ in self.bindings if kind == "slot")
+
+    def __repr__(self):
+        return f"QuestionSpec({self.qid}, {self.module.__name__}.{self.entry.__name__}, datasets={self.datasets})"
+
+
+def _entry_point(module, qid):
+    """
+    compute() if present (returns a Report), else run(), else
+    answer_question_qN(), else the module's only public function.
+    """
+    for name in ("compute", "run", f"answer_question_{qid.lower()}"):
+        func = getattr(module, name, None)
+        if callable(func):
+            return func
+    own = [
+        obj for name, obj in vars(module).items()
+        if inspect.isfunction(obj) and obj.__module__ == module.__name__ and not name.startswith("_")
+    ]
+    if len(own) == 1:
+        return own[0]
+    raise LookupError(f"{module.__name__} has no unambiguous entry point")
+
+
+def _bindings(module, entry):
+    declared = list(getattr(module, "DATASETS", ()))
+    bindings = []
+    for name, param in inspect.signature(entry).parameters.items():
+        if name in DATASET_PARAMS:
+            # A module can declare which dataset its generic `df` argument is
+            key = declared.pop(0) if declared else DATASET_PARAMS[name]
+            bindings.append((name, "dataset", key))
+        elif name in SLOT_PARAMS:
+            bindings.append((name, "slot", SLOT_PARAMS[name]))
+        elif param.default is inspect.Parameter.empty:
+            raise TypeError(f"{module.__name__}.{entry.__name__}: cannot bind parameter '{name}'")
+    return bindings
+
+
+def discover(package="questions"):
+    """
+    Imports every question module in `package` and builds its spec.
+
+    Modules that fail to import or bind are left out and recorded in
+    `failures`.
+
+    Returns:
+        dict: qid (e.g. "Q7") -> QuestionSpec.
+    """
+    pkg = importlib.import_module(package)
+    specs = {}
+    for info in pkgutil.iter_modules(pkg.__path__):
+        match = _MODULE_PATTERN.match(info.name)
+        if not match:
+            continue
+        qid = match.group(1).upper()
+        try:
+            module = importlib.import_module(f"{package}.{info.name}")
+            entry = _entry_point(module, qid)
+            specs[qid] = QuestionSpec(qid, module, entry, _bindings(module, entry))
+        except Exception as e:
+            # One broken module must not take the whole app down
+            failures[qid] = e
+    return dict(sorted(specs.items(), key=lambda kv: int(kv[0][1:])))
+
+
+class MissingSlotError(ValueError):
+    """Raised when a question needs a slot (e.g. an account name) the user did not give."""
+
+
+def dispatch(spec, params, datasets, cache=None):
+    """
+    Calls a question through its precomputed bindings.
+
+    Args:
+        spec (QuestionSpec): The question.
+        params (QuestionParams | str): Extracted parameters or raw question text.
+        datasets (dict): Dataset name -> DataFrame, or a zero-argument
+            callable returning one (loaded only if the question needs it).
+        cache (ResultCache): Optional answer cache, keyed by the question id,
+            the slots it reads and the content version of every dataset.
+
+    Returns:
+        Whatever the entry point returns.
+    """
+    if not isinstance(params, slots.QuestionParams):
+        params = slots.extract(params)
+    with tracing.span("compute", qid=spec.qid):
+        return _call(spec, params, datasets, cache)
+
+
+def _call(spec, params, datasets, cache):
+    args, key = [], [spec.qid]
+    for name, kind, binding in spec.bindings:
+        if kind == "dataset":
+            data = datasets[binding]
+            data = data() if callable(data) else data
+            args.append(data)
+            key.append(dataset_version(data))
+        else:
+            value = binding(params)
+            if value is None:
+                raise MissingSlotError(f"{spec.qid} needs a value for '{name.replace('_', ' ')}'")
+            args.append(value)
+            key.append(value.cache_key() if isinstance(value, slots.QuestionParams) else value)
+
+    if cache is None:
+        return spec.entry(*args)
+    key = tuple(key)
+    result = cache.get(key)
+    tracing.annotate(cached=result is not None)
+    if result is None:
+        result = spec.entry(*args)
+        if result is not None:
+            cache.put(key, result)
+    return result
+
+
+_specs = None
+_specs_lock = threading.Lock()
+
+
+def specs():
+    """Specs for all question modules, discovered on first call."""
+    global _specs
+    if _specs is None:
+        with _specs_lock:
+            if _specs is None:
+                _specs = discover()
+    return _specs
+
+
+def get(qid):
+    return specs()[qid.upper()]
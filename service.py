@@ -0,0 +1,254 @@
+# service.py
+# Headless question answering: the app's pipeline without Streamlit.
+#
+#   answer(question)  route the question, run its module against the shared
+#                     datasets and return a JSON-ready dict (summary, tables,
+#                     chart specs)
+#
+#   python service.py --port 8080
+#       POST /answer        {"question": "..."}
+#       GET  /answer?q=...
+#       GET  /chart/<key>   PNG of a chart returned by an earlier answer
+#       GET  /health
+#
+# Answers share the routing query cache, the result cache and the loaded
+# datasets with everything else in the process. Charts come back as specs;
+# their PNGs are rendered only when /chart is asked for them.
+
+import argparse
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from data_loader.datasets import LOADERS
+from data_loader.registry import enable_copy_on_write
+from questions import registry as question_registry
+from utils import charts, slots, tracing
+from utils.report import Report, json_value, specs_only, table_json
+from utils.result_cache import result_cache
+from utils.semantic_matcher import route_query
+
+# Specs of recently answered charts, so /chart/<key> can render them on request
+CHART_SPECS_KEPT = 1024
+_chart_specs = OrderedDict()
+_chart_lock = threading.Lock()
+
+# Serialized form of each cached Report, built once per Report
+_payloads = weakref.WeakKeyDictionary()
+
+
+class AnswerError(Exception):
+    """A question that cannot be answered; `status` is the HTTP status to report."""
+
+    def __init__(self, message, status=422):
+        super().__init__(message)
+        self.status = status
+
+
+def _remember_charts(result):
+    with _chart_lock:
+        for spec in result.specs:
+            _chart_specs[spec.key] = spec
+            _chart_specs.move_to_end(spec.key)
+        while len(_chart_specs) > CHART_SPECS_KEPT:
+            _chart_specs.popitem(last=False)
+
+
+def to_payload(result):
+    """
+    JSON-ready form of anything a question module returns.
+
+    Reports serialize themselves; the dicts, frames and strings of older
+    modules are mapped onto the same summary/tables/charts layout.
+    """
+    if isinstance(result, Report):
+        payload = _payloads.get(result)
+        if payload is None:
+            payload = _payloads[result] = result.to_dict()
+        return payload
+    payload = {"summary": [], "notices": [], "tables": [], "charts": [], "images": [], "downloads": []}
+    if result is None:
+        return payload
+    if isinstance(result, pd.DataFrame):
+        payload["tables"].append(table_json(result))
+    elif isinstance(result, str):
+        payload["summary"].append(result)
+    elif isinstance(result, dict):
+        for key, value in result.items():
+            if key in ("summary", "answer"):
+                payload["summary"].append(str(value))
+            elif key == "chart":
+                if value and value.get("x") is not None:
+                    payload["charts"].append({"kind": "line", "key": None, "data": json_value(value)})
+            elif isinstance(value, pd.DataFrame):
+                payload["tables"].append({"name": key, **table_json(value)})
+            elif isinstance(value, list):
+                payload["tables"].append({"name": key, **table_json(pd.DataFrame(value))})
+            else:
+                payload.setdefault("values", {})[key] = json_value(value)
+    else:
+        payload["summary"].append(str(result))
+    return payload
+
+
+def validate(question):
+    """The question, stripped; raises AnswerError when there is none."""
+    question = str(question or "").strip()
+    if not question:
+        raise AnswerError("Empty question", status=400)
+    return question
+
+
+def run(question, route, cache=result_cache):
+    """
+    Runs the module a question was routed to, with charts recorded as specs.
+
+    Args:
+        question (str): The user's question.
+        route (RouteResult): Its route, from semantic_matcher.
+        cache (ResultCache): Answer cache; None disables it.
+
+    Returns:
+        The module's result (a Report, or what an older module returns).
+
+    Raises:
+        AnswerError: The route has no loadable module or a slot is missing.
+    """
+    spec = question_registry.specs().get(route.qid)
+    if spec is None:
+        reason = question_registry.failures.get(route.qid, "not found")
+        raise AnswerError(f"Could not load analysis script for {route.qid}: {reason}", status=500)
+
+    with tracing.span("data"):
+        frames = {name: LOADERS[name]() for name in spec.datasets}
+    params = slots.extract(question, list(frames.values()))
+    try:
+        with specs_only():
+            return question_registry.dispatch(spec, params, frames, cache=cache)
+    except question_registry.MissingSlotError as e:
+        raise AnswerError(f"{e}. Please include it in your question.") from e
+
+
+def respond(question, route, result):
+    """The JSON-ready answer for a result; its charts become available to /chart."""
+    if isinstance(result, Report):
+        _remember_charts(result)
+    with tracing.span("format"):
+        payload = to_payload(result)
+    return {
+        "question": question,
+        "qid": route.qid,
+        "matched": route.question,
+        "tier": route.tier,
+        "confidence": round(float(route.confidence), 4),
+        **payload,
+    }
+
+
+def answer(question, cache=result_cache):
+    """
+    Answers one question without Streamlit: route, run, respond.
+
+    Args:
+        question (str): The user's question.
+        cache (ResultCache): Answer cache shared with the app; None disables it.
+
+    Returns:
+        dict: "question", "qid", "matched" (the prompt-bank question it was
+            routed to), "tier", "confidence", plus the result's summary,
+            notices, tables and chart specs (see Report.to_dict).
+
+    Raises:
+        AnswerError: The question is empty, maps to no loadable module or
+            misses a slot.
+    """
+    question = validate(question)
+    with tracing.trace(question, source="service"):
+        route = route_query(question)
+        tracing.annotate(qid=route.qid, tier=route.tier)
+        return respond(question, route, run(question, route, cache))
+
+
+def chart_png(key):
+    """PNG bytes for a chart key from an earlier answer, or None if it is not known."""
+    with _chart_lock:
+        spec = _chart_specs.get(key)
+    return None if spec is None else charts.render_png(spec)
+
+
+class AnswerHandler(BaseHTTPRequestHandler):
+    """JSON over HTTP for answer(); one thread per connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _answer(self, question):
+        try:
+            self._send(200, answer(question))
+        except AnswerError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            self._send(500, {"error": f"Error running analysis: {e}"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            self._send(200, {"status": "ok", "questions": list(question_registry.specs())})
+        elif url.path == "/answer":
+            self._answer(parse_qs(url.query).get("q", [""])[0])
+        elif url.path.startswith("/chart/"):
+            png = chart_png(url.path[len("/chart/"):])
+            if png is None:
+                self._send(404, {"error": "Unknown chart"})
+            else:
+                self._send(200, png, content_type="image/png")
+        else:
+            self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/answer":
+            self._send(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "Body must be JSON"})
+            return
+        self._answer(body.get("question") if isinstance(body, dict) else None)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8080):
+    """Runs the HTTP API until interrupted; datasets load on the first question that needs them."""
+    # Request threads share the loaded frames through copy-on-write views
+    enable_copy_on_write()
+    server = ThreadingHTTPServer((host, port), AnswerHandler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless question-answering API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    serve(args.host, args.port)
@@ -0,0 +1,124 @@
+# tests/test_charts.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from utils import charts
+from utils.report import Report
+
+CALLS = []
+
+
+@charts.renderer("test.line")
+def _line_chart(values, title):
+    CALLS.append(title)
+    fig = Figure(figsize=(2, 2))
+    ax = fig.subplots()
+    ax.plot(values)
+    ax.set_title(title)
+    return fig
+
+
+class _Target:
+    """Records what a Report writes, in order."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def markdown(self, text, **kwargs):
+        self.log.append(("markdown", text))
+
+    def image(self, png, **kwargs):
+        self.log.append(("image", png[:4]))
+
+    def empty(self):
+        return self
+
+    def columns(self, spec):
+        return [_Target(self.log) for _ in range(spec)]
+
+
+class TestChartSpec(unittest.TestCase):
+
+    def test_key_is_stable_across_equal_data(self):
+        a = charts.ChartSpec("test.line", values=[1.0, 2.0], title="t")
+        b = charts.ChartSpec("test.line", title="t", values=pd.Series([1.0, 2.0]).to_numpy())
+        c = charts.ChartSpec("test.line", values=[1.0, 3.0], title="t")
+        self.assertEqual(a.key, b.key)
+        self.assertNotEqual(a.key, c.key)
+
+    def test_frames_hash_by_content(self):
+        df = pd.DataFrame({"A": [1, 2]}, index=["x", "y"])
+        a = charts.ChartSpec("test.line", values=df, title="t")
+        b = charts.ChartSpec("test.line", values=df.copy(), title="t")
+        self.assertEqual(a.key, b.key)
+
+
+class TestChartCache(unittest.TestCase):
+
+    def setUp(self):
+        CALLS.clear()
+        self.cache = charts.ChartCache(max_items=2, workers=2)
+
+    def test_renders_once_per_spec(self):
+        spec = charts.ChartSpec("test.line", values=[1, 2, 3], title="once")
+        first = self.cache.get(spec)
+        second = self.cache.submit(charts.ChartSpec("test.line", values=[1, 2, 3], title="once"))
+        self.assertTrue(second.done())
+        self.assertEqual(second.result(), first)
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertEqual(CALLS, ["once"])
+
+    def test_evicts_oldest(self):
+        for title in ("a", "b", "c"):
+            self.cache.get(charts.ChartSpec("test.line", values=[1], title=title))
+        self.assertEqual(len(self.cache), 2)
+        self.cache.get(charts.ChartSpec("test.line", values=[1], title="a"))
+        self.assertEqual(CALLS, ["a", "b", "c", "a"])
+
+    def test_svg_output(self):
+        svg = self.cache.get(charts.ChartSpec("test.line", fmt="svg", values=[1, 2], title="svg"))
+        self.assertIn(b"<svg", svg)
+
+
+class TestReportCharts(unittest.TestCase):
+
+    def test_text_is_written_before_pending_charts(self):
+        report = Report()
+        report.chart(charts.ChartSpec("test.line", values=[3, 1, 2], title="report"))
+        left, right = report.columns(2)
+        right.markdown("table")
+        log = []
+        report.render(_Target(log))
+        self.assertIn(("markdown", "table"), log)
+        self.assertEqual(log.count(("image", b"\x89PNG")), 1)
+        self.assertEqual(len(report.images), 1)
+
+
+class TestSmoothColumns(unittest.TestCase):
+
+    def test_matches_per_series_splines(self):
+        from scipy.interpolate import make_interp_spline
+
+        values = np.random.default_rng(0).uniform(0, 50, size=(9, 20))
+        grid, smoothed = charts.smooth_columns(values, points=120)
+        expected = np.column_stack([make_interp_spline(np.arange(9), values[:, j], k=3)(grid) for j in range(20)])
+        self.assertEqual(smoothed.shape, (120, 20))
+        np.testing.assert_allclose(smoothed, expected, atol=1e-9)
+
+    def test_short_series_are_left_unsmoothed(self):
+        grid, smoothed = charts.smooth_columns([[1, 2], [3, 4], [5, 6]])
+        np.testing.assert_array_equal(grid, [0, 1, 2])
+        np.testing.assert_array_equal(smoothed, [[1, 2], [3, 4], [5, 6]])
+
+
+if __name__ == "__main__":
+    unittest.main()
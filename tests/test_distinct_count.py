@@ -0,0 +1,74 @@
+# tests/test_distinct_count.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from kpi_engine.distinct_count import DistinctCounter, counter_for, hll_estimate, hll_registers
+
+
+class TestDistinctCounter(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 3000
+        self.df = pd.DataFrame({
+            'PSNo': rng.integers(0, 400, n),
+            'FinalCustomerName': rng.choice(['Acme', 'Globex', 'Initech', None], n),
+            'Month': rng.choice(['2024-11', '2024-12', '2025-01', '2025-02'], n),
+            'Status': rng.choice(['Billable', 'Non Billable'], n),
+            'Onsite/Offshore': rng.choice(['Onsite', 'Offshore', None], n)
+        })
+        self.counter = DistinctCounter.from_frame(self.df)
+
+    def test_matches_groupby_nunique(self):
+        for by in (['FinalCustomerName', 'Month'], ['Month', 'Status'], ['Month', 'Onsite/Offshore']):
+            expected = self.df.groupby(by)['PSNo'].nunique()
+            pd.testing.assert_series_equal(self.counter.count(by), expected, check_dtype=False)
+
+    def test_totals_and_filters(self):
+        self.assertEqual(self.counter.count(), self.df['PSNo'].nunique())
+        billable = self.df[self.df['Status'] == 'Billable']['PSNo'].nunique()
+        self.assertEqual(self.counter.count(where={'Status': 'Billable'}), billable)
+        both = self.df[self.df['FinalCustomerName'].isin(['Acme', 'Globex'])]['PSNo'].nunique()
+        self.assertEqual(self.counter.count(where={'FinalCustomerName': ['Acme', 'Globex']}), both)
+
+    def test_quarter_rollup_merges_months(self):
+        quarter = pd.PeriodIndex(self.df['Month'], freq='M').asfreq('Q')
+        expected = self.df.groupby(['FinalCustomerName', quarter])['PSNo'].nunique()
+        result = self.counter.count(['FinalCustomerName', 'Month'], freq='Q')
+        np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+        self.assertEqual(list(result.index.levels[1].astype(str)), ['2024Q4', '2025Q1'])
+
+    def test_missing_key_rows_are_ignored(self):
+        df = self.df.astype({'PSNo': 'float'})
+        df.loc[:10, 'PSNo'] = np.nan
+        self.assertEqual(DistinctCounter.from_frame(df).count(), df['PSNo'].nunique())
+
+    def test_counter_is_built_once_per_frame(self):
+        self.assertIs(counter_for(self.df), counter_for(self.df))
+
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_sketch_counts_are_close(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame({
+            'PSNo': rng.integers(0, 50000, 200000),
+            'FinalCustomerName': rng.choice(['A', 'B', 'C', 'D'], 200000),
+            'Month': rng.choice(['2025-01', '2025-02'], 200000)
+        })
+        sketch = DistinctCounter.from_frame(df, sketch=True)
+        self.assertFalse(sketch.exact)
+        exact = df.groupby('FinalCustomerName')['PSNo'].nunique()
+        estimate = sketch.count(['FinalCustomerName'])
+        self.assertLess(((estimate - exact).abs() / exact).max(), 0.1)
+        self.assertLess(abs(sketch.count() - df['PSNo'].nunique()) / df['PSNo'].nunique(), 0.1)
+
+    def test_small_cardinality_uses_linear_counting(self):
+        registers = hll_registers(np.arange(20), np.zeros(20, dtype=np.int64), 1)
+        self.assertAlmostEqual(hll_estimate(registers)[0], 20, delta=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# tests/test_embedding_store.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from utils.embedding_store import load_embeddings
+
+
+class TestEmbeddingStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = tempfile.mkdtemp()
+        self.encoded = []
+
+        def encode(texts):
+            self.encoded.extend(texts)
+            return np.array([[len(t), t.count("a"), 1.0] for t in texts], dtype="float32")
+
+        self.encode = encode
+
+    def tearDown(self):
+        shutil.rmtree(self.store)
+
+    def test_second_load_is_memory_mapped(self):
+        first = load_embeddings("m", ["alpha", "beta"], self.encode, store_dir=self.store)
+        second = load_embeddings("m", ["alpha", "beta"], self.encode, store_dir=self.store)
+        self.assertEqual(self.encoded, ["alpha", "beta"])
+        self.assertIsInstance(second, np.memmap)
+        np.testing.assert_array_equal(first, second)
+
+    def test_only_changed_texts_are_encoded(self):
+        load_embeddings("m", ["alpha", "beta"], self.encode, store_dir=self.store)
+        self.encoded.clear()
+        result = load_embeddings("m", ["beta", "gamma", "alpha"], self.encode, store_dir=self.store)
+        self.assertEqual(self.encoded, ["gamma"])
+        np.testing.assert_array_equal(result[:, 0], [4, 5, 5])
+        npy_files = [f for f in os.listdir(self.store) if f.endswith(".npy")]
+        self.assertEqual(len(npy_files), 1)
+
+    def test_models_are_stored_separately(self):
+        load_embeddings("m1", ["alpha"], self.encode, store_dir=self.store)
+        load_embeddings("m2", ["alpha"], self.encode, store_dir=self.store)
+        self.assertEqual(self.encoded, ["alpha", "alpha"])
+
+
+if __name__ == '__main__':
+    unittest.main()
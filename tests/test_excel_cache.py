@@ -0,0 +1,90 @@
+# tests/test_excel_cache.py
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+from data_loader import excel_cache
+
+
+@unittest.skipUnless(excel_cache.PARQUET_AVAILABLE, "pyarrow is not installed")
+class TestExcelCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, "cache")
+        self.workbook = os.path.join(self.tmpdir, "pnl.xlsx")
+        self.df = pd.DataFrame({
+            'Month': pd.to_datetime(['2024-01-01', '2024-02-01']),
+            'Company Code': ['Client A', 'Client B'],
+            'Amount in USD': [1000.0, 2000.0]
+        })
+        self.df.to_excel(self.workbook, sheet_name="LnTPnL", index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read(self):
+        return excel_cache.read_excel_cached(self.workbook, sheet_name="LnTPnL", cache_dir=self.cache_dir)
+
+    def test_second_read_skips_excel(self):
+        first = self.read()
+        with mock.patch.object(excel_cache.pd, "read_excel") as read_excel:
+            second = self.read()
+            read_excel.assert_not_called()
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+    def test_touch_without_change_reuses_cache(self):
+        self.read()
+        stat = os.stat(self.workbook)
+        os.utime(self.workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        with mock.patch.object(excel_cache.pd, "read_excel") as read_excel:
+            self.read()
+            read_excel.assert_not_called()
+
+    def test_changed_workbook_is_reparsed(self):
+        self.read()
+        changed = self.df.assign(**{'Amount in USD': [5.0, 6.0]})
+        changed.to_excel(self.workbook, sheet_name="LnTPnL", index=False)
+        result = self.read()
+        self.assertEqual(result['Amount in USD'].tolist(), [5.0, 6.0])
+        parquet_files = [f for f in os.listdir(self.cache_dir) if f.endswith(".parquet")]
+        self.assertEqual(len(parquet_files), 1)
+
+    def test_unwritable_sheet_is_not_retried(self):
+        pd.DataFrame({'Mixed': [1, 'two', 3.5]}).to_excel(self.workbook, sheet_name="LnTPnL", index=False)
+        first = self.read()
+        meta = [f for f in os.listdir(self.cache_dir) if f.endswith(".json")]
+        self.assertIn("unsupported", excel_cache._read_meta(os.path.join(self.cache_dir, meta[0])))
+        with mock.patch.object(excel_cache, "file_content_hash") as content_hash, \
+                mock.patch.object(pd.DataFrame, "to_parquet") as to_parquet:
+            second = self.read()
+            content_hash.assert_not_called()
+            to_parquet.assert_not_called()
+        self.assertEqual(second['Mixed'].tolist(), first['Mixed'].tolist())
+        # A changed workbook is tried again
+        self.df.to_excel(self.workbook, sheet_name="LnTPnL", index=False)
+        self.read()
+        self.assertEqual(len([f for f in os.listdir(self.cache_dir) if f.endswith(".parquet")]), 1)
+
+    def test_index_col_survives_the_cache(self):
+        read = lambda: excel_cache.read_excel_cached(
+            self.workbook, sheet_name="LnTPnL", cache_dir=self.cache_dir, index_col="Company Code"
+        )
+        first, second = read(), read()
+        self.assertEqual(second.index.tolist(), ['Client A', 'Client B'])
+        pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+    def test_read_options_are_cached_separately(self):
+        self.read()
+        skipped = excel_cache.read_excel_cached(
+            self.workbook, sheet_name="LnTPnL", cache_dir=self.cache_dir, skiprows=[1]
+        )
+        self.assertEqual(skipped['Company Code'].tolist(), ['Client B'])
+        self.assertEqual(len(self.read()), 2)
+
+if __name__ == '__main__':
+    unittest.main()
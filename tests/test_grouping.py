@@ -0,0 +1,34 @@
+# tests/test_grouping.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from kpi_engine.grouping import encode, group_starts, sorted_unique
+
+
+class TestGrouping(unittest.TestCase):
+
+    def test_encode(self):
+        codes, cats = encode(pd.Series(["b", "a", None, "b"]))
+        self.assertEqual(list(codes), [1, 0, -1, 1])
+        self.assertEqual(list(cats), ["a", "b"])
+        codes, cats = encode(pd.Series(["x", "y"], dtype=pd.CategoricalDtype(["y", "x"])))
+        self.assertEqual(list(codes), [1, 0])
+        self.assertEqual(list(cats), ["y", "x"])
+
+    def test_group_starts(self):
+        keys = np.array([3, 1, 3, 2, 1], dtype=np.int64)
+        order, starts, group_keys = group_starts(keys)
+        self.assertEqual(list(group_keys), [1, 2, 3])
+        self.assertEqual(list(np.add.reduceat(np.ones(5)[order], starts)), [2, 1, 2])
+        order, starts, group_keys = group_starts(np.empty(0, dtype=np.int64))
+        self.assertEqual((len(order), len(starts), len(group_keys)), (0, 0, 0))
+
+    def test_sorted_unique(self):
+        self.assertEqual(list(sorted_unique(np.array([5, 1, 5, 3, 1]))), [1, 3, 5])
+        self.assertEqual(len(sorted_unique(np.empty(0, dtype=np.int64))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
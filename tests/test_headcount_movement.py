@@ -0,0 +1,65 @@
+# tests/test_headcount_movement.py
+
+import unittest
+
+import pandas as pd
+from kpi_engine.headcount_movement import HeadcountMovement, movement_for
+from questions import question_q11
+
+
+class TestHeadcountMovement(unittest.TestCase):
+
+    def setUp(self):
+        rows = [
+            # PSNo, client, month
+            (1, 'Acme', '2025-01'), (1, 'Acme', '2025-02'), (1, 'Acme', '2025-03'),
+            (2, 'Acme', '2025-01'), (2, 'Globex', '2025-02'),          # transfer Acme -> Globex
+            (3, 'Globex', '2025-01'),                                   # exits after January
+            (4, 'Acme', '2025-02'), (4, 'Acme', '2025-02'),             # new in February (duplicate row)
+            (5, 'Globex', '2025-01'), (5, 'Globex', '2025-03'),         # gap: leaves, then rejoins
+            (6, 'Acme', '2025-03'),
+        ]
+        self.df = pd.DataFrame(rows, columns=['PSNo', 'FinalCustomerName', 'Month'])
+        self.movement = HeadcountMovement.from_frame(self.df)
+
+    def events(self, month, client=None):
+        detail = self.movement.month(month, client)
+        return sorted(zip(detail['PSNo'], detail['Client'], detail['Type'], detail['Other Client'].fillna('')))
+
+    def test_joiners_leavers_and_transfers(self):
+        self.assertEqual(self.events('2025-02'), [
+            (2, 'Acme', 'Transfer out', 'Globex'),
+            (2, 'Globex', 'Transfer in', 'Acme'),
+            (3, 'Globex', 'Left the book', ''),
+            (4, 'Acme', 'New to the book', ''),
+            (5, 'Globex', 'Left the book', ''),
+        ])
+        self.assertEqual(self.events('2025-03', 'Globex'), [
+            (2, 'Globex', 'Left the book', ''),
+            (5, 'Globex', 'New to the book', ''),
+        ])
+
+    def test_summary_balances(self):
+        summary = self.movement.summary()
+        self.assertEqual(list(summary['Month'].unique()), ['2025-02', '2025-03'])
+        balance = summary['Opening'] + summary['New Hires'] + summary['Transfers In'] - summary['Exits'] - summary['Transfers Out']
+        self.assertTrue((balance == summary['Closing']).all())
+        acme = self.movement.summary('Acme').set_index('Month')
+        self.assertEqual(acme.loc['2025-02', 'Opening'], 2)
+        self.assertEqual(acme.loc['2025-02', 'Closing'], 2)
+        self.assertEqual(acme.loc['2025-03', 'Closing'], 2)
+
+    def test_month_results_are_cached(self):
+        self.assertIs(self.movement.month('2025-02'), self.movement.month(pd.Timestamp('2025-02-01')))
+        self.assertIs(movement_for(self.df), movement_for(self.df))
+        with self.assertRaises(KeyError):
+            self.movement.month('2024-12')
+
+    def test_question_q11(self):
+        report = question_q11.compute(self.df, "Who left Globex in February 2025?")
+        self.assertIn("**1** people joined **Globex**", report.blocks[0][1])
+        self.assertIn("**2** left", report.blocks[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# tests/test_lexical_router.py
+
+import unittest
+
+from utils.lexical_router import LexicalRouter
+
+PROMPT_BANK = {
+    "Q1": ["Which accounts had CM% < 30 in the last quarter?", "Clients with less than 30% margin last quarter"],
+    "Q3": ["Compare C&B cost by segment over two quarters", "Segment wise change in C&B cost"],
+    "Q4": ["What is the MoM trend of C&B cost?", "C&B vs revenue monthly trend"],
+    "Q7": ["Show monthly headcount trend per client", "FTE trend over months"]
+}
+
+
+class TestLexicalRouter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.router = LexicalRouter(PROMPT_BANK)
+
+    def test_keyword_tier(self):
+        result = self.router.route("What is FTE trend over months?")
+        self.assertEqual((result.qid, result.tier), ("Q7", "keyword"))
+        self.assertEqual(result.question, "FTE trend over months")
+
+    def test_cb_is_disambiguated_by_context(self):
+        self.assertEqual(self.router.route("How much C&B varied from last quarter to this quarter?").qid, "Q3")
+        self.assertEqual(self.router.route("M-o-M trend of C&B cost % w.r.t revenue").qid, "Q4")
+        self.assertIsNone(self.router.route("show me C&B"))
+
+    def test_tfidf_tier(self):
+        router = LexicalRouter(PROMPT_BANK, rules=[])
+        result = router.route("clients with less than 30% margin last quarter")
+        self.assertEqual((result.qid, result.tier), ("Q1", "tfidf"))
+        self.assertAlmostEqual(result.confidence, 1.0)
+
+    def test_extended_router_sees_new_paraphrases(self):
+        query = "staffing pyramid shape per account"
+        self.assertIsNone(self.router.route(query))
+        router = self.router.extended("Q7", ["Staffing pyramid shape per account"])
+        self.assertEqual(router.route(query).qid, "Q7")
+        self.assertEqual(router.route("What is FTE trend over months?").tier, "keyword")
+        self.assertEqual(len(self.router.questions), 8)
+
+    def test_movement_words_need_people_context(self):
+        router = LexicalRouter({**PROMPT_BANK, "Q11": ["Who joined or left the account this month?"]})
+        self.assertEqual(router.route("How many people left the account in March 2025?").qid, "Q11")
+        self.assertEqual(router.route("Which employees transferred between accounts?").qid, "Q11")
+        self.assertEqual(router.route("Show leavers for Acme").qid, "Q11")
+        self.assertEqual(router.route("Who joined or left the account this month?").qid, "Q11")
+        for query in ("how much budget is left for Q3", "transfers out of the cost centre",
+                      "how much revenue is left for accounts this quarter",
+                      "which accounts transferred revenue to other segments",
+                      "who left margin below 30% last quarter"):
+            result = router.route(query)
+            self.assertTrue(result is None or result.qid != "Q11", query)
+
+    def test_unrelated_query_falls_through(self):
+        self.assertIsNone(self.router.route("what is the weather in Mysore"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -52,5 +52,78 @@ class TestMarginKPI(unittest.TestCase):
         self.assertEqual(len(summary), 4)
         self.assertTrue(summary[0].startswith("Total margin"))
 
+
+class TestCompactPnl(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = pd.DataFrame({
+            'Month': ['2024-01-01', '2024-01-01', '2024-02-01', '2024-02-01', '2024-02-01'],
+            'Company Code': ['Client A', 'Client A', 'Client A', 'Client B', 'Client B'],
+            'Type': ['Revenue', 'Cost', 'Revenue', 'Cost', 'Other'],
+            'Segment': ['Medical', 'Medical', 'Medical', 'Transportation', 'Transportation'],
+            'Group3': ['Billing', 'C&B Onsite', 'Billing', 'C&B Offshore', 'Other'],
+            'Amount in USD': [1000.0, 600.0, 1200.0, 500.0, 10.0]
+        })
+
+    def test_compact_dtypes(self):
+        df = margin.preprocess_pnl_data(self.raw.copy(), compact=True, amount_dtype="float32")
+        for col in ['Client', 'Type', 'Segment', 'Group3']:
+            self.assertIsInstance(df[col].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['Amount'].dtype, 'float32')
+        self.assertEqual(df['MonthCode'].tolist(), [2024 * 12, 2024 * 12, 2024 * 12 + 1, 2024 * 12 + 1])
+
+    def test_compact_matches_plain_groupby(self):
+        plain = margin.preprocess_pnl_data(self.raw.copy())
+        compact = margin.preprocess_pnl_data(self.raw.copy(), compact=True)
+        expected = plain.groupby(['Client', 'Type'])['Amount'].sum()
+        result = compact.groupby(['Client', 'Type'], observed=True)['Amount'].sum()
+        self.assertEqual(expected.to_dict(), result.to_dict())
+
+    def test_memory_footprint(self):
+        df = margin.preprocess_pnl_data(self.raw.copy(), compact=True)
+        report = margin.memory_footprint(df)
+        self.assertEqual(report['Column'].iloc[-1], 'Total')
+        self.assertEqual(report['Bytes'].iloc[-1], report['Bytes'].iloc[:-1].sum())
+
+
+class TestMarginCbMovers(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Month': pd.to_datetime(['2024-01-01'] * 4 + ['2024-02-01'] * 4),
+            'Segment': ['Medical', 'Medical', 'Medical', 'Transportation'] * 2,
+            'Client': ['A', 'A', 'B', 'C'] * 2,
+            'Type': ['Revenue', 'Cost', 'Cost', 'Cost'] * 2,
+            'Group3': ['Billing', 'C&B Onsite', 'Rent', 'C&B Offshore'] * 2,
+            'Amount': [1000.0, 400.0, 100.0, 300.0,
+                       1000.0, 600.0, 100.0, 200.0]
+        })
+
+    def test_segment_grain(self):
+        result = margin.margin_cb_movers(self.df).set_index('Segment')
+        self.assertAlmostEqual(result.loc['Medical', 'Margin % Prev'], 100.0)
+        self.assertAlmostEqual(result.loc['Medical', 'Margin % Latest'], (1000 - 700) / 700 * 100)
+        self.assertTrue(result.loc['Medical', 'Flagged'])
+        self.assertFalse(result.loc['Transportation', 'Flagged'])
+
+    def test_client_grain_and_zero_cost(self):
+        result = margin.margin_cb_movers(self.df, grain='Client').set_index('Client')
+        self.assertEqual(list(result.index), ['A', 'B', 'C'])
+        self.assertEqual(result.loc['C', 'C&B Latest'], 200.0)
+        self.assertTrue(result.loc['A', 'Flagged'])
+
+    def test_missing_previous_month(self):
+        latest_only = self.df[self.df['Month'] == '2024-02-01']
+        result = margin.margin_cb_movers(latest_only, grain='Segment')
+        self.assertTrue((result['C&B Prev'] == 0).all())
+        self.assertTrue((result['Margin % Prev'] == 0).all())
+
+    def test_empty_frame_and_empty_window(self):
+        columns = ['Segment', 'Margin % Prev', 'Margin % Latest', 'C&B Prev', 'C&B Latest', 'Flagged']
+        for frame, latest_month in ((self.df.iloc[:0], None), (self.df, '2023-06-01')):
+            result = margin.margin_cb_movers(frame, latest_month=latest_month)
+            self.assertTrue(result.empty)
+            self.assertEqual(list(result.columns), columns)
+
 if __name__ == '__main__':
     unittest.main()
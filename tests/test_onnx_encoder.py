@@ -0,0 +1,61 @@
+# tests/test_onnx_encoder.py
+
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+from utils.onnx_encoder import ONNX_AVAILABLE, OnnxEncoder, default_model_dir, mean_pool
+from utils.semantic_matcher import MODEL_NAME, questions, qids
+
+MODEL_DIR = default_model_dir(MODEL_NAME)
+BACKENDS_AVAILABLE = (
+    ONNX_AVAILABLE
+    and importlib.util.find_spec("sentence_transformers") is not None
+    and os.path.isdir(MODEL_DIR)
+)
+
+
+def _normalize(x):
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+class TestMeanPool(unittest.TestCase):
+
+    def test_padding_is_ignored(self):
+        tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+        np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 3.0]])
+
+
+@unittest.skipUnless(BACKENDS_AVAILABLE, "needs onnxruntime, tokenizers, sentence-transformers and an exported model")
+class TestOnnxMatchesTorch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from sentence_transformers import SentenceTransformer
+        cls.reference = _normalize(SentenceTransformer(MODEL_NAME).encode(questions))
+        cls.quantized = _normalize(OnnxEncoder(MODEL_DIR, threads=1).encode(questions))
+
+    def test_embeddings_within_tolerance(self):
+        cosine = (self.reference * self.quantized).sum(axis=1)
+        self.assertGreater(cosine.min(), 0.98)
+
+    def test_same_intents(self):
+        probes = [
+            "accounts with margin under 25% last quarter",
+            "why did costs go up in Transportation last month",
+            "C&B change between the last two quarters by segment",
+            "monthly C&B as a share of revenue",
+            "headcount per client by month"
+        ]
+        from sentence_transformers import SentenceTransformer
+        ref_q = _normalize(SentenceTransformer(MODEL_NAME).encode(probes))
+        onnx_q = _normalize(OnnxEncoder(MODEL_DIR, threads=1).encode(probes))
+        ref_ids = [qids[i] for i in (ref_q @ self.reference.T).argmax(axis=1)]
+        onnx_ids = [qids[i] for i in (onnx_q @ self.quantized.T).argmax(axis=1)]
+        self.assertEqual(ref_ids, onnx_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
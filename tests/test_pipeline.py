@@ -0,0 +1,112 @@
+# tests/test_pipeline.py
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+import pipeline
+import service
+from data_loader.datasets import LOADERS
+from matplotlib.figure import Figure
+from utils import charts
+from utils.lexical_router import RouteResult
+from utils.report import Report, specs_only
+
+
+@charts.renderer("test.sleepy")
+def sleepy_chart(seconds, label):
+    time.sleep(seconds)
+    fig = Figure(figsize=(1, 1))
+    fig.subplots().set_title(label)
+    return fig
+
+
+def report_with_charts(question, route, cache=None):
+    report = Report()
+    report.markdown(question)
+    with specs_only():
+        report.chart(charts.ChartSpec("test.sleepy", seconds=0.0, label=f"fast {question}"))
+        report.chart(charts.ChartSpec("test.sleepy", seconds=1.0, label=f"slow {question}"))
+    return report
+
+
+def answer_all(questions, **kwargs):
+    async def main():
+        async with pipeline.AnswerPipeline(**kwargs) as p:
+            return await asyncio.gather(*[p.answer(q) for q in questions], return_exceptions=True)
+    return asyncio.run(main())
+
+
+class TestAnswerPipeline(unittest.TestCase):
+
+    def setUp(self):
+        ut = pd.DataFrame({
+            'PSNo': [1, 2, 1, 3],
+            'FinalCustomerName': ['Acme', 'Acme', 'Globex', 'Acme'],
+            'Date_a': pd.to_datetime(['2025-01-01', '2025-01-01', '2025-02-01', '2025-02-01']),
+            'Month': ['2025-01', '2025-01', '2025-02', '2025-02'],
+            'Status': ['Billable'] * 4
+        })
+        patcher = mock.patch.dict(LOADERS, {"ut": lambda: ut.copy(deep=False)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_answers_match_service(self):
+        questions = ["Who joined or left the account this month?", "Show joiners and leavers"] * 10
+        results = answer_all(questions, cache=None)
+        expected = service.answer(questions[0], cache=None)
+        self.assertEqual([r["qid"] for r in results], ["Q11"] * 20)
+        self.assertEqual(results[0]["summary"], expected["summary"])
+
+    def test_slow_chart_is_returned_as_spec(self):
+        async def main():
+            async with pipeline.AnswerPipeline(render_timeout=0.3, cache=None) as p:
+                started = time.perf_counter()
+                result = await p.answer("Show joiners and leavers", render=True)
+                return result, time.perf_counter() - started
+
+        with mock.patch.object(service, "run", report_with_charts):
+            result, elapsed = asyncio.run(main())
+        fast, slow = result["charts"]
+        self.assertTrue(fast["png"])
+        self.assertNotIn("png", slow)
+        self.assertLess(elapsed, 0.9)
+
+    def test_full_queues_refuse_new_questions(self):
+        release = threading.Event()
+
+        def blocked_run(question, route, cache=None):
+            release.wait(5)
+            return "done"
+
+        async def main():
+            async with pipeline.AnswerPipeline(queue_size=1, compute_workers=1, cache=None) as p:
+                tasks = [asyncio.create_task(p.answer("Show joiners and leavers", admit_timeout=0.2)) for _ in range(6)]
+                await asyncio.sleep(0.5)
+                release.set()
+                return await asyncio.gather(*tasks, return_exceptions=True)
+
+        with mock.patch.object(service, "run", blocked_run):
+            results = asyncio.run(main())
+        refused = [r for r in results if isinstance(r, pipeline.Overloaded)]
+        self.assertTrue(refused)
+        self.assertTrue(all(r["summary"] == ["done"] for r in results if not isinstance(r, Exception)))
+
+    def test_bad_query_does_not_fail_its_batch(self):
+        def route(questions):
+            if "bad" in questions:
+                raise RuntimeError("encoder failed")
+            return [RouteResult("Q11", "Show joiners and leavers", 1.0, "keyword") for _ in questions]
+
+        with mock.patch.object(pipeline, "route_queries", route):
+            results = answer_all(["Show joiners and leavers", "bad", "Show joiners and leavers"], cache=None)
+        self.assertEqual(results[0]["qid"], "Q11")
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(results[2]["qid"], "Q11")
+
+
+if __name__ == "__main__":
+    unittest.main()
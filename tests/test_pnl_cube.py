@@ -0,0 +1,72 @@
+# tests/test_pnl_cube.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from kpi_engine.margin import compact_pnl_data
+from kpi_engine.pnl_cube import PnLCube, cube_for
+
+
+class TestPnLCube(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 500
+        self.df = pd.DataFrame({
+            'Month': pd.to_datetime(rng.choice(['2025-01-01', '2025-02-01', '2025-03-01', '2025-05-01'], n)),
+            'Client': rng.choice(['A', 'B', 'C', None], n),
+            'Segment': rng.choice(['Medical', 'Transportation'], n),
+            'Type': rng.choice(['Cost', 'Revenue'], n),
+            'Group3': rng.choice(['C&B', 'Rent', None], n),
+            'Amount': rng.normal(100, 30, n).round(2)
+        })
+        self.cube = PnLCube.from_frame(self.df)
+
+    def test_aggregate_matches_groupby(self):
+        expected = self.df.groupby(['Client', 'Month'])['Amount'].sum().unstack()
+        result = self.cube.aggregate(['Client'])
+        pd.testing.assert_frame_equal(result, expected, check_names=False, check_freq=False)
+
+    def test_where_and_quarter_rollup(self):
+        sub = self.df[(self.df['Type'] == 'Cost') & self.df['Group3'].str.contains('C&B', na=False)]
+        expected = sub.groupby(['Segment', sub['Month'].dt.to_period('Q')])['Amount'].sum().unstack()
+        result = self.cube.aggregate(
+            ['Segment'],
+            where={'Type': 'Cost', 'Group3': lambda cats: cats.str.contains('C&B', na=False)},
+            freq='Q'
+        )
+        pd.testing.assert_frame_equal(result, expected, check_names=False)
+
+    def test_total_series_skips_unobserved_months(self):
+        result = self.cube.aggregate(where={'Client': ['A', 'B']}, freq='M')
+        sub = self.df[self.df['Client'].isin(['A', 'B'])]
+        expected = sub.groupby(sub['Month'].dt.to_period('M'))['Amount'].sum()
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+        self.assertNotIn(pd.Period('2025-04', 'M'), result.index)
+
+    def test_long_matches_groupby(self):
+        result = self.cube.long(['Client', 'Type'], freq='Y').sort_values(['Client', 'Type']).reset_index(drop=True)
+        expected = self.df.groupby(['Client', 'Type'])['Amount'].sum().reset_index(drop=True)
+        self.assertEqual(list(result.columns), ['Year', 'Client', 'Type', 'Amount'])
+        np.testing.assert_allclose(result['Amount'].to_numpy(), expected.to_numpy())
+
+    def test_compact_frame_builds_same_cube(self):
+        compact = compact_pnl_data(self.df)
+        pd.testing.assert_frame_equal(
+            PnLCube.from_frame(compact).aggregate(['Segment', 'Type']),
+            self.cube.aggregate(['Segment', 'Type'])
+        )
+
+    def test_cube_is_shared_by_shallow_views(self):
+        first = cube_for(self.df)
+        self.assertIs(cube_for(self.df.copy(deep=False)), first)
+        self.assertIsNot(cube_for(self.df.copy()), first)
+
+    def test_cube_is_shared_by_views_of_compact_frames(self):
+        compact = compact_pnl_data(self.df)
+        self.assertIs(cube_for(compact.copy(deep=False)), cube_for(compact.copy(deep=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
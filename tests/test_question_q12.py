@@ -0,0 +1,33 @@
+import unittest
+import pandas as pd
+from questions import question_q12
+
+class TestQuestion12(unittest.TestCase):
+
+    def setUp(self):
+        self.ut = pd.DataFrame({
+            "PSNo": [1, 2, 3, 4],
+            "Delivery_Unit": ["PSCG", "PSCG", "Media", "Media"],
+            "BusinessUnit": ["FMCG", "FMCG", "Media", "Media"],
+            "FinalCustomerName": ["A", "A", "B", "B"],
+            "Date_a": pd.to_datetime(["2025-05-01", "2025-06-01", "2025-06-01", "2025-06-01"]),
+            "Status": ["Billable"] * 4,
+            "FresherAgeingCategory": ["Freshers ET(>6 Months)", "Freshers ET(>6 Months)", "Freshers DET(>6 Months)", "Non Freshers"],
+            "TotalBillableHours": [80, 160, 40, 160],
+            "NetAvailableHours": [160, 160, 160, 160],
+        })
+
+    def test_fresher_ut_by_du(self):
+        report = question_q12.compute(self.ut, "DU wise fresher UT trends")
+        self.assertIn("Jun-2025", report.blocks[0][1])
+        self.assertIn("**62.5%**", report.blocks[0][1])
+        self.assertIn("highest in **PSCG** at **100.0%**", report.blocks[0][1])
+        table = report.blocks[1][2][0].blocks[1][1]
+        self.assertEqual(table.loc["PSCG", "May-2025"], 50.0)
+
+    def test_requires_fresher_column(self):
+        report = question_q12.compute(self.ut.drop(columns=["FresherAgeingCategory"]))
+        self.assertEqual(report.blocks[0][0], "warning")
+
+if __name__ == "__main__":
+    unittest.main()
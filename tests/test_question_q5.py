@@ -6,9 +6,10 @@ class TestQuestionQ5(unittest.TestCase):
     def test_cb_cost_percentage_trend(self):
         # Mock Data
         data = {
-            "Month": ["Apr'25", "Apr'25", "May'25", "May'25", "Jun'25", "Jun'25"],
-            "Group Description": ["C&B", "Total Revenue", "C&B", "Total Revenue", "C&B", "Total Revenue"],
-            "Amount in USD": [1000, 5000, 1200, 6000, 1500, 7500]
+            "Month": pd.to_datetime(["2025-04-01", "2025-04-01", "2025-05-01", "2025-05-01", "2025-06-01", "2025-06-01"]),
+            "Type": ["Cost", "Revenue", "Cost", "Revenue", "Cost", "Revenue"],
+            "Group3": ["C&B Onsite", "Billing", "C&B Onsite", "Billing", "C&B Offshore", "Billing"],
+            "Amount": [1000.0, 5000.0, 1200.0, 6000.0, 1500.0, 7500.0]
         }
         df = pd.DataFrame(data)
 
@@ -20,6 +21,7 @@ class TestQuestionQ5(unittest.TestCase):
         self.assertEqual(len(result["table"]), 3)
         self.assertAlmostEqual(result["table"][0]["C&B Cost %"], 20.0, places=1)
         self.assertAlmostEqual(result["table"][1]["C&B Cost %"], 20.0, places=1)
+        self.assertEqual(result["chart"]["x"], ["Apr-2025", "May-2025", "Jun-2025"])
 
 if __name__ == "__main__":
     unittest.main()
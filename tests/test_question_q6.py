@@ -6,12 +6,12 @@ class TestQuestionQ6(unittest.TestCase):
 
     def setUp(self):
         self.data = pd.DataFrame({
-            'Date': ['2023-04-01', '2023-05-01', '2023-06-01',
-                     '2024-04-01', '2024-05-01', '2024-06-01'],
-            'Delivery_Unit': ['DU1'] * 6,
-            'Business_Unit': ['BU1'] * 6,
-            'Final_Customer_Name': ['ClientA'] * 6,
-            'Revenue': [100, 200, 150, 120, 180, 160]
+            'Month': pd.to_datetime(['2023-04-01', '2023-05-01', '2023-06-01',
+                                     '2024-04-01', '2024-05-01', '2024-06-01', '2024-06-01']),
+            'Type': ['Revenue'] * 6 + ['Cost'],
+            'Segment': ['Seg1'] * 7,
+            'Client': ['ClientA'] * 7,
+            'Amount': [100, 200, 150, 120, 180, 160, 999]
         })
 
     def test_revenue_trends_output(self):
@@ -29,6 +29,8 @@ class TestQuestionQ6(unittest.TestCase):
         year_revenue = result['yoy_trend']
         total_2023 = year_revenue[year_revenue['Year'] == 2023]['Revenue'].values[0]
         self.assertEqual(total_2023, 450)
+        total_2024 = year_revenue[year_revenue['Year'] == 2024]['Revenue'].values[0]
+        self.assertEqual(total_2024, 460)
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,9 +6,10 @@ class TestQuestion9(unittest.TestCase):
 
     def setUp(self):
         self.pnl = pd.DataFrame({
-            "Final Customer Name": ["Alpha", "Alpha", "Beta"],
-            "Month": ["2025-05-01", "2025-06-01", "2025-06-01"],
-            "Amount in USD": [50000, 60000, 70000]
+            "Client": ["Alpha", "Alpha", "Alpha", "Beta"],
+            "Month": pd.to_datetime(["2025-05-01", "2025-06-01", "2025-06-01", "2025-06-01"]),
+            "Type": ["Revenue", "Revenue", "Cost", "Revenue"],
+            "Amount": [50000, 60000, 45000, 70000]
         })
 
         self.ut = pd.DataFrame({
@@ -22,6 +23,8 @@ class TestQuestion9(unittest.TestCase):
         self.assertIn("Revenue per person for account", result["answer"])
         self.assertIn("Revenue per Person", result["table"].columns)
         self.assertEqual(result["chart"]["type"], "line")
+        # Cost rows are not revenue
+        self.assertEqual(result["table"]["Revenue"].tolist(), [50000, 60000])
 
     def test_missing_data(self):
         result = answer_question_q9(self.pnl, self.ut, "NonExistent")
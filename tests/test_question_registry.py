@@ -0,0 +1,100 @@
+# tests/test_question_registry.py
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from kpi_engine import headcount, margin
+from questions import registry
+from utils import slots
+from utils.report import specs_only
+from utils.semantic_matcher import PROMPT_BANK
+
+
+class TestQuestionRegistry(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.specs = registry.discover()
+
+    def test_every_question_module_is_reachable(self):
+        self.assertEqual(list(self.specs), [f"Q{i}" for i in range(1, 13)])
+        self.assertEqual(registry.failures, {})
+
+    def test_entry_points_and_bindings(self):
+        self.assertEqual(self.specs["Q1"].entry.__name__, "compute")
+        self.assertEqual(self.specs["Q5"].entry.__name__, "analyze_cb_cost_percentage_trend")
+        self.assertEqual(self.specs["Q9"].datasets, ("pnl", "ut"))
+        self.assertEqual(self.specs["Q9"].slots, ("account_name",))
+        self.assertEqual(self.specs["Q7"].datasets, ("ut",))
+        self.assertEqual(self.specs["Q10"].arity, 2)
+
+    def test_dispatch_binds_slots(self):
+        ut = loaded_frames()["ut"]
+        params = slots.extract("MoM headcount for A1", ut)
+        result = registry.dispatch(self.specs["Q8"], params, {"ut": lambda: ut})
+        self.assertIn("A1", result["answer"])
+        self.assertEqual(len(result["table"]), 9)
+        self.assertEqual(result["table"]["Headcount"].sum(), 6 * 9)
+
+    def test_missing_slot(self):
+        with self.assertRaises(registry.MissingSlotError):
+            registry.dispatch(self.specs["Q8"], "MoM headcount", {"ut": pd.DataFrame()})
+
+
+def loaded_frames():
+    """Small raw P&L and LNTData sheets run through the loaders' preprocessing."""
+    months = pd.date_range("2024-10-01", periods=9, freq="MS")
+    rows = []
+    for month in months:
+        for client, segment in (("A1", "Automotive"), ("A2", "Transportation")):
+            rows.append((month, client, "Revenue", segment, "Rev", "Rev", "Services", "Services", 1000.0 + month.month))
+            rows.append((month, client, "Cost", segment, "Cost", "Direct", "C&B Cost", "Salary", 600.0 + 5 * month.month))
+            rows.append((month, client, "Cost", segment, "Cost", "Direct", "Travel", "Airfare", 50.0 + month.month))
+    pnl = pd.DataFrame(rows, columns=[
+        "Month", "Company Code", "Type", "Segment", "Group1", "Group2", "Group3", "Group4", "Amount in USD"
+    ])
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for month in months:
+        for ps in range(1, 13):
+            rows.append((
+                ps, month, "A1" if ps <= 6 else "A2", "Billable" if ps % 3 else "Non-Billable",
+                "Offshore", "DU1" if ps % 2 else "DU2", "BU1", 176, int(rng.integers(100, 177)),
+                "Freshers" if ps % 4 == 0 else "Non Freshers"
+            ))
+    ut = pd.DataFrame(rows, columns=headcount.UT_COLUMNS)
+    return {
+        "pnl": margin.preprocess_pnl_data_compact(pnl[[c for c in margin.PNL_COLUMNS if c in pnl.columns]]),
+        "ut": headcount.preprocess_ut_data(ut),
+    }
+
+
+class TestRoutedQuestions(unittest.TestCase):
+
+    def test_every_routed_question_runs_on_loaded_frames(self):
+        specs = registry.discover()
+        frames = loaded_frames()
+        for qid, paraphrases in PROMPT_BANK.items():
+            spec = specs[qid]
+            question = f"{paraphrases[0]} for A1"
+            with self.subTest(qid=qid):
+                datasets = {name: frames[name].copy(deep=False) for name in spec.datasets}
+                params = slots.extract(question, list(datasets.values()))
+                with specs_only():
+                    result = registry.dispatch(spec, params, datasets)
+                self.assertIsNotNone(result)
+
+    def test_unrouted_questions_run_on_loaded_frames(self):
+        specs = registry.discover()
+        frames = loaded_frames()
+        result = registry.dispatch(specs["Q5"], slots.extract("C&B cost % trend"), {"pnl": frames["pnl"]})
+        self.assertEqual(len(result["table"]), 9)
+        result = registry.dispatch(specs["Q8"], slots.extract("MoM headcount for A2", frames["ut"]),
+                                   {"ut": frames["ut"]})
+        self.assertEqual(list(result["table"]["Headcount"]), [6] * 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
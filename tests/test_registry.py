@@ -0,0 +1,90 @@
+# tests/test_registry.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from data_loader.registry import DatasetRegistry
+
+
+class TestDatasetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.workbook = os.path.join(self.tmpdir, "ut.xlsx")
+        pd.DataFrame({'Client': ['A', 'B'], 'HC': [10, 20]}).to_excel(self.workbook, index=False)
+        self.reads = 0
+
+        def reader(filepath, sheet_name=0, usecols=None):
+            self.reads += 1
+            return pd.read_excel(filepath, sheet_name=sheet_name, usecols=usecols)
+
+        self.registry = DatasetRegistry(reader=reader)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sheet_is_read_once(self):
+        self.registry.get(self.workbook)
+        self.registry.get(self.workbook)
+        self.assertEqual(self.reads, 1)
+
+    def test_preprocess_runs_once(self):
+        calls = []
+
+        def preprocess(df):
+            calls.append(1)
+            df['HC2'] = df['HC'] * 2
+            return df
+
+        first = self.registry.get(self.workbook, preprocess=preprocess)
+        second = self.registry.get(self.workbook, preprocess=preprocess)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(second['HC2'].tolist(), [20, 40])
+        self.assertNotIn('HC2', self.registry.get(self.workbook).columns)
+        self.assertIsNot(first, second)
+
+    def test_views_do_not_leak_changes(self):
+        view = self.registry.get(self.workbook)
+        view.columns = ['client', 'hc']
+        view['Extra'] = 1
+        fresh = self.registry.get(self.workbook)
+        self.assertEqual(list(fresh.columns), ['Client', 'HC'])
+
+    def test_views_copy_on_write(self):
+        with pd.option_context("mode.copy_on_write", True):
+            view = self.registry.get(self.workbook)
+            view.loc[0, 'HC'] = 99
+            view['Client'] = view['Client'].str.lower()
+            fresh = self.registry.get(self.workbook)
+        self.assertEqual(fresh['HC'].tolist(), [10, 20])
+        self.assertEqual(fresh['Client'].tolist(), ['A', 'B'])
+
+    def test_shared_buffers_are_read_only(self):
+        with pd.option_context("mode.copy_on_write", True):
+            view = self.registry.get(self.workbook)
+            self.assertTrue(np.shares_memory(view['HC'].to_numpy(), self.registry.get(self.workbook)['HC'].to_numpy()))
+            with self.assertRaises(ValueError):
+                view['HC'].to_numpy()[0] = 99
+
+    def test_views_are_copies_without_copy_on_write(self):
+        with pd.option_context("mode.copy_on_write", False):
+            view = self.registry.get(self.workbook)
+            view.loc[0, 'HC'] = 99
+            self.assertFalse(np.shares_memory(view['HC'].to_numpy(), self.registry.get(self.workbook)['HC'].to_numpy()))
+        self.assertEqual(self.registry.get(self.workbook)['HC'].tolist(), [10, 20])
+
+    def test_changed_workbook_is_reloaded(self):
+        self.registry.get(self.workbook)
+        pd.DataFrame({'Client': ['C'], 'HC': [5]}).to_excel(self.workbook, index=False)
+        stat = os.stat(self.workbook)
+        os.utime(self.workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        df = self.registry.get(self.workbook)
+        self.assertEqual(self.reads, 2)
+        self.assertEqual(df['Client'].tolist(), ['C'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# tests/test_result_cache.py
+
+import unittest
+
+import pandas as pd
+from questions import registry
+from utils import charts, slots
+from utils.report import Report
+from utils.result_cache import ResultCache, result_size
+
+
+@charts.renderer("test.sized")
+def sized_chart(size):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(size / 200, 1))
+    fig.subplots().plot(range(size))
+    return fig
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = ResultCache(max_bytes=250)
+        cache.put("a", b"x" * 100)
+        cache.put("b", b"x" * 100)
+        cache.get("a")
+        cache.put("c", b"x" * 100)
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.nbytes, 250)
+
+    def test_oversized_result_is_not_stored(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", b"x" * 100)
+        self.assertEqual(len(cache), 0)
+
+    def test_report_size_counts_tables_and_images(self):
+        report = Report()
+        left, right = report.columns(2)
+        left.dataframe(pd.DataFrame({"A": range(100)}))
+        right.image(b"x" * 500)
+        self.assertGreater(result_size(report), 1300)
+
+    def test_cached_report_does_not_pin_chart_bytes(self):
+        report = Report()
+        _, right = report.columns(2)
+        right.chart(charts.ChartSpec("test.sized", size=2000))
+        report.images
+        self.assertGreater(result_size(report), 2000)
+
+        cache = ResultCache()
+        cache.put("a", report)
+        self.assertLess(cache.nbytes, 1000)
+        cached = cache.get("a")
+        self.assertIsNone(cached.blocks[0][2][1].blocks[0][1])
+        self.assertEqual(cached.images, report.images)
+
+
+class TestDispatchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+        def entry(df, user_question):
+            self.calls += 1
+            return {"answer": f"{len(df)} rows, threshold {user_question.threshold}"}
+
+        self.spec = registry.QuestionSpec(
+            "Q99", None, entry,
+            [("df", "dataset", "pnl"), ("user_question", "slot", registry.SLOT_PARAMS["user_question"])]
+        )
+        self.df = pd.DataFrame({"Amount": [1.0, 2.0, 3.0]})
+        self.cache = ResultCache()
+
+    def test_rephrased_question_hits_cache(self):
+        first = registry.dispatch(self.spec, slots.extract("margin < 30"), {"pnl": self.df}, cache=self.cache)
+        second = registry.dispatch(self.spec, slots.extract("accounts with margin below 30"), {"pnl": self.df}, cache=self.cache)
+        self.assertEqual(self.calls, 1)
+        self.assertIs(first, second)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_different_slots_miss(self):
+        registry.dispatch(self.spec, slots.extract("margin < 30"), {"pnl": self.df}, cache=self.cache)
+        registry.dispatch(self.spec, slots.extract("margin < 20"), {"pnl": self.df}, cache=self.cache)
+        self.assertEqual(self.calls, 2)
+
+    def test_new_data_version_misses(self):
+        params = slots.extract("margin < 30")
+        registry.dispatch(self.spec, params, {"pnl": self.df}, cache=self.cache)
+        changed = self.df.assign(Amount=[1.0, 2.0, 4.0])
+        result = registry.dispatch(self.spec, params, {"pnl": changed}, cache=self.cache)
+        self.assertEqual(self.calls, 2)
+        self.assertIn("3 rows", result["answer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# tests/test_service.py
+
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import service
+from data_loader.datasets import LOADERS
+from utils import charts, visuals  # noqa: F401 (registers the "bar" renderer)
+from utils.report import Report, specs_only
+
+
+class TestPayload(unittest.TestCase):
+
+    def test_report_payload(self):
+        report = Report()
+        report.markdown("**Margin** fell")
+        report.warning("Partial month")
+        col1, col2 = report.columns(2)
+        col1.dataframe(pd.DataFrame({'Client': ['A', 'B'], 'Margin %': [12.5, np.nan]}))
+        col2.dataframe(pd.DataFrame({'HC': [3]}, index=pd.Index(['PSCG'], name='DU')))
+        with specs_only():
+            col2.chart(charts.ChartSpec("bar", x=np.array(['A', 'B']), y=pd.Series([1.5, 2.0])))
+        payload = json.loads(json.dumps(service.to_payload(report)))
+
+        self.assertEqual(payload["summary"], ["**Margin** fell"])
+        self.assertEqual(payload["notices"], [{"level": "warning", "text": "Partial month"}])
+        self.assertEqual(payload["tables"][0], {"columns": ["Client", "Margin %"], "rows": [["A", 12.5], ["B", None]]})
+        self.assertEqual(payload["tables"][1]["columns"], ["DU", "HC"])
+        self.assertEqual(payload["charts"][0]["kind"], "bar")
+        self.assertEqual(payload["charts"][0]["data"]["x"], ["A", "B"])
+
+    def test_specs_only_defers_rendering(self):
+        report = Report()
+        with specs_only():
+            report.chart(charts.ChartSpec("bar", x=["A"], y=[1], title="T", xlabel="x", ylabel="y"))
+        self.assertIsNone(report.blocks[0][1])
+        # Still renders when something asks for the bytes
+        self.assertTrue(report.images[0].startswith(b"\x89PNG"))
+
+    def test_legacy_dict_payload(self):
+        result = {
+            "answer": "Headcount for Acme",
+            "table": pd.DataFrame({'Month': pd.to_datetime(['2025-01-01']), 'Headcount': [10]}),
+            "total": np.int64(10)
+        }
+        payload = service.to_payload(result)
+        self.assertEqual(payload["summary"], ["Headcount for Acme"])
+        self.assertEqual(payload["tables"][0]["name"], "table")
+        self.assertTrue(payload["tables"][0]["rows"][0][0].startswith("2025-01-01"))
+        self.assertEqual(payload["values"], {"total": 10})
+
+
+class TestAnswer(unittest.TestCase):
+
+    def setUp(self):
+        ut = pd.DataFrame({
+            'PSNo': [1, 2, 1, 3],
+            'FinalCustomerName': ['Acme', 'Acme', 'Globex', 'Acme'],
+            'Date_a': pd.to_datetime(['2025-01-01', '2025-01-01', '2025-02-01', '2025-02-01']),
+            'Month': ['2025-01', '2025-01', '2025-02', '2025-02'],
+            'Status': ['Billable'] * 4
+        })
+        patcher = mock.patch.dict(LOADERS, {"ut": lambda: ut.copy(deep=False)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answer(self):
+        result = service.answer("Who joined or left the account this month?", cache=None)
+        self.assertEqual(result["qid"], "Q11")
+        self.assertIn("**2** people joined", result["summary"][0])
+        json.dumps(result)
+
+    def test_empty_question(self):
+        with self.assertRaises(service.AnswerError) as ctx:
+            service.answer("  ")
+        self.assertEqual(ctx.exception.status, 400)
+
+    def test_http(self):
+        server = service.ThreadingHTTPServer(("127.0.0.1", 0), service.AnswerHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        request = urllib.request.Request(
+            f"{url}/answer", data=json.dumps({"question": "Show joiners and leavers"}).encode("utf-8"), method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            self.assertEqual(json.load(response)["qid"], "Q11")
+        with self.assertRaises(urllib.error.HTTPError) as ctx:
+            urllib.request.urlopen(f"{url}/chart/unknown")
+        self.assertEqual(ctx.exception.code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
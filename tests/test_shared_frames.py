@@ -0,0 +1,115 @@
+# tests/test_shared_frames.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from data_loader import shared_frames
+from data_loader.registry import DatasetRegistry
+
+
+class TestSharedFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.df = pd.DataFrame({
+            'Client': pd.Categorical(['A', 'B', 'A', None]),
+            'Segment': ['Medical', np.nan, 'Transportation', 'Medical'],
+            'Month': pd.to_datetime(['2025-01-01', '2025-02-01', '2025-02-01', '2025-03-01']),
+            'HC': [10, 20, 30, 40],
+            'Amount': [1.5, np.nan, 3.0, 4.0],
+            'Flag': pd.array([1, None, 3, 4], dtype='Int64')
+        }, index=[3, 5, 7, 9])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        path = shared_frames.slot_path(self.tmpdir, ('pnl',), (1,))
+        shared_frames.publish(self.df, path)
+        pd.testing.assert_frame_equal(shared_frames.attach(path), self.df)
+
+    def test_columns_are_mapped_read_only(self):
+        df = shared_frames.load_shared(self.tmpdir, ('pnl',), (1,), lambda: self.df)
+        for arr in (df['HC'].to_numpy(), df['Client'].array.codes):
+            self.assertFalse(arr.flags.writeable)
+            while not isinstance(arr, np.memmap) and isinstance(arr.base, np.ndarray):
+                arr = arr.base
+            self.assertIsInstance(arr, np.memmap)
+        with pd.option_context("mode.copy_on_write", True):
+            view = df.copy(deep=False)
+            view.loc[3, 'HC'] = 99
+        self.assertEqual(df.loc[3, 'HC'], 10)
+
+    def test_published_slot_is_reused(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return self.df
+
+        shared_frames.load_shared(self.tmpdir, ('pnl',), (1,), build)
+        shared_frames.load_shared(self.tmpdir, ('pnl',), (1,), build)
+        self.assertEqual(len(builds), 1)
+
+    def test_second_publisher_keeps_the_first_copy(self):
+        path = shared_frames.slot_path(self.tmpdir, ('pnl',), (1,))
+        shared_frames.publish(self.df, path)
+        shared_frames.publish(self.df.iloc[:1], path)
+        self.assertEqual(len(shared_frames.attach(path)), 4)
+
+    def test_new_version_replaces_old_slot(self):
+        shared_frames.load_shared(self.tmpdir, ('pnl',), (1,), lambda: self.df)
+        shared_frames.load_shared(self.tmpdir, ('pnl',), (2,), lambda: self.df.iloc[:2])
+        self.assertEqual(os.listdir(self.tmpdir), [os.path.basename(shared_frames.slot_path(self.tmpdir, ('pnl',), (2,)))])
+
+    def test_missing_slot_attaches_nothing(self):
+        self.assertIsNone(shared_frames.attach(os.path.join(self.tmpdir, 'missing')))
+
+
+class TestSharedRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.workbook = os.path.join(self.tmpdir, "ut.xlsx")
+        self.shared_dir = os.path.join(self.tmpdir, "shared")
+        pd.DataFrame({'Client': ['A', 'B'], 'HC': [10, 20]}).to_excel(self.workbook, index=False)
+        self.reads = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def registry(self):
+        def reader(filepath, sheet_name=0, usecols=None):
+            self.reads += 1
+            return pd.read_excel(filepath, sheet_name=sheet_name, usecols=usecols)
+        return DatasetRegistry(reader=reader, shared_dir=self.shared_dir)
+
+    def test_workers_read_the_workbook_once(self):
+        def preprocess(df):
+            df['HC2'] = df['HC'] * 2
+            return df
+
+        # Two registries stand in for two worker processes
+        first = self.registry().get(self.workbook, preprocess=preprocess)
+        second = self.registry().get(self.workbook, preprocess=preprocess)
+        self.assertEqual(self.reads, 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(second['HC2'].tolist(), [20, 40])
+
+    def test_changed_workbook_is_republished(self):
+        registry = self.registry()
+        registry.get(self.workbook)
+        pd.DataFrame({'Client': ['C'], 'HC': [5]}).to_excel(self.workbook, index=False)
+        stat = os.stat(self.workbook)
+        os.utime(self.workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.registry().get(self.workbook)['Client'].tolist(), ['C'])
+        self.assertEqual(registry.get(self.workbook)['Client'].tolist(), ['C'])
+        self.assertEqual(self.reads, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
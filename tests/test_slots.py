@@ -0,0 +1,47 @@
+# tests/test_slots.py
+
+import dataclasses
+import unittest
+
+import pandas as pd
+from utils import slots
+
+
+class TestSlots(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'Segment': pd.Categorical(['Transportation', 'Medical', 'Plant Engineering']),
+            'Client': ['C1', 'C12', 'Acme Rail'],
+            'Delivery_Unit': ['DU-Rail', None, 'DU-Med'],
+        })
+
+    def test_threshold_and_month(self):
+        params = slots.extract("Which accounts had margin below 25% in March 2025?")
+        self.assertEqual(params.threshold, 25.0)
+        self.assertEqual(params.month, pd.Timestamp("2025-03-01"))
+
+    def test_threshold_pattern_order(self):
+        self.assertEqual(slots.extract("margin < 20 and under 40").threshold, 20.0)
+        self.assertIsNone(slots.extract("C&B trend").threshold)
+
+    def test_gazetteer_slots(self):
+        params = slots.extract("Why did margin fall for acme rail in plant engineering (du-rail)?", self.df)
+        self.assertEqual(params.segment, "Plant Engineering")
+        self.assertEqual(params.client, "Acme Rail")
+        self.assertEqual(params.delivery_unit, "DU-Rail")
+
+    def test_whole_words_and_longest_match(self):
+        params = slots.extract("cost for C12 vs C123", self.df)
+        self.assertEqual(params.client, "C12")
+        self.assertEqual(params.entities, (("client", "C12"),))
+
+    def test_params_are_immutable(self):
+        params = slots.extract("margin below 30")
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            params.threshold = 10
+        self.assertIs(slots.as_params(params), params)
+
+
+if __name__ == '__main__':
+    unittest.main()
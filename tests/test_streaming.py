@@ -0,0 +1,74 @@
+# tests/test_streaming.py
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from data_loader.streaming import _ColumnBuilder, read_excel_columns
+
+
+class TestStreamingIngest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.workbook = os.path.join(cls.tmpdir, "ut.xlsx")
+        cls.df = pd.DataFrame({
+            'PSNo': [101, 102, 103, 104],
+            'Date_a': pd.to_datetime(['2025-01-01', '2025-01-01', None, '2025-02-01']),
+            'FinalCustomerName': ['A1', None, 'A2', 'A1'],
+            'NetAvailableHours': [176.0, 180.5, None, 168.0],
+            'Unused': ['x', 'y', 'z', 'w'],
+            'Mixed': [1, 'two', 3, None]
+        })
+        cls.df.to_excel(cls.workbook, sheet_name="LNTData", index=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def test_projection_keeps_declared_columns(self):
+        result = read_excel_columns(self.workbook, "LNTData", usecols=['PSNo', 'FinalCustomerName', 'Missing'])
+        self.assertEqual(list(result.columns), ['PSNo', 'FinalCustomerName'])
+        self.assertEqual(len(result), 4)
+
+    def test_typed_columns(self):
+        result = read_excel_columns(self.workbook, "LNTData", usecols=['PSNo', 'Date_a', 'NetAvailableHours'])
+        self.assertEqual(result['PSNo'].dtype, np.int64)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(result['Date_a']))
+        self.assertEqual(result['NetAvailableHours'].dtype, np.float64)
+        self.assertTrue(pd.isna(result['Date_a'].iloc[2]))
+
+    def test_matches_read_excel(self):
+        result = read_excel_columns(self.workbook, "LNTData")
+        expected = pd.read_excel(self.workbook, sheet_name="LNTData")
+        self.assertEqual(result['Mixed'].tolist()[:3], [1, 'two', 3])
+        for col in ['PSNo', 'FinalCustomerName', 'NetAvailableHours']:
+            pd.testing.assert_series_equal(result[col], expected[col], check_dtype=False)
+
+    def test_leading_blanks_beyond_capacity(self):
+        # A stale sheet dimension leaves the buffer smaller than the leading gap
+        builder = _ColumnBuilder(0)
+        for _ in range(3000):
+            builder.append(None)
+        builder.append(7.5)
+        values = builder.finish(3001)
+        self.assertEqual(len(values), 3001)
+        self.assertTrue(np.isnan(values[:3000]).all())
+        self.assertEqual(values[3000], 7.5)
+
+    def test_blank_rows_match_read_excel(self):
+        path = os.path.join(self.tmpdir, "gaps.xlsx")
+        pd.DataFrame({
+            'PSNo': [101, None, None, 104, None],
+            'Unused': ['x', 'y', None, 'w', None]
+        }).to_excel(path, index=False)
+        result = read_excel_columns(path, usecols=['PSNo'])
+        expected = pd.read_excel(path, usecols=['PSNo'])
+        pd.testing.assert_series_equal(result['PSNo'], expected['PSNo'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# tests/test_tracing.py
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+import service
+from data_loader.datasets import LOADERS
+from questions import registry
+from utils import charts, slots, tracing
+from utils.result_cache import ResultCache
+
+
+@charts.renderer("test.traced")
+def traced_chart(label):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(1, 1))
+    fig.subplots().set_title(label)
+    return fig
+
+
+class TestSpans(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = tracing.TraceRecorder()
+        patcher = mock.patch.object(tracing, "recorder", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spans_nest_under_the_trace(self):
+        with tracing.trace("how is margin?", source="test"):
+            with tracing.span("routing"):
+                tracing.annotate(qid="Q1")
+            with tracing.span("compute"):
+                with tracing.span("derived.pnl_cube"):
+                    pass
+        entry = self.recorder.recent()[-1]
+        self.assertEqual(entry["question"], "how is margin?")
+        self.assertEqual(entry["attrs"], {"source": "test"})
+        self.assertEqual([(s["name"], s["depth"], s["parent"]) for s in entry["spans"]],
+                         [("routing", 0, None), ("compute", 0, None), ("derived.pnl_cube", 1, 1)])
+        self.assertEqual(entry["spans"][0]["attrs"], {"qid": "Q1"})
+        self.assertGreaterEqual(entry["duration_ms"], entry["spans"][1]["duration_ms"])
+        json.dumps(entry)
+
+    def test_spans_outside_a_trace_are_ignored(self):
+        with tracing.span("compute") as span:
+            tracing.annotate(cached=True)
+            tracing.record("routing", time.perf_counter(), time.perf_counter())
+        self.assertIsNone(span)
+        self.assertEqual(self.recorder.recent(), [])
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(KeyError):
+            with tracing.trace("q"):
+                with tracing.span("data"):
+                    raise KeyError("Amount")
+        entry = self.recorder.recent()[-1]
+        self.assertEqual(entry["spans"][0]["attrs"]["error"], "KeyError")
+        self.assertIn("KeyError", entry["attrs"]["error"])
+
+    def test_jsonl_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            self.recorder.path = path
+            for qid in ("Q1", "Q2"):
+                with tracing.trace("q"):
+                    tracing.annotate(qid=qid)
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual([line["qid"] for line in lines], ["Q1", "Q2"])
+        self.assertEqual(self.recorder.to_jsonl().count("\n"), 2)
+
+    def test_stage_summary(self):
+        traces = [
+            {"qid": "Q1", "duration_ms": 30.0, "spans": [
+                {"name": "compute", "depth": 0, "duration_ms": 20.0},
+                {"name": "derived.pnl_cube", "depth": 1, "duration_ms": 15.0},
+                {"name": "routing", "depth": 0, "duration_ms": 5.0},
+            ]},
+            {"qid": "Q1", "duration_ms": 10.0, "spans": [{"name": "compute", "depth": 0, "duration_ms": 4.0}]},
+        ]
+        summary = tracing.stage_summary(traces)
+        self.assertEqual(list(summary["stage"]), ["routing", "compute", "total"])
+        compute = summary.set_index("stage").loc["compute"]
+        self.assertEqual(compute["count"], 2)
+        self.assertEqual(compute["mean_ms"], 12.0)
+        self.assertEqual(compute["max_ms"], 20.0)
+        self.assertTrue(tracing.stage_summary([]).empty)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = tracing.TraceRecorder()
+        patcher = mock.patch.object(tracing, "recorder", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dispatch_records_compute_and_cache_hits(self):
+        spec = registry.QuestionSpec("Q99", None, lambda df: {"answer": len(df)}, [("df", "dataset", "pnl")])
+        cache = ResultCache()
+        frames = {"pnl": pd.DataFrame({"Amount": [1.0]})}
+        params = slots.extract("q")
+        for _ in range(2):
+            with tracing.trace("q"):
+                registry.dispatch(spec, params, frames, cache=cache)
+        first, second = self.recorder.recent()
+        self.assertEqual(first["spans"][0]["name"], "compute")
+        self.assertEqual(first["spans"][0]["attrs"], {"qid": "Q99", "cached": False})
+        self.assertEqual(second["spans"][0]["attrs"]["cached"], True)
+
+    def test_chart_render_is_traced_across_threads(self):
+        with tracing.trace("q"):
+            charts.submit(charts.ChartSpec("test.traced", label=f"traced {time.time()}")).result()
+        names = [s["name"] for s in self.recorder.recent()[-1]["spans"]]
+        self.assertEqual(names, ["render.chart"])
+
+    def test_service_answer_stages(self):
+        ut = pd.DataFrame({
+            'PSNo': [1, 2, 1, 3],
+            'FinalCustomerName': ['Acme', 'Acme', 'Globex', 'Acme'],
+            'Date_a': pd.to_datetime(['2025-01-01', '2025-01-01', '2025-02-01', '2025-02-01']),
+            'Month': ['2025-01', '2025-01', '2025-02', '2025-02'],
+            'Status': ['Billable'] * 4
+        })
+        with mock.patch.dict(LOADERS, {"ut": lambda: ut.copy(deep=False)}):
+            service.answer("Who joined or left the account this month?", cache=None)
+        entry = self.recorder.recent()[-1]
+        self.assertEqual(entry["qid"], "Q11")
+        self.assertEqual(entry["attrs"]["source"], "service")
+        stages = [s["name"] for s in entry["spans"] if s["depth"] == 0]
+        self.assertEqual(stages, ["routing", "data", "slots", "compute", "format"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,37 +8,84 @@ class TestUtilizationKPI(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.df = pd.DataFrame({
-            'Month': ['2024-01-01', '2024-01-01', '2024-02-01', '2024-02-01'],
-            'Client': ['Client A', 'Client B', 'Client A', 'Client B'],
-            'Type': ['Fixed', 'Project', 'Fixed', 'Project'],
-            'Utilization %': [80, 70, 90, 60]
-        })
-        cls.df['Month'] = pd.to_datetime(cls.df['Month'])
+        rows = [
+            # PSNo, DU, BU, client, month, status, fresher category, billable, available
+            (1, 'PSCG', 'FMCG', 'Client A', '2024-01-01', 'Billable', 'Non Freshers', 160, 170),
+            (2, 'PSCG', 'FMCG', 'Client A', '2024-01-01', 'Non Billable', 'Non Freshers', 0, 170),
+            (3, 'Media', 'Media', 'Client B', '2024-01-01', 'Billable', 'Non Freshers', 80, 160),
+            (1, 'PSCG', 'FMCG', 'Client A', '2024-02-01', 'Billable', 'Non Freshers', 150, 160),
+            (2, 'PSCG', 'FMCG', 'Client A', '2024-02-01', 'Billable', 'Non Freshers', 170, 170),
+            (3, 'Media', 'Media', 'Client B', '2024-02-01', 'Billable', 'Non Freshers', 100, 160),
+        ]
+        cls.df = pd.DataFrame(rows, columns=[
+            'PSNo', 'Delivery_Unit', 'BusinessUnit', 'FinalCustomerName', 'Date_a', 'Status',
+            'FresherAgeingCategory', 'TotalBillableHours', 'NetAvailableHours'
+        ])
+        cls.df['Date_a'] = pd.to_datetime(cls.df['Date_a'])
+        cls.engine = utilization.UtilizationEngine.from_frame(cls.df)
 
     def test_overall_utilization(self):
-        result = utilization.overall_utilization(self.df)
-        self.assertAlmostEqual(result, 75.0)
+        trend = self.engine.trend()
+        self.assertEqual(trend['Month'].tolist(), ['2024-01', '2024-02'])
+        self.assertEqual(trend['UT%'].tolist(), [66.67, 100.0])
+        self.assertAlmostEqual(trend['Hours UT%'].iloc[0], 48.0)
 
     def test_utilization_by_client(self):
-        result = utilization.utilization_by_client(self.df)
-        self.assertEqual(len(result), 2)
-        self.assertIn('Client A', result['Client'].values)
+        trend = self.engine.trend(by=['FinalCustomerName'], where={'Month': '2024-01'})
+        self.assertEqual(trend[['FinalCustomerName', 'HC', 'Billed HC', 'UT%']].values.tolist(),
+                         [['Client A', 2, 1, 50.0], ['Client B', 1, 1, 100.0]])
 
-    def test_utilization_by_type(self):
-        result = utilization.utilization_by_type(self.df)
-        self.assertEqual(len(result), 2)
-        self.assertIn('Fixed', result['Type'].values)
+    def test_utilization_by_delivery_unit(self):
+        trend = self.engine.trend(by=['Delivery_Unit'])
+        self.assertEqual(len(trend), 4)
+        self.assertIn('Media', trend['Delivery_Unit'].values)
 
     def test_utilization_trend(self):
-        result = utilization.utilization_trend(self.df)
-        self.assertEqual(len(result), 2)
-        self.assertIn(70.0, result['Utilization %'].values)
-
-    def test_utilization_summary(self):
-        summary = utilization.utilization_summary(self.df)
-        self.assertEqual(len(summary), 4)
-        self.assertTrue(summary[0].startswith("Overall utilization"))
+        trend = self.engine.trend(where={'FinalCustomerName': 'Client A'})
+        self.assertEqual(len(trend), 2)
+        self.assertEqual(trend['UT%'].tolist(), [50.0, 100.0])
+        self.assertEqual(self.engine.trend(last_n=1)['Month'].tolist(), ['2024-02'])
+
+
+class TestUtilizationEngine(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rows = [
+            # PSNo, DU, BU, client, month, status, fresher category, billable, available
+            (1, 'PSCG', 'FMCG', 'Acme', '2025-01-01', 'Billable', 'Non Freshers', 160, 170),
+            (1, 'PSCG', 'FMCG', 'Globex', '2025-01-01', 'Billable', 'Non Freshers', 10, 0),
+            (2, 'PSCG', 'FMCG', 'Acme', '2025-01-01', 'Non Billable', 'Freshers ET(>6 Months)', 0, 170),
+            (2, 'PSCG', 'FMCG', 'Acme', '2025-02-01', 'Billable', 'Freshers ET(>6 Months)', 150, 160),
+            (3, 'Media', 'Media', 'Initech', '2025-02-01', 'Billable', 'Non Freshers', 160, 160),
+        ]
+        cls.df = pd.DataFrame(rows, columns=[
+            'PSNo', 'Delivery_Unit', 'BusinessUnit', 'FinalCustomerName', 'Date_a', 'Status',
+            'FresherAgeingCategory', 'TotalBillableHours', 'NetAvailableHours'
+        ])
+        cls.engine = utilization.UtilizationEngine.from_frame(cls.df)
+
+    def test_headcount_is_distinct_across_accounts(self):
+        trend = utilization.UtilizationEngine.from_frame(self.df).trend(where={'Delivery_Unit': 'PSCG'})
+        jan = trend.iloc[0]
+        self.assertEqual((jan['Month'], jan['HC'], jan['Billed HC'], jan['UT%']), ('2025-01', 2, 1, 50.0))
+        self.assertEqual(jan['Billable Hours'], 170)
+        self.assertAlmostEqual(jan['Hours UT%'], 50.0)
+
+    def test_slices_by_dimension_and_fresher(self):
+        trend = self.engine.trend(by=['Delivery_Unit'], where={'Fresher': utilization.FRESHER})
+        self.assertEqual(trend[['Delivery_Unit', 'Month', 'HC', 'Billed HC']].values.tolist(),
+                         [['PSCG', '2025-01', 1, 0], ['PSCG', '2025-02', 1, 1]])
+        self.assertEqual(len(self.engine.trend(last_n=1)), 1)
+
+    def test_lookup_order_and_case(self):
+        self.assertEqual(self.engine.lookup('media'), ('Delivery_Unit', 'Media'))
+        self.assertEqual(self.engine.lookup('FMCG'), ('BusinessUnit', 'FMCG'))
+        self.assertEqual(self.engine.lookup('acme'), ('FinalCustomerName', 'Acme'))
+        self.assertIsNone(self.engine.lookup('Umbrella'))
+
+    def test_engine_is_built_once_per_frame(self):
+        self.assertIs(utilization.engine_for(self.df), utilization.engine_for(self.df))
 
 if __name__ == '__main__':
     unittest.main()
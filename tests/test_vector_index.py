@@ -0,0 +1,66 @@
+# tests/test_vector_index.py
+
+import unittest
+
+import numpy as np
+from utils.vector_index import BruteForceIndex, IVFIndex, build_index, top_intents
+
+
+def _unit(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        centers = rng.normal(size=(20, 16))
+        self.vectors = _unit(np.repeat(centers, 100, axis=0) + 0.3 * rng.normal(size=(2000, 16)))
+        self.queries = _unit(centers + 0.3 * rng.normal(size=(20, 16)))
+        self.exact = (self.queries @ self.vectors.T).argmax(axis=1)
+
+    def test_brute_force_is_exact(self):
+        index = BruteForceIndex(16)
+        index.add(self.vectors[:1000])
+        index.add(self.vectors[1000:])
+        scores, ids = index.search(self.queries, k=5)
+        np.testing.assert_array_equal(ids[:, 0], self.exact)
+        self.assertTrue((np.diff(scores, axis=1) <= 0).all())
+
+    def test_ivf_recall(self):
+        index = IVFIndex(16, n_lists=40, n_probe=8)
+        index.add(self.vectors)
+        _, ids = index.search(self.queries, k=1)
+        self.assertGreaterEqual((ids[:, 0] == self.exact).mean(), 0.9)
+
+    def test_ivf_incremental_insert(self):
+        index = IVFIndex(16, n_lists=20, n_probe=20)
+        index.add(self.vectors[:1500])
+        index.add(self.queries)
+        _, ids = index.search(self.queries, k=1)
+        np.testing.assert_array_equal(ids[:, 0], np.arange(1500, 1520))
+
+    def test_ivf_empty_probe_scans_everything(self):
+        index = IVFIndex(2, n_lists=2, n_probe=1)
+        index.train(_unit(np.array([[1.0, 0.0], [0.0, 1.0]])))
+        index.add(_unit(np.array([[1.0, 0.1]])))
+        scores, ids = index.search(_unit(np.array([[0.0, 1.0]])), k=1)
+        self.assertEqual(ids[0, 0], 0)
+        self.assertGreater(scores[0, 0], -np.inf)
+        ranked = top_intents(index, ["Q1"], _unit(np.array([[0.0, 1.0]])), k=3)[0]
+        self.assertEqual([r[0] for r in ranked], ["Q1"])
+
+    def test_build_index_picks_by_size(self):
+        self.assertIsInstance(build_index(self.vectors[:10], ann_threshold=100), BruteForceIndex)
+        self.assertIsInstance(build_index(self.vectors, ann_threshold=100), IVFIndex)
+
+    def test_top_intents_groups_paraphrases(self):
+        vectors = _unit(np.array([[1, 0], [0.9, 0.1], [0, 1], [0.7, 0.7]], dtype=float))
+        index = build_index(vectors)
+        ranked = top_intents(index, ["Q1", "Q1", "Q2", "Q3"], _unit(np.array([[1.0, 0.05]])), k=3)[0]
+        self.assertEqual([r[0] for r in ranked], ["Q1", "Q3", "Q2"])
+        self.assertEqual(ranked[0][2], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+# utils/charts.py
+# Charts as data, rendered off the main path.
+#
+# A question describes a chart as a ChartSpec: the name of a registered
+# renderer plus the plain data it draws (labels, values, colours, titles).
+# submit() hashes the spec and either returns the PNG already rendered for
+# that hash or schedules the renderer on a small thread pool, so a question
+# can emit its tables and insight text while its charts are still drawing.
+#
+# Renderers build figures with matplotlib's object API (Figure, not pyplot),
+# which keeps them free of pyplot's global state and safe to run on worker
+# threads.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from utils import tracing
+
+CHART_DPI = 200
+CHART_CACHE_SIZE = 256
+CHART_WORKERS = int(os.environ.get("CA_CHART_WORKERS", min(4, os.cpu_count() or 1)))
+
+# name -> function(**data) returning a matplotlib Figure
+RENDERERS = {}
+
+
+def renderer(name):
+    """Registers a function that draws a spec's data onto a new Figure."""
+    def register(func):
+        RENDERERS[name] = func
+        return func
+    return register
+
+
+def _canonical(value):
+    """JSON-safe, order-stable form of a spec value, for hashing."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, pd.Series):
+        return {"index": _canonical(value.index), "values": _canonical(value.to_numpy())}
+    if isinstance(value, pd.DataFrame):
+        return {
+            "index": _canonical(value.index),
+            "columns": _canonical(value.columns),
+            "values": _canonical(value.to_numpy()),
+        }
+    if isinstance(value, (pd.Index, np.ndarray)):
+        return [_canonical(v) for v in value.tolist()]
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, float) and value != value:
+        return "nan"
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class ChartSpec:
+    """
+    A chart described by its data.
+
+    Args:
+        kind (str): Name of a registered renderer.
+        fmt (str): "png" or "svg".
+        **data: Keyword arguments passed to the renderer.
+    """
+
+    def __init__(self, kind, fmt="png", **data):
+        self.kind = kind
+        self.fmt = fmt
+        self.data = data
+        self._key = None
+
+    @property
+    def key(self):
+        """Stable hash of kind, format and data."""
+        if self._key is None:
+            payload = json.dumps([self.kind, self.fmt, _canonical(self.data)], sort_keys=True, separators=(",", ":"))
+            self._key = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        return self._key
+
+    def __repr__(self):
+        return f"ChartSpec({self.kind}, {self.key[:10]})"
+
+
+def render(spec):
+    """Draws a spec and returns its PNG (or SVG) bytes. Uncached."""
+    with tracing.span("render.chart", kind=spec.kind):
+        fig = RENDERERS[spec.kind](**spec.data)
+        buf = BytesIO()
+        fig.savefig(buf, format=spec.fmt, bbox_inches="tight", dpi=CHART_DPI)
+        return buf.getvalue()
+
+
+class ChartCache:
+    """Rendered bytes by spec hash, with in-flight renders shared between callers."""
+
+    def __init__(self, max_items=CHART_CACHE_SIZE, workers=CHART_WORKERS):
+        self.max_items = max_items
+        self.workers = workers
+        self._done = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chart")
+        return self._pool
+
+    def submit(self, spec):
+        """
+        Returns a Future resolving to the chart's bytes.
+
+        A cached chart comes back as an already-completed Future; an
+        identical spec that is still rendering returns the same Future.
+        """
+        key = spec.key
+        with self._lock:
+            if key in self._done:
+                self._done.move_to_end(key)
+                future = Future()
+                future.set_result(self._done[key])
+                return future
+            if key in self._pending:
+                return self._pending[key]
+            # Run in the submitter's context so the render is timed under its trace
+            future = self._executor().submit(copy_context().run, render, spec)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _store(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.exception() is not None:
+                return
+            self._done[key] = future.result()
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_items:
+                self._done.popitem(last=False)
+
+    def get(self, spec):
+        """Bytes for `spec`, rendering (and waiting) if needed."""
+        return self.submit(spec).result()
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+
+    def __len__(self):
+        return len(self._done)
+
+
+chart_cache = ChartCache()
+
+
+def submit(spec):
+    return chart_cache.submit(spec)
+
+
+def render_png(spec):
+    return chart_cache.get(spec)
+
+
+def styled_axes(ax, color="#cccccc", width=0.5):
+    """Thin light spines, the house style for every chart."""
+    for spine in ax.spines.values():
+        spine.set_linewidth(width)
+        spine.set_edgecolor(color)
+
+
+@lru_cache(maxsize=64)
+def spline_basis(n_knots, points=300, k=3):
+    """
+    Matrix mapping values at x = 0..n_knots-1 to their interpolating spline on a grid.
+
+    An interpolating B-spline is linear in the values it passes through, so
+    for a shared x axis the whole smoothing step is one (points x n_knots)
+    matrix, built once per shape and applied to every series with a matmul.
+
+    Returns:
+        tuple: (grid, basis), grid of shape (points,) and basis of shape
+        (points, n_knots).
+    """
+    from scipy.interpolate import make_interp_spline
+
+    x = np.arange(n_knots)
+    grid = np.linspace(0, n_knots - 1, points)
+    basis = make_interp_spline(x, np.eye(n_knots), k=k)(grid)
+    grid.setflags(write=False)
+    basis.setflags(write=False)
+    return grid, basis
+
+
+def smooth_columns(values, points=300, k=3):
+    """
+    Spline-smooths every column of a (months x series) matrix at once.
+
+    Args:
+        values (array-like): One column per series, one row per month.
+        points (int): Grid points per smoothed series.
+        k (int): Spline degree; needs more than k months.
+
+    Returns:
+        tuple: (x, smoothed) with smoothed of shape (len(x), n_series). With
+        too few months to fit the spline the input is returned unsmoothed.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    if len(values) <= k:
+        return np.arange(len(values), dtype=float), values
+    grid, basis = spline_basis(len(values), points, k)
+    return grid, basis @ values
@@ -0,0 +1,134 @@
+# utils/embedding_store.py
+# On-disk store for prompt-bank embeddings.
+#
+# Embeddings are saved as a plain .npy matrix named after the model and a
+# hash of the prompt bank, and loaded memory-mapped so a restart costs one
+# file open instead of a model.encode over every paraphrase. A JSON sidecar
+# per model records the hash of the text behind each row; when the bank
+# changes, rows for unchanged paraphrases are copied over and only new or
+# edited ones are encoded.
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+STORE_DIR = os.environ.get("CA_EMBEDDING_DIR", os.path.join(".cache", "embeddings"))
+
+_lock = threading.Lock()
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def bank_hash(texts):
+    """Hash of an ordered list of texts."""
+    digest = hashlib.sha1()
+    for text in texts:
+        digest.update(text_hash(text).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _model_slug(model_name):
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)[:40]
+    return f"{safe}-{hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _reusable_rows(meta, texts):
+    """Maps row i of `texts` to its row in the previous store, where it exists."""
+    if not meta or not os.path.exists(meta.get("npy", "")):
+        return None, {}
+    previous = {h: row for row, h in enumerate(meta.get("texts", []))}
+    mapping = {}
+    for i, text in enumerate(texts):
+        row = previous.get(text_hash(text))
+        if row is not None:
+            mapping[i] = row
+    return np.load(meta["npy"], mmap_mode="r"), mapping
+
+
+def load_embeddings(model_name, texts, encode, store_dir=None):
+    """
+    Returns embeddings for `texts`, encoding only what is not stored yet.
+
+    Args:
+        model_name (str): Model identifier; each model gets its own store.
+        texts (list[str]): Prompt-bank texts, in row order.
+        encode (callable): list[str] -> 2-D array, called for missing texts only.
+        store_dir (str): Store directory, defaults to STORE_DIR.
+
+    Returns:
+        np.ndarray: Read-only (memory-mapped when possible) matrix with one
+            row per text.
+    """
+    texts = list(texts)
+    store_dir = store_dir or STORE_DIR
+    slug = _model_slug(model_name)
+    meta_path = os.path.join(store_dir, f"{slug}.json")
+    npy_path = os.path.join(store_dir, f"{slug}-{bank_hash(texts)[:16]}.npy")
+
+    with _lock:
+        meta = _read_meta(meta_path)
+        if meta and meta.get("npy") == npy_path and os.path.exists(npy_path):
+            return np.load(npy_path, mmap_mode="r")
+
+        previous, mapping = _reusable_rows(meta, texts)
+        missing = [i for i in range(len(texts)) if i not in mapping]
+        fresh = np.asarray(encode([texts[i] for i in missing])) if missing else None
+
+        dim = fresh.shape[1] if fresh is not None else previous.shape[1]
+        dtype = fresh.dtype if fresh is not None else previous.dtype
+        embeddings = np.empty((len(texts), dim), dtype=dtype)
+        if mapping:
+            rows = np.fromiter(mapping, dtype=np.int64)
+            embeddings[rows] = previous[np.fromiter(mapping.values(), dtype=np.int64)]
+        if missing:
+            embeddings[missing] = fresh
+        del previous
+
+        try:
+            os.makedirs(store_dir, exist_ok=True)
+            _write_atomic(npy_path, lambda f: np.save(f, embeddings))
+            _write_atomic(meta_path, lambda f: f.write(json.dumps({
+                "model": model_name,
+                "npy": npy_path,
+                "texts": [text_hash(t) for t in texts]
+            }).encode("utf-8")))
+            if meta and meta.get("npy") not in (None, npy_path) and os.path.exists(meta["npy"]):
+                os.remove(meta["npy"])
+        except OSError:
+            # The store is an optimization; a read-only disk just means re-encoding next start
+            embeddings.flags.writeable = False
+            return embeddings
+
+    return np.load(npy_path, mmap_mode="r")
+
+
+def clear_store(store_dir=None):
+    """Deletes every stored embedding matrix under `store_dir`."""
+    store_dir = store_dir or STORE_DIR
+    if not os.path.isdir(store_dir):
+        return
+    with _lock:
+        for name in os.listdir(store_dir):
+            if name.endswith((".npy", ".json", ".tmp")):
+                os.remove(os.path.join(store_dir, name))
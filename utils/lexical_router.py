@@ -0,0 +1,130 @@
+# utils/lexical_router.py
+# Lexical fast path in front of the embedding matcher.
+#
+# Two cheap tiers run before any transformer forward pass:
+#
+#   keyword  precompiled patterns for phrasing that names exactly one intent
+#            ("FTE", "headcount", "margin below", "C&B ... quarter")
+#   tfidf    cosine similarity between the query and every prompt-bank
+#            paraphrase over a TF-IDF index built once from PROMPT_BANK
+#
+# A tier answers only when it is confident; everything else returns None and
+# falls through to embeddings. Each answer carries its confidence and tier.
+
+import math
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+
+RouteResult = namedtuple("RouteResult", ["qid", "question", "confidence", "tier"])
+
+# TF-IDF answers need a close paraphrase and a clear lead over the next intent
+TFIDF_MIN_SCORE = 0.6
+TFIDF_MIN_LEAD = 0.2
+
+_TOKEN = re.compile(r"c&b|[a-z0-9]+(?:%)?")
+_STOPWORDS = frozenset(
+    "a an and are by did do for from had have in is it last me of on over show "
+    "the this to vs what which with".split()
+)
+
+# (qid, patterns that must all match, confidence). Order matters: first hit wins.
+KEYWORD_RULES = [
+    ("Q9", [r"\brevenue per (person|head|fte|employee|resource)\b"], 0.95),
+    ("Q12", [r"\bfreshers?\b", r"\b(ut\s*%|ut|utili[sz](ation|ed))(?!\w)"], 0.95),
+    ("Q10", [r"\b(ut\s*%|ut|utili[sz]ation)(?!\w)"], 0.9),
+    ("Q11", [r"\b(joiners?|leavers?)\b"], 0.9),
+    # "left"/"transferred" only count with people words or right before the account
+    # ("budget left", "who left margin below 30%" and "accounts transferred revenue" are not attrition)
+    ("Q11", [r"\b(joined|left|transferred|transfers?)\b",
+             r"\b(people|employees?|associates?|resources?|staff|members?)\b"], 0.9),
+    ("Q11", [r"\b(joined|left|transferred (?:out of|from|to))\s+(the\s+)?(account|client|project|team)\b"], 0.9),
+    ("Q7", [r"\b(fte|ftes|headcount|head count|hc)\b"], 0.95),
+    ("Q1", [r"\b(cm|margin)\s*%?\s*(<|below|less than|under|lower than)"], 0.95),
+    ("Q4", [r"c&b", r"\b(mom|m-o-m|month over month|monthly|month-on-month)\b"], 0.9),
+    ("Q4", [r"c&b", r"\b(revenue|% of revenue)\b", r"\btrend\b"], 0.9),
+    ("Q3", [r"c&b", r"\b(quarter|quarters|qoq|q[1-4])\b"], 0.9),
+    ("Q3", [r"c&b", r"\bsegment"], 0.85),
+    ("Q6", [r"\brevenue\b", r"\b(yoy|qoq|year over year|quarter over quarter|growth)\b"], 0.85),
+    ("Q2", [r"\bmargin\b", r"\b(drop|dropped|decline|declined|fall|fell)\b", r"\bcost"], 0.9),
+]
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class LexicalRouter:
+    """Keyword rules plus a TF-IDF index over one prompt bank."""
+
+    def __init__(self, prompt_bank, rules=KEYWORD_RULES):
+        self.questions, self.qids = [], []
+        for qid, qlist in prompt_bank.items():
+            for q in qlist:
+                self.questions.append(q)
+                self.qids.append(qid)
+        self.qid_array = np.array(self.qids)
+        self.rules = [
+            (qid, [re.compile(p, re.IGNORECASE) for p in patterns], confidence)
+            for qid, patterns, confidence in rules
+            if qid in prompt_bank
+        ]
+        self._build_index()
+
+    def _build_index(self):
+        docs = [tokenize(q) for q in self.questions]
+        self.vocabulary = {t: i for i, t in enumerate(sorted({t for d in docs for t in d}))}
+        df = Counter(t for d in docs for t in set(d))
+        n = len(docs)
+        self.idf = np.array([math.log((1 + n) / (1 + df[t])) + 1 for t in self.vocabulary])
+        self.matrix = np.vstack([self._vector(d) for d in docs]) if docs else np.zeros((0, len(self.vocabulary)))
+
+    def _vector(self, tokens):
+        vec = np.zeros(len(self.vocabulary))
+        for token, count in Counter(tokens).items():
+            idx = self.vocabulary.get(token)
+            if idx is not None:
+                vec[idx] = 1 + math.log(count)
+        vec *= self.idf
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def extended(self, qid, texts):
+        """A new router with `texts` added as paraphrases of `qid`; this one is unchanged."""
+        bank = {}
+        for q, label in zip(self.questions, self.qids):
+            bank.setdefault(label, []).append(q)
+        bank.setdefault(qid, []).extend(texts)
+        router = LexicalRouter(bank, rules=[])
+        router.rules = self.rules
+        return router
+
+    def scores(self, query):
+        """Cosine similarity of `query` to every prompt-bank paraphrase."""
+        return self.matrix @ self._vector(tokenize(query))
+
+    def _best_in(self, qid, scores):
+        idx = np.flatnonzero(self.qid_array == qid)
+        return self.questions[int(idx[scores[idx].argmax()])]
+
+    def route(self, query):
+        """
+        Answers `query` from the keyword or TF-IDF tier.
+
+        Returns:
+            RouteResult | None: None when neither tier is confident.
+        """
+        scores = self.scores(query)
+        for qid, patterns, confidence in self.rules:
+            if all(p.search(query) for p in patterns):
+                return RouteResult(qid, self._best_in(qid, scores), confidence, "keyword")
+
+        if not len(scores) or not scores.max():
+            return None
+        best_idx = int(scores.argmax())
+        best_qid = self.qids[best_idx]
+        runner_up = scores[self.qid_array != best_qid].max(initial=0.0)
+        if scores[best_idx] >= TFIDF_MIN_SCORE and scores[best_idx] - runner_up >= TFIDF_MIN_LEAD:
+            return RouteResult(best_qid, self.questions[best_idx], float(scores[best_idx]), "tfidf")
+        return None
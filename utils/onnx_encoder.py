@@ -0,0 +1,128 @@
+# utils/onnx_encoder.py
+# Optional int8 ONNX Runtime backend for the intent matcher.
+#
+# Runs the MiniLM sentence encoder as a dynamically quantized ONNX graph with
+# a Hugging Face fast tokenizer, so serving needs neither PyTorch nor
+# sentence-transformers. Requires `pip install onnxruntime tokenizers`.
+#
+# Build the model directory once (this step does need sentence-transformers
+# and torch):
+#
+#     python -m utils.onnx_encoder all-MiniLM-L6-v2 .cache/onnx/all-MiniLM-L6-v2
+#
+# and select the backend with CA_MATCHER_BACKEND=onnx. CA_ONNX_THREADS sets
+# the intra-op thread count.
+
+import os
+import sys
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+MAX_LENGTH = 256
+
+
+def default_model_dir(model_name):
+    return os.environ.get("CA_ONNX_MODEL_DIR", os.path.join(".cache", "onnx", model_name))
+
+
+def mean_pool(token_embeddings, attention_mask):
+    """Averages token embeddings over the non-padding positions, like sentence-transformers."""
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    summed = (token_embeddings * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    return summed / counts
+
+
+class OnnxEncoder:
+    """Sentence encoder over a quantized ONNX graph; mirrors SentenceTransformer.encode."""
+
+    def __init__(self, model_dir, threads=None):
+        if not ONNX_AVAILABLE:
+            raise ImportError("The ONNX backend needs `onnxruntime` and `tokenizers`")
+        threads = threads or int(os.environ.get("CA_ONNX_THREADS", "0"))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def encode(self, sentences, batch_size=32):
+        """
+        Encodes sentences into mean-pooled embeddings.
+
+        Args:
+            sentences (list[str]): Texts to encode.
+            batch_size (int): Sentences per session run.
+
+        Returns:
+            np.ndarray: float32 matrix, one row per sentence.
+        """
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(list(sentences[start:start + batch_size]))
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feed)[0]
+            outputs.append(mean_pool(token_embeddings, attention_mask))
+        if not outputs:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(outputs).astype(np.float32)
+
+
+def export_quantized(model_name, model_dir):
+    """
+    Exports a sentence-transformers model to ONNX and quantizes its weights to int8.
+
+    Args:
+        model_name (str): sentence-transformers model, e.g. "all-MiniLM-L6-v2".
+        model_dir (str): Output directory for the graph and tokenizer.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(model_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    st_model.tokenizer.save_pretrained(model_dir)
+
+    sample = st_model.tokenizer(["export sample"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    fp32_path = os.path.join(model_dir, "model_fp32.onnx")
+    dynamic = {n: {0: "batch", 1: "sequence"} for n in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer, tuple(sample[n] for n in names), fp32_path,
+            input_names=names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic, opset_version=14
+        )
+
+    quantize_dynamic(fp32_path, os.path.join(model_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "all-MiniLM-L6-v2"
+    export_quantized(name, sys.argv[2] if len(sys.argv) > 2 else default_model_dir(name))
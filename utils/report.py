@@ -0,0 +1,279 @@
+# utils/report.py
+# Renderer-agnostic record of what a question shows.
+#
+# Question modules build a Report (markdown, tables, charts, column layout)
+# instead of calling Streamlit directly. Charts are added either as ChartSpecs,
+# rendered on the utils.charts worker pool while the rest of the report is
+# built, or as figures rendered to PNG bytes on the spot. Either way a Report
+# can be cached and replayed with Report.render(st) without touching pandas
+# or matplotlib again. A cached Report keeps only the specs of its charts
+# (Report.detached()); their bytes live in, and are bounded by, the chart cache.
+#
+# Headless callers (service.py) build Reports inside specs_only(), where
+# charts are recorded as specs and only rendered if something asks for their
+# bytes, and serialize them with Report.to_dict().
+
+import base64
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import as_completed
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from utils import charts
+
+CHART_DPI = 200
+
+# False while a headless caller builds reports: charts are not rendered up front
+_render_charts = ContextVar("render_charts", default=True)
+
+
+@contextmanager
+def specs_only():
+    """Reports built in this context record their charts without rendering them."""
+    token = _render_charts.set(False)
+    try:
+        yield
+    finally:
+        _render_charts.reset(token)
+
+
+def json_value(value):
+    """Plain JSON form of a cell or chart input: lists, numbers, strings and None."""
+    if isinstance(value, dict):
+        return {str(k): json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_value(v) for v in value]
+    if isinstance(value, pd.Series):
+        return {"index": json_value(value.index), "values": json_value(value.to_numpy())}
+    if isinstance(value, pd.DataFrame):
+        return table_json(value)
+    if isinstance(value, (pd.Index, np.ndarray)):
+        return [json_value(v) for v in value.tolist()]
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+def table_json(df):
+    """A frame (or Styler) as {"columns": [...], "rows": [[...], ...]}; a named index becomes columns."""
+    df = df.data if isinstance(getattr(df, "data", None), pd.DataFrame) else df
+    if not isinstance(df.index, pd.RangeIndex):
+        df = df.reset_index()
+    # to_json handles NaN, dates and numpy scalars column-wise, much faster than per cell
+    split = json.loads(df.to_json(orient="split", index=False, date_format="iso", default_handler=str))
+    return {"columns": [json_value(c) for c in df.columns], "rows": split["data"]}
+
+
+def figure_png(fig, dpi=CHART_DPI):
+    """Renders a matplotlib figure to PNG bytes and closes it."""
+    import matplotlib.pyplot as plt
+
+    buf = BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=dpi)
+    plt.close(fig)
+    return buf.getvalue()
+
+
+class Report:
+    """An ordered list of display blocks; columns nest child Reports."""
+
+    def __init__(self):
+        self.blocks = []
+
+    # Lets `with col1:` blocks read like the Streamlit code they replace
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def markdown(self, text, **kwargs):
+        self.blocks.append(("markdown", text, kwargs))
+
+    def info(self, text):
+        self.blocks.append(("info", text, {}))
+
+    def warning(self, text):
+        self.blocks.append(("warning", text, {}))
+
+    def error(self, text):
+        self.blocks.append(("error", text, {}))
+
+    def dataframe(self, data, **kwargs):
+        self.blocks.append(("dataframe", data, kwargs))
+
+    def pyplot(self, fig):
+        """Adds a chart; the figure is rendered now and closed."""
+        self.image(figure_png(fig))
+
+    def image(self, png, **kwargs):
+        self.blocks.append(("image", png, kwargs))
+
+    def chart(self, spec):
+        """
+        Adds a chart described by a ChartSpec; it starts rendering now, in the
+        background, unless the report is built inside specs_only().
+        """
+        future = charts.submit(spec) if _render_charts.get() else None
+        self.blocks.append(("chart", future, {"spec": spec}))
+
+    def detached(self):
+        """
+        Copy of the report whose charts hold only their specs, so caching it
+        does not pin rendered bytes; they are fetched from the chart cache
+        (or re-rendered) when the copy is replayed.
+        """
+        copy = Report()
+        for kind, payload, extra in self.blocks:
+            if kind == "chart":
+                payload = None
+            elif kind == "columns":
+                extra = [child.detached() for child in extra]
+            copy.blocks.append((kind, payload, extra))
+        return copy
+
+    def columns(self, spec):
+        n = spec if isinstance(spec, int) else len(spec)
+        children = [Report() for _ in range(n)]
+        self.blocks.append(("columns", spec, children))
+        return children
+
+    def download(self, label, download_label, builder, file_name):
+        """A button that builds a file with builder() only when clicked."""
+        self.blocks.append(("download", label, {"download_label": download_label, "builder": builder, "file_name": file_name}))
+
+    @property
+    def images(self):
+        """PNG bytes of every chart, in display order (columns included)."""
+        found = []
+        for kind, payload, extra in self.blocks:
+            if kind == "image":
+                found.append(payload)
+            elif kind == "chart":
+                found.append((payload or charts.submit(extra["spec"])).result())
+            elif kind == "columns":
+                for child in extra:
+                    found.extend(child.images)
+        return found
+
+    @property
+    def specs(self):
+        """ChartSpecs of every chart added with chart(), in display order."""
+        found = []
+        for kind, payload, extra in self.blocks:
+            if kind == "chart":
+                found.append(extra["spec"])
+            elif kind == "columns":
+                for child in extra:
+                    found.extend(child.specs)
+        return found
+
+    def render(self, target):
+        """
+        Replays the blocks on a Streamlit-like target (st or a column).
+
+        Text and tables are written first; each chart still rendering gets a
+        placeholder that is filled as soon as its bytes are ready.
+
+        Args:
+            target: Object with markdown/dataframe/image/columns/... methods.
+        """
+        pending = {}
+        self._render(target, pending)
+        for future in as_completed(pending):
+            pending[future].image(future.result(), width="stretch")
+
+    def _render(self, target, pending):
+        for kind, payload, extra in self.blocks:
+            if kind == "columns":
+                for container, child in zip(target.columns(payload), extra):
+                    with container:
+                        child._render(container, pending)
+            elif kind == "image":
+                target.image(payload, width="stretch", **extra)
+            elif kind == "chart":
+                future = payload or charts.submit(extra["spec"])
+                if future.done():
+                    target.image(future.result(), width="stretch")
+                else:
+                    pending[future] = target.empty()
+            elif kind == "download":
+                if target.button(payload):
+                    target.download_button(extra["download_label"], data=extra["builder"](), file_name=extra["file_name"])
+            elif kind in ("info", "warning", "error"):
+                getattr(target, kind)(payload)
+            else:
+                getattr(target, kind)(payload, **extra)
+
+    def to_dict(self):
+        """
+        JSON-ready form of the report, in display order (columns flattened).
+
+        Returns:
+            dict: "summary" (markdown and info text), "notices" (warnings and
+                errors as {"level", "text"}), "tables" ({"columns", "rows"}),
+                "charts" ({"kind", "key", "data"}: the spec, not its bytes),
+                "images" (base64 PNG of charts added as figures) and
+                "downloads" (labels of files built on request).
+        """
+        out = {"summary": [], "notices": [], "tables": [], "charts": [], "images": [], "downloads": []}
+        self._collect(out)
+        return out
+
+    def _collect(self, out):
+        for kind, payload, extra in self.blocks:
+            if kind == "columns":
+                for child in extra:
+                    child._collect(out)
+            elif kind in ("markdown", "info"):
+                out["summary"].append(payload)
+            elif kind in ("warning", "error"):
+                out["notices"].append({"level": kind, "text": payload})
+            elif kind == "dataframe":
+                out["tables"].append(table_json(payload))
+            elif kind == "chart":
+                spec = extra["spec"]
+                out["charts"].append({"kind": spec.kind, "key": spec.key, "data": json_value(spec.data)})
+            elif kind == "image":
+                out["images"].append(base64.b64encode(payload).decode("ascii"))
+            elif kind == "download":
+                out["downloads"].append({"label": payload, "file_name": extra["file_name"]})
+
+    def nbytes(self):
+        """Approximate memory held by the report, for cache accounting."""
+        total = 0
+        for kind, payload, extra in self.blocks:
+            if kind == "columns":
+                total += sum(child.nbytes() for child in extra)
+                continue
+            if kind == "chart":
+                if payload is not None and payload.done() and payload.exception() is None:
+                    total += len(payload.result())
+                # Spec data: DataFrames and arrays passed to the renderer
+                total += 64 + sum(
+                    int(v.memory_usage(deep=True).sum()) if isinstance(v, pd.DataFrame)
+                    else v.nbytes if isinstance(v, np.ndarray) else 0
+                    for v in extra["spec"].data.values()
+                )
+                continue
+            # Stylers wrap their frame in .data
+            data = payload.data if isinstance(getattr(payload, "data", None), pd.DataFrame) else payload
+            if isinstance(data, pd.DataFrame):
+                total += int(data.memory_usage(deep=True).sum())
+            elif isinstance(data, (bytes, str)):
+                total += len(data)
+            else:
+                total += 64
+        return total
@@ -0,0 +1,82 @@
+# utils/result_cache.py
+# Memory-bounded LRU of computed answers.
+#
+# Keys are (question id, extracted parameters, dataset versions), built by
+# questions.registry.dispatch. Values are Reports or the dicts older
+# question modules return: tables, summary text and PNG chart bytes, so a
+# hit is replayed without touching pandas. Reports are stored detached: their
+# charts keep only specs and replay from the chart cache.
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.report import Report
+
+RESULT_CACHE_MB = float(os.environ.get("CA_RESULT_CACHE_MB", "64"))
+
+
+def result_size(result):
+    """Approximate bytes held by a cached result."""
+    if isinstance(result, Report):
+        return result.nbytes()
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=True).sum())
+    if isinstance(result, (bytes, str)):
+        return len(result)
+    if isinstance(result, dict):
+        return sum(result_size(v) for v in result.values()) + 64
+    if isinstance(result, (list, tuple)):
+        return sum(result_size(v) for v in result) + 64
+    return 64
+
+
+class ResultCache:
+    """LRU evicting least recently used answers once `max_bytes` is exceeded."""
+
+    def __init__(self, max_bytes=int(RESULT_CACHE_MB * 1e6)):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        if isinstance(value, Report):
+            value = value.detached()
+        size = result_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+result_cache = ResultCache()
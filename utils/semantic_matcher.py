@@ -1,9 +1,17 @@
 import os
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+from utils import tracing
+from utils.embedding_store import load_embeddings
+from utils.lexical_router import LexicalRouter, RouteResult
+from utils.vector_index import build_index, top_intents as rank_intents
 
-# Load the model
-model = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+QUERY_CACHE_SIZE = 1024
+# "torch" (sentence-transformers) or "onnx" (int8 graph, see utils/onnx_encoder.py)
+MATCHER_BACKEND = os.environ.get("CA_MATCHER_BACKEND", "torch")
 
 # Updated PROMPT BANK with dynamic Q2 intent
 PROMPT_BANK = {
@@ -49,6 +57,38 @@ PROMPT_BANK = {
         "MoM FTE for customers",
         "Headcount trend month over month",
         "Month-wise headcount per client"
+    ],
+    "Q6": [
+        "What is the YoY revenue trend by segment and account?",
+        "Show QoQ revenue growth by segment",
+        "Revenue trend year over year per segment",
+        "Month over month revenue by account",
+        "How has revenue changed quarter over quarter for each segment?"
+    ],
+    "Q9": [
+        "What is the revenue per person for an account?",
+        "Monthly revenue per head for a client",
+        "Revenue per FTE trend for an account",
+        "Show revenue per employee by month for a customer"
+    ],
+    "Q10": [
+        "What is the UT% trend for the last two quarters?",
+        "Utilization trend for a delivery unit",
+        "Show UT% for a business unit over the last 6 months",
+        "Billed vs total headcount utilization for an account",
+        "How has utilization changed for a DU?"
+    ],
+    "Q12": [
+        "What is the DU wise fresher UT trend?",
+        "Show fresher utilization by delivery unit",
+        "Fresher UT% for the last two quarters",
+        "How utilized are freshers in each DU?"
+    ],
+    "Q11": [
+        "Who joined or left the account this month?",
+        "Show joiners and leavers for a client",
+        "Which employees transferred between accounts last month?",
+        "How many people left the account in March 2025?"
     ]
 }
 
@@ -59,13 +99,218 @@ for qid, qlist in PROMPT_BANK.items():
         questions.append(q)
         qids.append(qid)
 
-# Precompute question embeddings
-question_embeddings = model.encode(questions)
+
+class _ModelHandle:
+    """
+    Shared, lazily loaded sentence-transformer plus the prompt-bank embeddings.
+
+    Nothing is imported or encoded until the first query (or warm_up), so
+    importing this module is cheap. Concurrent callers wait on one load.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, backend=None):
+        self.model_name = model_name
+        self.backend = backend or MATCHER_BACKEND
+        self._lock = threading.Lock()
+        self._model = None
+        self._index = None
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._model is not None
+
+    def get(self):
+        """Returns (model, vector index over the prompt bank), loading them if needed."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    model, store_key = self._load_model()
+                    # Stored normalized, so a restart only re-encodes new paraphrases
+                    embeddings = load_embeddings(
+                        store_key, questions, lambda texts: _normalize(model.encode(texts))
+                    )
+                    self._index = build_index(embeddings)
+                    self._model = model
+        return self._model, self._index
+
+    def _load_model(self):
+        if self.backend == "onnx":
+            from utils.onnx_encoder import OnnxEncoder, default_model_dir
+            return OnnxEncoder(default_model_dir(self.model_name)), f"{self.model_name}@onnx-int8"
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name), self.model_name
+
+    def warm_up(self):
+        """Starts loading in a daemon thread; returns the thread (None when already loaded)."""
+        if self.ready:
+            return None
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._warm, name="semantic-matcher-warmup", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _warm(self):
+        try:
+            self.get()
+        except Exception:
+            # Surface load errors on the first real query instead of a background thread
+            pass
+
+
+def _normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype="float32")
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return embeddings / np.where(norms == 0, 1, norms)
+
+
+model_handle = _ModelHandle()
+lexical_router = LexicalRouter(PROMPT_BANK)
+
+
+def warm_up():
+    """Loads the model in the background so the first query does not pay for it."""
+    return model_handle.warm_up()
+
+
+class _QueryCache:
+    """Bounded LRU of normalized query text -> RouteResult."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+query_cache = _QueryCache()
+
+
+def normalize_query(user_query):
+    """Cache key for a query: case-folded with whitespace collapsed."""
+    return " ".join(str(user_query).split()).casefold()
+
+
+@tracing.traced("routing")
+def route_queries(user_queries, batch_size=256):
+    """
+    Routes many queries at once: cache, then the lexical tiers, then embeddings.
+
+    Queries the lexical router cannot answer confidently are encoded together
+    in one batch.
+
+    Args:
+        user_queries (list[str]): Queries to match.
+        batch_size (int): Encoder batch size.
+
+    Returns:
+        list[RouteResult]: (qid, question, confidence, tier) per query, in order.
+    """
+    keys = [normalize_query(q) for q in user_queries]
+    results = {}
+    pending = {}
+    for key, query in zip(keys, user_queries):
+        if key in results or key in pending:
+            continue
+        hit = query_cache.get(key)
+        if hit is None:
+            hit = lexical_router.route(query)
+            if hit is not None:
+                query_cache.put(key, hit)
+        if hit is not None:
+            results[key] = hit
+        else:
+            pending[key] = query
+
+    tracing.annotate(queries=len(keys), encoded=len(pending))
+    if pending:
+        with tracing.span("routing.model"):
+            model, index = model_handle.get()
+        with tracing.span("routing.encode", queries=len(pending)):
+            query_embeddings = _normalize(model.encode(list(pending.values()), batch_size=batch_size))
+        scores, ids = index.search(query_embeddings, k=1)
+        for key, score, idx in zip(pending, scores[:, 0], ids[:, 0]):
+            idx = int(idx)
+            if idx < 0:
+                # Nothing to compare against (empty index): no route, and nothing worth caching
+                results[key] = RouteResult(None, None, 0.0, "embedding")
+                continue
+            match = RouteResult(qids[idx], questions[idx], float(score), "embedding")
+            query_cache.put(key, match)
+            results[key] = match
+
+    return [results[key] for key in keys]
+
+
+def route_query(user_query):
+    """Routes one query; see route_queries."""
+    return route_queries([user_query])[0]
+
+
+def find_best_matching_qids(user_queries, batch_size=256):
+    """Returns (qid, matched prompt-bank question) per query, in order."""
+    return [(r.qid, r.question) for r in route_queries(user_queries, batch_size=batch_size)]
+
 
 def find_best_matching_qid(user_query):
-    query_embedding = model.encode([user_query])[0]
-    similarities = util.cos_sim(query_embedding, question_embeddings)[0]
-    best_idx = similarities.argmax().item()
-    best_qid = qids[best_idx]
-    matched_question = questions[best_idx]
-    return best_qid, matched_question
+    result = route_query(user_query)
+    return result.qid, result.question
+
+
+def top_intents(user_query, k=3):
+    """
+    Ranks intents for a query by their closest paraphrase.
+
+    This is the embedding ranking alone: the keyword and TF-IDF tiers are
+    skipped, so for queries they answer, route_query can pick an intent other
+    than the first one here.
+
+    Returns:
+        list[tuple]: Up to k (qid, score, matched question), best first.
+    """
+    model, index = model_handle.get()
+    query_embedding = _normalize(model.encode([user_query]))
+    return [(qid, score, questions[idx]) for qid, score, idx in rank_intents(index, qids, query_embedding, k=k)[0]]
+
+
+def add_paraphrases(qid, texts):
+    """
+    Adds paraphrases for an intent to the live index without a rebuild.
+
+    The TF-IDF tier gets them too (its index is small and rebuilt). They are
+    not written to the embedding store; add them to PROMPT_BANK to keep them
+    across restarts.
+    """
+    global lexical_router
+    texts = list(texts)
+    model, index = model_handle.get()
+    embeddings = _normalize(model.encode(texts))
+    with model_handle._lock:
+        # Labels first, so a concurrent search never sees an id without one
+        questions.extend(texts)
+        qids.extend([qid] * len(texts))
+        index.add(embeddings)
+        # Swapped whole, so concurrent routes see either the old router or the new one
+        lexical_router = lexical_router.extended(qid, texts)
+    query_cache.clear()
@@ -0,0 +1,215 @@
+# utils/slots.py
+# One slot-filling pass per question.
+#
+# extract() pulls every parameter the question modules use out of the user's
+# text in a single pass: the margin threshold and month come from
+# precompiled patterns, and segment/client/DU/BU names come from an
+# Aho-Corasick gazetteer built once per loaded frame. The result is an
+# immutable QuestionParams that question modules read instead of re-parsing
+# the question themselves.
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from data_loader.registry import derived
+from utils import tracing
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4,
+    "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12
+}
+
+# Tried in order, first hit wins (same order the Q1 extractor used)
+_THRESHOLD_PATTERNS = [
+    re.compile(r"margin\s*<\s*(\d+)"),
+    re.compile(r"less than\s*(\d+)"),
+    re.compile(r"below\s*(\d+)"),
+    re.compile(r"under\s*(\d+)"),
+    re.compile(r"margin.*?(\d+)\s*%"),
+]
+_MONTH_PATTERN = re.compile(r"(" + "|".join(MONTHS) + r")\s*(\d{4})")
+
+# Frame column -> slot it fills
+GAZETTEER_COLUMNS = {
+    "Segment": "segment",
+    "Client": "client",
+    "FinalCustomerName": "client",
+    "Delivery_Unit": "delivery_unit",
+    "BusinessUnit": "business_unit",
+}
+
+
+@dataclass(frozen=True)
+class QuestionParams:
+    """Parameters extracted from one user question."""
+
+    question: str = ""
+    threshold: Optional[float] = None
+    month: Optional[pd.Timestamp] = None
+    segment: Optional[str] = None
+    client: Optional[str] = None
+    delivery_unit: Optional[str] = None
+    business_unit: Optional[str] = None
+    entities: tuple = ()
+
+    def cache_key(self):
+        """The slots alone: rephrasings that extract the same values share a key."""
+        return (self.threshold, self.month, self.segment, self.client, self.delivery_unit, self.business_unit)
+
+
+class Gazetteer:
+    """
+    Aho-Corasick automaton over entity names (case-insensitive, whole words).
+
+    All names are matched in a single scan of the text, however many there are.
+    """
+
+    def __init__(self, entries):
+        # entries: iterable of (name, kind)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for name, kind in entries:
+            key = str(name).strip().lower()
+            if key:
+                self._insert(key, (kind, str(name).strip()))
+        self._link()
+
+    def _insert(self, key, payload):
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(key), payload))
+
+    def _link(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text):
+        """
+        Returns non-overlapping matches, leftmost-longest first.
+
+        Returns:
+            list[tuple]: (start, end, kind, name) in text order.
+        """
+        text = text.lower()
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, (kind, name) in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if _is_word(text, start, end):
+                    hits.append((start, end, kind, name))
+
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        chosen, last_end = [], -1
+        for hit in hits:
+            if hit[0] >= last_end:
+                chosen.append(hit)
+                last_end = hit[1]
+        return chosen
+
+
+def _is_word(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+def _names(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.categories
+    return series.dropna().unique()
+
+
+def build_gazetteer(df):
+    """Gazetteer over the GAZETTEER_COLUMNS present in `df`."""
+    entries = []
+    for col, kind in GAZETTEER_COLUMNS.items():
+        if col in df.columns:
+            entries.extend((name, kind) for name in _names(df[col]) if isinstance(name, str))
+    return Gazetteer(entries)
+
+
+def gazetteer_for(df):
+    """Returns the gazetteer for a loaded frame, built once per dataset."""
+    return derived(df, "gazetteer", build_gazetteer)
+
+
+def extract_threshold(text):
+    for pattern in _THRESHOLD_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def extract_month(text):
+    match = _MONTH_PATTERN.search(text)
+    if match:
+        return pd.Timestamp(year=int(match.group(2)), month=MONTHS[match.group(1)], day=1)
+    return None
+
+
+@tracing.traced("slots")
+def extract(user_question, df=None):
+    """
+    Fills every slot for a question in one pass.
+
+    Args:
+        user_question (str): The user's text.
+        df (pd.DataFrame | list[pd.DataFrame]): Loaded frame(s) whose entity
+            names feed the gazetteer; earlier frames win on conflicting slots.
+
+    Returns:
+        QuestionParams: The extracted parameters.
+    """
+    question = user_question or ""
+    text = question.lower()
+    frames = [] if df is None else (list(df) if isinstance(df, (list, tuple)) else [df])
+
+    found = {}
+    entities = ()
+    if question:
+        for frame in frames:
+            matches = gazetteer_for(frame).find(question)
+            entities += tuple((kind, name) for _, _, kind, name in matches)
+        for kind, name in entities:
+            found.setdefault(kind, name)
+
+    return QuestionParams(
+        question=question,
+        threshold=extract_threshold(text),
+        month=extract_month(text),
+        entities=entities,
+        **found
+    )
+
+
+def as_params(user_question, df=None):
+    """Accepts either raw text or already-extracted QuestionParams."""
+    if isinstance(user_question, QuestionParams):
+        return user_question
+    return extract(user_question, df)
@@ -0,0 +1,231 @@
+# utils/tracing.py
+# Per-question span timings.
+#
+# A trace is opened around each answered question (the app, service.answer,
+# the async pipeline). Code on the question's path marks its stages with
+# span(); spans nest through a ContextVar, so nothing has to be passed
+# around, and outside a trace span() costs one ContextVar lookup.
+#
+#   with tracing.trace(question, source="app"):
+#       with tracing.span("routing"):
+#           route = route_query(question)
+#       tracing.annotate(qid=route.qid)
+#
+# Top-level stages are named routing, slots, data, compute, format and
+# render; nested spans (data.read, derived.pnl_cube, render.chart, ...) say
+# where inside a stage the time went. Finished traces are kept in memory for
+# the app's developer panel and, with CA_TRACE_FILE set, appended to that
+# file as JSON lines.
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+TRACE_HISTORY = 500
+TRACE_FILE = os.environ.get("CA_TRACE_FILE") or None
+
+STAGES = ("routing", "slots", "data", "compute", "format", "render")
+
+_current = ContextVar("tracing_span", default=None)
+
+
+class Span:
+    """A named, timed section of a trace with its nested spans."""
+
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name, attrs=None, start=None, end=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter() if start is None else start
+        self.end = end
+        self.children = []
+
+    @property
+    def duration_ms(self):
+        end = time.perf_counter() if self.end is None else self.end
+        return (end - self.start) * 1000
+
+    def flatten(self, origin=None, depth=0, parent=None, out=None):
+        """Spans in start order as dicts, with start offsets relative to `origin`."""
+        origin = self.start if origin is None else origin
+        out = [] if out is None else out
+        index = len(out)
+        out.append({
+            "name": self.name,
+            "depth": depth,
+            "parent": parent,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+            "attrs": dict(self.attrs),
+        })
+        for child in sorted(self.children, key=lambda s: s.start):
+            child.flatten(origin, depth + 1, index, out)
+        return out
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Times a block as a child of the current span.
+
+    Yields:
+        Span | None: The span, or None when no trace is active.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.attrs["error"] = type(e).__name__
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def traced(name):
+    """Decorator form of span()."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def annotate(**attrs):
+    """Adds attributes to the current span (no-op outside a trace)."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def record(name, start, end, **attrs):
+    """Adds an already-timed span (perf_counter start/end) under the current span."""
+    parent = _current.get()
+    if parent is not None:
+        parent.children.append(Span(name, attrs, start, end))
+
+
+@contextmanager
+def trace(question, **attrs):
+    """
+    Opens a trace for one question; it is recorded when the block exits.
+
+    Args:
+        question (str): The question being answered.
+        **attrs: Extra attributes for the root span (e.g. source="app").
+
+    Yields:
+        Span: The root span; set its "qid" with annotate() once routed.
+    """
+    root = Span("question", {"question": question, **attrs})
+    wall = time.time()
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.end = time.perf_counter()
+        _current.reset(token)
+        recorder.add(root, wall)
+
+
+class TraceRecorder:
+    """The last `history` traces as JSON-ready records, optionally appended to a JSONL file."""
+
+    def __init__(self, history=TRACE_HISTORY, path=TRACE_FILE):
+        self.path = path
+        self._traces = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def add(self, root, wall=None):
+        attrs = dict(root.attrs)
+        spans = []
+        for child in sorted(root.children, key=lambda s: s.start):
+            child.flatten(root.start, 0, None, spans)
+        entry = {
+            "trace_id": uuid.uuid4().hex[:16],
+            "ts": round(time.time() if wall is None else wall, 3),
+            "question": attrs.pop("question", None),
+            "qid": attrs.pop("qid", None),
+            "duration_ms": round(root.duration_ms, 3),
+            "attrs": attrs,
+            "spans": spans,
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            self._traces.append(entry)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        return entry
+
+    def recent(self, n=None):
+        """Recorded traces, oldest first (the last `n` when given)."""
+        with self._lock:
+            traces = list(self._traces)
+        return traces if n is None else traces[-n:]
+
+    def to_jsonl(self):
+        return "".join(json.dumps(entry, default=str) + "\n" for entry in self.recent())
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+recorder = TraceRecorder()
+
+
+def stage_summary(traces=None):
+    """
+    Latency of each top-level stage per question id.
+
+    Args:
+        traces (list[dict]): Trace records, defaults to the recorder's.
+
+    Returns:
+        pd.DataFrame: One row per (qid, stage) with count, mean, p50, p95
+            and max in milliseconds.
+    """
+    import pandas as pd
+
+    traces = recorder.recent() if traces is None else traces
+    rows = []
+    for entry in traces:
+        qid = entry["qid"] or "-"
+        rows += [(qid, s["name"], s["duration_ms"]) for s in entry["spans"] if s["depth"] == 0]
+        rows.append((qid, "total", entry["duration_ms"]))
+    if not rows:
+        return pd.DataFrame(columns=["qid", "stage", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+
+    frame = pd.DataFrame(rows, columns=["qid", "stage", "ms"])
+    # Stages in pipeline order, then anything else, then the total
+    order = list(STAGES) + sorted(set(frame["stage"]) - set(STAGES) - {"total"}) + ["total"]
+    frame["stage"] = pd.Categorical(frame["stage"], categories=order, ordered=True)
+    grouped = frame.groupby(["qid", "stage"], sort=True, observed=True)["ms"]
+    summary = pd.DataFrame({
+        "count": grouped.size(),
+        "mean_ms": grouped.mean(),
+        "p50_ms": grouped.median(),
+        "p95_ms": grouped.quantile(0.95),
+        "max_ms": grouped.max(),
+    }).round(2).reset_index()
+    summary["stage"] = summary["stage"].astype(str)
+    return summary
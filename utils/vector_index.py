@@ -0,0 +1,187 @@
+# utils/vector_index.py
+# Vector indexes for the intent matcher.
+#
+# Both indexes store L2-normalized vectors and score by inner product (cosine):
+#
+#   BruteForceIndex  exact scan; right for banks up to a few thousand rows
+#   IVFIndex         inverted-file ANN: spherical k-means centroids, each
+#                    query scans only the n_probe closest lists (all vectors
+#                    when those lists are empty)
+#
+# Vectors are appended to growable buffers, so inserts never rebuild the
+# index. IVF assigns new vectors to their nearest existing centroid.
+
+import numpy as np
+
+# Banks at least this large get an IVF index from build_index
+ANN_THRESHOLD = 4096
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class _Buffer:
+    """Append-only float32 matrix with amortized O(1) inserts."""
+
+    def __init__(self, dim, capacity=64):
+        self.data = np.empty((capacity, dim), dtype=np.float32)
+        self.size = 0
+
+    def append(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data)), self.data.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = rows
+        self.size = needed
+
+    @property
+    def view(self):
+        return self.data[:self.size]
+
+
+class BruteForceIndex:
+    """Exact inner-product search."""
+
+    def __init__(self, dim):
+        self.dim = dim
+        self._vectors = _Buffer(dim)
+
+    def __len__(self):
+        return self._vectors.size
+
+    def add(self, vectors):
+        """Appends vectors; their ids continue from the current size."""
+        self._vectors.append(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+
+    def search(self, queries, k=1):
+        """
+        Returns the k nearest stored vectors per query.
+
+        Returns:
+            tuple: (scores, ids), both shaped (n_queries, k), best first.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        scores = queries @ self._vectors.view.T
+        ids = _top_k(scores, k)
+        return np.take_along_axis(scores, ids, axis=1), ids
+
+
+class IVFIndex:
+    """Inverted-file index over spherical k-means cells."""
+
+    def __init__(self, dim, n_lists=None, n_probe=8, seed=0):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.seed = seed
+        self.centroids = None
+        self._vectors = _Buffer(dim)
+        self._lists = []
+
+    def __len__(self):
+        return self._vectors.size
+
+    def train(self, vectors, iterations=10):
+        """Fits the centroids; called automatically by the first add."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(self.seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = (vectors @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty cells keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms == 0, 1, norms), centroids)
+        self.centroids = centroids
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+
+    def add(self, vectors):
+        """Appends vectors to the cell of their nearest centroid."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.centroids is None:
+            self.train(vectors)
+        start = self._vectors.size
+        self._vectors.append(vectors)
+        assign = (vectors @ self.centroids.T).argmax(axis=1)
+        ids = np.arange(start, start + len(vectors))
+        for cell in np.unique(assign):
+            self._lists[cell] = np.concatenate([self._lists[cell], ids[assign == cell]])
+
+    def search(self, queries, k=1):
+        """
+        Same contract as BruteForceIndex.search, except that rows are padded
+        with id -1 (score -inf) when the probed cells hold fewer than k vectors.
+        A query whose probed cells are all empty is scanned against every vector,
+        so it only comes back empty when the index is.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if self.centroids is None:
+            return out_scores, out_ids
+
+        probes = _top_k(queries @ self.centroids.T, self.n_probe)
+        data = self._vectors.view
+        everything = np.arange(len(data))
+        for row, cells in enumerate(probes):
+            candidates = np.concatenate([self._lists[c] for c in cells])
+            if not len(candidates):
+                candidates = everything
+            scores = data[candidates] @ queries[row]
+            best = _top_k(scores[None, :], k)[0]
+            out_scores[row, :len(best)] = scores[best]
+            out_ids[row, :len(best)] = candidates[best]
+        return out_scores, out_ids
+
+
+def build_index(vectors, ann_threshold=ANN_THRESHOLD, **ivf_options):
+    """Returns an exact index for small banks and an IVF index for large ones."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if len(vectors) >= ann_threshold:
+        index = IVFIndex(vectors.shape[1], **ivf_options)
+    else:
+        index = BruteForceIndex(vectors.shape[1])
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+
+def top_intents(index, labels, queries, k=3, candidates=32):
+    """
+    Ranks intents (labels) per query by their best-scoring paraphrase.
+
+    Args:
+        index: BruteForceIndex or IVFIndex over the paraphrase vectors.
+        labels (list[str]): Intent id per stored vector.
+        queries (np.ndarray): Normalized query vectors.
+        k (int): Intents to return per query.
+        candidates (int): Nearest paraphrases to pull before grouping by intent.
+
+    Returns:
+        list[list[tuple]]: Per query, up to k (label, score, vector id), best first.
+    """
+    scores, ids = index.search(queries, k=max(k, candidates))
+    ranked = []
+    for row_scores, row_ids in zip(scores, ids):
+        seen, row = set(), []
+        for score, idx in zip(row_scores, row_ids):
+            if idx < 0 or labels[idx] in seen:
+                continue
+            seen.add(labels[idx])
+            row.append((labels[idx], float(score), int(idx)))
+            if len(row) == k:
+                break
+        ranked.append(row)
+    return ranked
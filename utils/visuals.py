@@ -1,20 +1,23 @@
-import matplotlib.pyplot as plt
-import io
 import base64
 
-def generate_bar_chart(df, x_col, y_col, title):
-    fig, ax = plt.subplots()
-    ax.bar(df[x_col], df[y_col])
+from matplotlib.figure import Figure
+
+from utils import charts
+
+
+@charts.renderer("bar")
+def bar_chart(x, y, title, xlabel, ylabel):
+    fig = Figure()
+    ax = fig.subplots()
+    ax.bar(x, y)
     ax.set_title(title)
-    ax.set_xlabel(x_col)
-    ax.set_ylabel(y_col)
-    plt.xticks(rotation=45)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.tick_params(axis="x", rotation=45)
+    fig.tight_layout()
+    return fig
 
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
+def generate_bar_chart(df, x_col, y_col, title):
+    spec = charts.ChartSpec("bar", x=df[x_col].tolist(), y=df[y_col].tolist(), title=title, xlabel=x_col, ylabel=y_col)
+    encoded = base64.b64encode(charts.render_png(spec)).decode("utf-8")
     return {"type": "image", "image_base64": encoded}
-